@@ -40,18 +40,24 @@ with open("output.txt", "w") as f:
     print("Hello, File!", file=f)
 
 ################################################################## 9. Redirecting stdout to a File
-with open("output.txt", "w") as f:
+# Append ("a") instead of truncating what section 8 wrote, and restore sys.stdout even on errors.
+# For a buffered, per-thread version see 04_output_sinks.py (redirect_output).
+with open("output.txt", "a") as f:
     original_stdout = sys.stdout
     sys.stdout = f
-    print("Hello, File!")
-    sys.stdout = original_stdout
+    try:
+        print("Hello, File!")
+    finally:
+        sys.stdout = original_stdout
 
 ################################################################## 10. Using sys.stdout.write
-with open("output.txt", "w") as f:
+with open("output.txt", "a") as f:
     original_stdout = sys.stdout
     sys.stdout = f
-    sys.stdout.write("Hello, World!\n")
-    sys.stdout = original_stdout
+    try:
+        sys.stdout.write("Hello, World!\n")
+    finally:
+        sys.stdout = original_stdout
 
 ################################################################## 11. Printing with end Parameter
 print("Hello", end=", ")
@@ -0,0 +1,365 @@
+"""
+Buffered, Thread-safe Output Sinks
+
+Sections 8 to 10 of 03_printing.py reopen output.txt and swap sys.stdout by
+hand. That truncates the file every time, leaves sys.stdout pointing at a
+closed file if an exception is raised, is shared by every thread, and issues
+one write per print. This script builds a small output sink subsystem:
+
+1. OutputSink: a file opened once in append mode behind a write buffer
+2. Three flush strategies: os.write, os.writev and an mmap'd append file
+3. redirect_output(): a context manager that redirects stdout/stderr for the
+   current thread/task only (contextvars based) and always flushes and restores
+4. A throughput benchmark against line-by-line printing
+"""
+
+import contextvars
+import io
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # 1 MiB
+STRATEGIES = ("write", "writev", "mmap")
+
+
+################################################################## 1. The sink: one file descriptor, one write buffer
+class OutputSink:
+    """
+    Append-only file sink that buffers writes and flushes them in bulk
+
+    Writes are collected as str pieces and encoded once per flush.
+    `buffer_size` is the number of buffered characters that triggers a flush.
+
+    Strategies:
+    1. "write"  - join and encode the buffer, flush with a single os.write
+    2. "writev" - encode ~64K blocks, flush them with one os.writev call
+    3. "mmap"   - grow the file with ftruncate and copy the buffer into an mmap
+
+    The file is opened once (O_APPEND, never truncated) and every write is
+    guarded by a lock, so several threads may share the same sink.
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 strategy: str = "write", encoding: str = "utf-8"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        if strategy == "writev" and not hasattr(os, "writev"):
+            strategy = "write"  # os.writev is POSIX only
+        self.path = path
+        self.strategy = strategy
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.bytes_written = 0
+        self.flushes = 0
+
+        if strategy == "mmap":
+            # mmap needs a readable descriptor and explicit offsets, so no O_APPEND
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._pending_chars = 0
+
+    # TextIO-like interface so the sink can stand in for sys.stdout
+    def write(self, text: str) -> int:
+        # Encoding is deferred to flush time: one encode per buffer, not per print
+        with self._lock:
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            if self._pending_chars >= self.buffer_size:
+                self._flush_locked()
+        return len(text)
+
+    def writelines(self, lines) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd < 0:
+                return
+            self._flush_locked()
+            os.close(self._fd)
+            self._fd = -1
+
+    @property
+    def closed(self) -> bool:
+        return self._fd < 0
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def isatty(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Flushing
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        if self.strategy == "writev":
+            self._writev(self._encode_blocks())
+        elif self.strategy == "mmap":
+            self._mmap_append("".join(self._pending).encode(self.encoding))
+        else:
+            self._write_all("".join(self._pending).encode(self.encoding))
+        self._pending.clear()
+        self._pending_chars = 0
+        self.flushes += 1
+
+    def _encode_blocks(self, block_chars: int = 1 << 16) -> List[bytes]:
+        # Join into ~64K blocks so writev never needs one giant contiguous copy
+        blocks, current, current_chars = [], [], 0
+        for text in self._pending:
+            current.append(text)
+            current_chars += len(text)
+            if current_chars >= block_chars:
+                blocks.append("".join(current).encode(self.encoding))
+                current, current_chars = [], 0
+        if current:
+            blocks.append("".join(current).encode(self.encoding))
+        return blocks
+
+    def _write_all(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        self.bytes_written += len(data)
+
+    def _writev(self, blocks: List[bytes]) -> None:
+        # A single writev may be partial or capped at IOV_MAX buffers
+        max_buffers = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+        while blocks:
+            batch = blocks[:max_buffers]
+            written = os.writev(self._fd, batch)
+            self.bytes_written += written
+            del blocks[:len(batch)]
+            expected = sum(len(block) for block in batch)
+            if written < expected:
+                # Put back whatever the kernel did not take
+                blocks.insert(0, b"".join(batch)[written:])
+
+    def _mmap_append(self, data) -> None:
+        size = len(data)
+        if size == 0:  # Nothing to copy, and an empty file can't be mapped
+            return
+        start = os.fstat(self._fd).st_size
+        offset = start - start % mmap.ALLOCATIONGRANULARITY
+        os.ftruncate(self._fd, start + size)
+        with mmap.mmap(self._fd, start + size - offset, offset=offset) as mapped:
+            mapped[start - offset:start - offset + size] = data
+        self.bytes_written += size
+
+
+################################################################## 2. Per-thread routing with contextvars
+_stdout_sink: contextvars.ContextVar = contextvars.ContextVar("stdout_sink", default=None)
+_stderr_sink: contextvars.ContextVar = contextvars.ContextVar("stderr_sink", default=None)
+
+
+class _RoutingStream(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr that forwards each write to the sink
+    bound in the current context, or to the original stream otherwise.
+    Threads and asyncio tasks that never entered redirect_output() keep
+    writing to the terminal as before.
+    """
+
+    def __init__(self, var: contextvars.ContextVar, fallback):
+        self._var = var
+        self._fallback = fallback
+
+    def _target(self):
+        return self._var.get() or self._fallback
+
+    def write(self, text: str) -> int:
+        # Hot path: avoid the extra _target() call
+        return (self._var.get() or self._fallback).write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def fileno(self) -> int:
+        return self._target().fileno()
+
+    @property
+    def encoding(self):
+        return getattr(self._target(), "encoding", "utf-8")
+
+
+_install_lock = threading.Lock()
+_install_count = 0
+_routers = None  # (stdout router, stderr router) while installed
+
+
+def _install_routing() -> None:
+    global _install_count, _routers
+    with _install_lock:
+        if _install_count == 0:
+            _routers = (_RoutingStream(_stdout_sink, sys.stdout), _RoutingStream(_stderr_sink, sys.stderr))
+            sys.stdout, sys.stderr = _routers
+        _install_count += 1
+
+
+def _uninstall_routing() -> None:
+    global _install_count, _routers
+    with _install_lock:
+        _install_count -= 1
+        if _install_count == 0:
+            # Only undo our own swap: a later contextlib.redirect_stdout (or
+            # similar) that replaced the router stays in place
+            stdout_router, stderr_router = _routers
+            if sys.stdout is stdout_router:
+                sys.stdout = stdout_router._fallback
+            if sys.stderr is stderr_router:
+                sys.stderr = stderr_router._fallback
+            _routers = None
+
+
+################################################################## 3. The context manager
+@contextmanager
+def redirect_output(path: str, stderr: bool = False, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                    strategy: str = "write", sink: Optional[OutputSink] = None):
+    """
+    Redirect print()/sys.stdout (and optionally sys.stderr) of the current
+    thread or asyncio task into a buffered sink appended to `path`.
+
+    Unlike swapping sys.stdout by hand:
+    1. The file is appended to, never truncated
+    2. Other threads keep their own stdout
+    3. The buffer is flushed and streams restored even if the block raises
+
+    Pass an existing `sink` to share one file (and buffer) across threads.
+    """
+    owns_sink = sink is None
+    if owns_sink:
+        sink = OutputSink(path, buffer_size=buffer_size, strategy=strategy)
+    _install_routing()
+    out_token = _stdout_sink.set(sink)
+    err_token = _stderr_sink.set(sink) if stderr else None
+    try:
+        yield sink
+    finally:
+        _stdout_sink.reset(out_token)
+        if err_token is not None:
+            _stderr_sink.reset(err_token)
+        _uninstall_routing()
+        if owns_sink:
+            sink.close()
+        else:
+            sink.flush()
+
+
+################################################################## 4. Throughput benchmark
+def _line(i: int) -> str:
+    return f"Hello, File! line {i}"
+
+
+def benchmark(lines: int = 200_000, directory: Optional[str] = None) -> dict:
+    """
+    Measure write throughput (MB/s) of line-by-line printing against the
+    buffered sink strategies. Returns {variant: (seconds, MB/s)}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        def report(name, path, elapsed):
+            size = os.path.getsize(path)
+            results[name] = (elapsed, size / elapsed / 1e6 if elapsed else float("inf"))
+
+        path = os.path.join(tmp, "print_flush.txt")
+        start = time.perf_counter()
+        with open(path, "w") as f:
+            for i in range(lines):
+                print(_line(i), file=f, flush=True)  # One write syscall per print
+        report("print(flush=True)", path, time.perf_counter() - start)
+
+        path = os.path.join(tmp, "print_buffered.txt")
+        start = time.perf_counter()
+        with open(path, "w") as f:
+            for i in range(lines):
+                print(_line(i), file=f)
+        report("print(file=f)", path, time.perf_counter() - start)
+
+        for strategy in STRATEGIES:
+            path = os.path.join(tmp, f"sink_{strategy}.txt")
+            start = time.perf_counter()
+            with redirect_output(path, strategy=strategy):
+                for i in range(lines):
+                    print(_line(i))
+            report(f"redirect_output({strategy})", path, time.perf_counter() - start)
+    return results
+
+
+def main():
+    """
+    Demonstration of the output sinks
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "output.txt")
+
+        # 8-10 from 03_printing.py, without truncating or leaking sys.stdout
+        with redirect_output(path):
+            print("Hello, File!")
+            sys.stdout.write("Hello, World!\n")
+        with redirect_output(path, stderr=True):
+            print("Error message", file=sys.stderr)
+
+        # Each thread gets its own destination
+        def worker(n):
+            with redirect_output(os.path.join(tmp, f"thread_{n}.txt")):
+                for i in range(3):
+                    print(f"thread {n} line {i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # An exception inside the block still flushes and restores sys.stdout
+        try:
+            with redirect_output(path):
+                print("Written before the error")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        with open(path) as f:
+            print("output.txt contents:")
+            print(f.read(), end="")
+        with open(os.path.join(tmp, "thread_2.txt")) as f:
+            print("thread_2.txt contents:")
+            print(f.read(), end="")
+
+    print("\nWrite throughput (200,000 lines):")
+    for name, (elapsed, mb_per_s) in benchmark().items():
+        print(f"{name:<26} {elapsed:8.3f}s {mb_per_s:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Precompiled Template Formatting and Formatting Benchmarks
+
+03_printing.py shows f-strings, str.format with indices and keywords,
+concatenation and % formatting, but not what each one costs. Report
+generators format millions of rows from one fixed template, so this script:
+
+1. Parses a "Name: {name}, Age: {age}" template once
+2. Compiles it into a specialised render function (an f-string built with exec)
+3. Renders whole batches of records into a single joined buffer
+4. Benchmarks the compiled template against every style from 03_printing.py
+"""
+
+import io
+import string
+import time
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Sequence, TextIO
+
+_formatter = string.Formatter()
+
+
+################################################################## 1. Parsing and compiling a template
+class Template:
+    """
+    A "{field}" template compiled once into a specialised render function
+
+    Supports everything str.format does for flat fields: literal text, {{ and }}
+    escapes, !r/!s/!a conversions and format specs such as {age:>3d}.
+    Nested replacement fields inside a spec (e.g. {x:{width}}) are rejected.
+
+    Records can be:
+    1. Mappings  - render(record), render_many(records)
+    2. Sequences - render_row(row), render_rows(rows): {0}/{1} and {} pick row
+       items by index as in str.format; named fields take row positions in
+       order of first appearance
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self.literals: List[str] = []
+        self.fields: List[str] = []
+        self._specs: List[str] = []
+        self._parse()
+        self.render: Callable[[Dict], str] = self._compile(by_key=True)
+        self.render_row: Callable[[Sequence], str] = self._compile(by_key=False)
+
+    def _parse(self) -> None:
+        auto_index = 0
+        manual = False
+        for literal, field, spec, conversion in _formatter.parse(self.template):
+            self.literals.append(literal)
+            if field is None:
+                continue
+            if spec and "{" in spec:
+                raise ValueError(f"Nested fields are not supported: {{{field}:{spec}}}")
+            if field == "":
+                field = str(auto_index)  # "{}" means the next positional field
+                auto_index += 1
+            elif field.isdigit():
+                manual = True
+            if auto_index and manual:
+                raise ValueError("cannot switch between automatic and manual field numbering")
+            if not (field.isidentifier() or field.isdigit()):
+                raise ValueError(f"Only plain field names are supported, got {field!r}")
+            self.fields.append(field)
+            self._specs.append((f"!{conversion}" if conversion else "") + (f":{spec}" if spec else ""))
+
+    def _fstring_source(self) -> str:
+        # Literal text keeps its braces escaped, fields become local variables _0, _1, ...
+        parts = []
+        for i, literal in enumerate(self.literals):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if i < len(self.fields):
+                parts.append(f"{{_{i}{self._specs[i]}}}")
+        return "f" + repr("".join(parts))
+
+    def _row_indices(self) -> List[int]:
+        """Row position of every field: its number, or first-appearance order for names"""
+        named: Dict[str, int] = {}
+        for field in self.fields:
+            if not field.isdigit():
+                named.setdefault(field, len(named))
+        if named and len(named) != len(self.fields) and any(f.isdigit() for f in self.fields):
+            raise ValueError("render_row() can't mix numbered and named fields")
+        return [int(field) if field.isdigit() else named[field] for field in self.fields]
+
+    def _compile(self, by_key: bool) -> Callable:
+        names = [f"_{i}" for i in range(len(self.fields))]
+        namespace = {}
+        if not names:
+            source = f"def render(_record):\n    return {self._fstring_source()}\n"
+        else:
+            # One C-level itemgetter call pulls every field out of the mapping or row
+            try:
+                namespace["_get"] = itemgetter(*(self.fields if by_key else self._row_indices()))
+            except ValueError as error:
+                message = str(error)
+
+                def unsupported(_record):
+                    raise ValueError(message)
+                return unsupported
+            unpack = f"{names[0]} = _get(_record)" if len(names) == 1 else f"{', '.join(names)} = _get(_record)"
+            source = f"def render(_record):\n    {unpack}\n    return {self._fstring_source()}\n"
+        exec(compile(source, f"<template {self.template!r}>", "exec"), namespace)
+        return namespace["render"]
+
+    ############################################################## 2. Batch rendering into one buffer
+    def render_many(self, records: Iterable[Dict], sep: str = "\n") -> str:
+        """Render every mapping and join the results into one string"""
+        return sep.join(map(self.render, records))
+
+    def render_rows(self, rows: Iterable[Sequence], sep: str = "\n") -> str:
+        """Render every row tuple and join the results into one string"""
+        return sep.join(map(self.render_row, rows))
+
+    def write_many(self, records: Iterable, file: TextIO, batch_size: int = 10_000,
+                   rows: bool = False) -> int:
+        """
+        Stream records to `file` in batches: one join and one write per batch
+        instead of one write per record. Returns the number of records written.
+        """
+        render = self.render_row if rows else self.render
+        batch: List[str] = []
+        count = 0
+        for record in records:
+            batch.append(render(record))
+            if len(batch) >= batch_size:
+                batch.append("")  # Trailing newline after the last row
+                file.write("\n".join(batch))
+                count += len(batch) - 1
+                batch.clear()
+        if batch:
+            batch.append("")
+            file.write("\n".join(batch))
+            count += len(batch) - 1
+        return count
+
+    def __repr__(self) -> str:
+        return f"Template({self.template!r})"
+
+
+################################################################## 3. Benchmark against the styles from 03_printing.py
+def _make_records(n: int):
+    names = ["Alice", "Bob", "Charlie", "David", "Eve", "Frank"]
+    records = [{"name": names[i % len(names)], "age": 20 + i % 50} for i in range(n)]
+    rows = [(r["name"], r["age"]) for r in records]
+    return records, rows
+
+
+def benchmark(n: int = 200_000, repeat: int = 3) -> Dict[str, float]:
+    """
+    Format n records with each style and join them into one buffer.
+    Returns the best of `repeat` runs in seconds for each style.
+    """
+    records, rows = _make_records(n)
+    template = Template("Name: {name}, Age: {age}")
+    positional = Template("Name: {}, Age: {}")
+    dollar = string.Template("Name: $name, Age: $age")
+
+    variants = {
+        "f-string": lambda: "\n".join([f"Name: {name}, Age: {age}" for name, age in rows]),
+        "str.format {}": lambda: "\n".join(["Name: {}, Age: {}".format(name, age) for name, age in rows]),
+        "str.format {0}": lambda: "\n".join(["Name: {0}, Age: {1}".format(name, age) for name, age in rows]),
+        "str.format keywords": lambda: "\n".join(["Name: {name}, Age: {age}".format(**r) for r in records]),
+        "str.format_map": lambda: "\n".join(["Name: {name}, Age: {age}".format_map(r) for r in records]),
+        "% formatting": lambda: "\n".join(["Name: %s, Age: %d" % row for row in rows]),
+        "concatenation": lambda: "\n".join(["Name: " + name + ", Age: " + str(age) for name, age in rows]),
+        "string.Template": lambda: "\n".join([dollar.substitute(r) for r in records]),
+        "Template.render_many": lambda: template.render_many(records),
+        "Template.render_rows": lambda: positional.render_rows(rows),
+    }
+
+    expected = variants["f-string"]()
+    results = {}
+    for name, run in variants.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run()
+            best = min(best, time.perf_counter() - start)
+        assert output == expected, f"{name} produced different output"
+        results[name] = best
+    return results
+
+
+def main():
+    """
+    Demonstration of the compiled templates
+    """
+    template = Template("Name: {name}, Age: {age}")
+    print(template.render({"name": "Alice", "age": 30}))           # Name: Alice, Age: 30
+    print(Template("Name: {0}, Age: {1}").render_row(("Eve", 28)))  # Name: Eve, Age: 28
+    print(Template("Name: {1}, Age: {0}").render_row((28, "Eve")))  # Name: Eve, Age: 28
+    print(Template("{name!r:>10} is {age:03d} {{years}}").render({"name": "Bob", "age": 7}))
+
+    records, _ = _make_records(5)
+    print(template.render_many(records))
+
+    buffer = io.StringIO()
+    written = template.write_many(records, buffer, batch_size=2)
+    print(f"write_many wrote {written} records, {len(buffer.getvalue())} characters")
+
+    n = 200_000
+    print(f"\nFormatting {n:,} records (best of 3):")
+    results = benchmark(n)
+    baseline = results["f-string"]
+    for name, seconds in sorted(results.items(), key=itemgetter(1)):
+        print(f"{name:<22} {seconds * 1000:8.1f} ms  {seconds / baseline:5.2f}x f-string")
+
+
+if __name__ == "__main__":
+    main()
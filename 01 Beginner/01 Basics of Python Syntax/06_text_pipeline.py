@@ -0,0 +1,478 @@
+"""
+Chunked Streaming Text-transform Pipeline
+
+01_datatypes.py demonstrates upper, lower, replace, find, split and strip on
+small literals. A log-normalisation job that applies the same chain to
+multi-GB files by loading the file and creating a new string per step needs
+several copies of the whole file in memory. This script streams instead:
+
+1. Pipeline().upper().replace("ERROR", "E").strip_lines() builds a chain
+2. Consecutive character-level steps (upper/lower and single-character
+   replaces) are fused into one translate table - one pass instead of several
+3. Steps that look at more than one character (replace, strip_lines) and the
+   terminal operations (find, split) carry a small tail between chunks, so
+   matches that span a chunk boundary are handled exactly like str methods do
+4. Files are streamed in fixed-size chunks (through mmap in bytes mode) and
+   every run reports throughput and, optionally, peak memory
+"""
+
+import io
+import mmap
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator, List, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+Data = Union[str, bytes]
+
+_ASCII_LOWER = bytes(range(ord("a"), ord("z") + 1))
+_ASCII_UPPER = bytes(range(ord("A"), ord("Z") + 1))
+_SIGMAS = "Σσς"  # Everything that upper-cases to Σ, whose lower() depends on its neighbours
+
+
+################################################################## 1. Streaming stages
+class _CharMap:
+    """
+    Fused character-level steps.
+
+    bytes mode: case changes and 1-byte -> 1-byte replaces compose into a single
+                256-entry table, applied with one bytes.translate pass
+    text mode:  case changes run in order, then single-character replaces
+                merge into one str.translate dict. lower() turns Σ into ς at
+                the end of a word, so a sigma at the end of a chunk is carried
+                until the next chunk shows whether the word goes on
+    """
+
+    def __init__(self, binary: bool):
+        self.binary = binary
+        self.table = bytes(range(256)) if binary else None
+        self.cases: List[str] = []        # text mode: "upper" / "lower", in order
+        self.mapping = {}                  # text mode: str.translate dict
+        self.ops: List[str] = []
+        self.carry = ""                    # text mode: held-back sigma, see feed()
+        self.cased_before = False
+
+    def can_fuse(self, op: str, args: tuple) -> bool:
+        if op in ("upper", "lower"):
+            # In text mode the case change runs before the translate dict
+            return self.binary or not self.mapping
+        if op == "replace":
+            old, new = args
+            if self.binary:
+                return len(old) == 1 and len(new) == 1
+            return len(old) == 1
+        return False
+
+    def add(self, op: str, args: tuple) -> None:
+        self.ops.append(op if op != "replace" else f"replace({args[0]!r}, {args[1]!r})")
+        if self.binary:
+            if op == "upper":
+                step = bytes.maketrans(_ASCII_LOWER, _ASCII_UPPER)
+            elif op == "lower":
+                step = bytes.maketrans(_ASCII_UPPER, _ASCII_LOWER)
+            else:
+                step = bytes.maketrans(*args)
+            self.table = self.table.translate(step)  # Compose: apply `step` after `table`
+        elif op in ("upper", "lower"):
+            self.cases.append(op)
+        else:
+            old, new = args
+            # Earlier mappings whose output is `old` must now produce `new`
+            self.mapping = {key: (value.replace(old, new) if isinstance(value, str) else value)
+                            for key, value in self.mapping.items()}
+            self.mapping.setdefault(ord(old), new)
+
+    def feed(self, data: Data) -> Data:
+        if self.binary:
+            return data.translate(self.table)
+        if "lower" not in self.cases:
+            return self._map(data)
+        # lower() turns Σ into ς when a cased letter comes before it and none
+        # after it, skipping case-ignorable characters (' . and combining marks)
+        # on both sides. Hold back a trailing sigma while what follows it is
+        # still undecided, and remember whether the emitted text ends cased
+        data, self.carry = self.carry + data, ""
+        last = max(map(data.rfind, _SIGMAS))
+        if last >= 0:
+            rest = data[last + 1:]
+            if self._case("AΣ" + rest)[1] != self._case("AΣ" + rest + "A")[1]:
+                data, self.carry = data[:last], data[last:]
+        return self._lower_in_context(data)
+
+    def _lower_in_context(self, data: str) -> str:
+        before = "A" if self.cased_before else ""  # Stands in for the text already emitted
+        after = "A" if self.carry else ""          # ... and for the held-back sigma
+        mapped = self._case(before + data + after)
+        mapped = mapped[len(before):len(mapped) - len(after)]
+        if self.mapping:
+            mapped = mapped.translate(self.mapping)
+        if data:
+            tail = data[-32:]
+            ends_cased = self._case("A" + tail + "Σ")[-1] == "ς"
+            if ends_cased != (self._case(tail + "Σ")[-1] == "ς"):  # Tail is all case-ignorable
+                ends_cased = self._case(before + data + "Σ")[-1] == "ς"
+            self.cased_before = ends_cased
+        return mapped
+
+    def _case(self, data: str) -> str:
+        for case in self.cases:
+            data = data.upper() if case == "upper" else data.lower()
+        return data
+
+    def _map(self, data: str) -> str:
+        data = self._case(data)
+        if self.mapping:
+            data = data.translate(self.mapping)
+        return data
+
+    def finish(self) -> Data:
+        if self.binary:
+            return b""
+        carry, self.carry = self.carry, ""
+        return self._lower_in_context(carry) if carry else carry
+
+    def __repr__(self) -> str:
+        return f"fused[{' -> '.join(self.ops)}]"
+
+
+def _safe_split(buffer: Data, sep: Data):
+    """
+    Split `buffer` on `sep` the way str.split/str.replace would scan the whole
+    stream, and return (parts, cut, tail_start): every part before the last is
+    final, the last part starts at tail_start, and buffer[cut:] must be carried
+    into the next chunk because a separator may start there and continue in
+    the next chunk.
+    """
+    parts = buffer.split(sep)
+    tail_start = len(buffer) - len(parts[-1])
+    cut = max(tail_start, len(buffer) - len(sep) + 1)
+    return parts, cut, tail_start
+
+
+class _Replace:
+    """Multi-character replace that carries at most len(old) - 1 characters between chunks"""
+
+    def __init__(self, old: Data, new: Data):
+        if not old:
+            raise ValueError("replace() needs a non-empty pattern in a streaming pipeline")
+        self.old, self.new = old, new
+        self.carry = old[:0]
+
+    def feed(self, data: Data) -> Data:
+        buffer = self.carry + data
+        parts, cut, tail_start = _safe_split(buffer, self.old)
+        self.carry = buffer[cut:]
+        parts[-1] = parts[-1][:cut - tail_start]
+        return self.new.join(parts)
+
+    def finish(self) -> Data:
+        carry, self.carry = self.carry, self.carry[:0]
+        return carry.replace(self.old, self.new)
+
+    def __repr__(self) -> str:
+        return f"replace({self.old!r}, {self.new!r})"
+
+
+class _StripLines:
+    """str.strip applied to every line; the last, incomplete line is carried"""
+
+    def __init__(self, chars: Optional[Data], binary: bool):
+        self.chars = chars
+        self.newline = b"\n" if binary else "\n"
+        self.carry = self.newline[:0]
+
+    def feed(self, data: Data) -> Data:
+        buffer = self.carry + data
+        end = buffer.rfind(self.newline)
+        if end < 0:
+            self.carry = buffer
+            return buffer[:0]
+        self.carry = buffer[end + 1:]
+        chars = self.chars
+        return self.newline.join([line.strip(chars) for line in buffer[:end].split(self.newline)]) + self.newline
+
+    def finish(self) -> Data:
+        carry, self.carry = self.carry, self.carry[:0]
+        return carry.strip(self.chars) if carry else carry
+
+    def __repr__(self) -> str:
+        return f"strip_lines({self.chars!r})"
+
+
+################################################################## 2. The pipeline
+class PipelineStats:
+    """Throughput and memory of the last run"""
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.peak_bytes: Optional[int] = None
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes_in / self.seconds / 1e6 if self.seconds else float("inf")
+
+    def __repr__(self) -> str:
+        peak = f", peak={self.peak_bytes / 1e6:.1f} MB" if self.peak_bytes is not None else ""
+        return f"PipelineStats(in={self.bytes_in:,} B, out={self.bytes_out:,} B, {self.mb_per_s:.1f} MB/s{peak})"
+
+
+class Pipeline:
+    """
+    Composable, streaming version of the string methods in 01_datatypes.py
+
+    Transform steps: upper(), lower(), replace(old, new), strip_lines(chars)
+    Terminals:       run(src, dst), transform(src), find(src, sub),
+                     find_all(src, sub), split(src, sep)
+
+    A source is a file path, a readable file object or an iterable of chunks.
+
+    binary=True works on bytes with ASCII case rules (fastest, and safe on
+    UTF-8 because multi-byte sequences never contain ASCII bytes);
+    binary=False works on str and gives the same result as str.upper/lower
+    on the whole text, including the word-final sigma.
+    """
+
+    def __init__(self, binary: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 encoding: str = "utf-8", measure_memory: bool = False):
+        self.binary = binary
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.measure_memory = measure_memory
+        self.steps: List[tuple] = []
+        self.stats = PipelineStats()
+
+    def _coerce(self, value: Optional[Data]) -> Optional[Data]:
+        if value is None:
+            return None
+        if self.binary and isinstance(value, str):
+            return value.encode(self.encoding)
+        if not self.binary and isinstance(value, bytes):
+            return value.decode(self.encoding)
+        return value
+
+    # Builder methods return self so steps can be chained
+    def upper(self) -> "Pipeline":
+        self.steps.append(("upper", ()))
+        return self
+
+    def lower(self) -> "Pipeline":
+        self.steps.append(("lower", ()))
+        return self
+
+    def replace(self, old: Data, new: Data) -> "Pipeline":
+        self.steps.append(("replace", (self._coerce(old), self._coerce(new))))
+        return self
+
+    def strip_lines(self, chars: Optional[Data] = None) -> "Pipeline":
+        self.steps.append(("strip_lines", (self._coerce(chars),)))
+        return self
+
+    def compile(self) -> list:
+        """Turn the declared steps into streaming stages, fusing where possible"""
+        stages = []
+        for op, args in self.steps:
+            last = stages[-1] if stages else None
+            if isinstance(last, _CharMap) and last.can_fuse(op, args):
+                last.add(op, args)
+            elif op in ("upper", "lower") or (op == "replace" and _CharMap(self.binary).can_fuse(op, args)):
+                stage = _CharMap(self.binary)
+                stage.add(op, args)
+                stages.append(stage)
+            elif op == "replace":
+                stages.append(_Replace(*args))
+            else:
+                stages.append(_StripLines(args[0], self.binary))
+        return stages
+
+    ############################################################## Sources
+    def _chunks(self, source) -> Iterator[Data]:
+        """Chunks from a path, a readable file object or an iterable of chunks"""
+        if isinstance(source, (str, os.PathLike)):
+            yield from self._file_chunks(source)
+        elif hasattr(source, "read"):
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield self._coerce(chunk)
+        else:
+            for chunk in source:
+                yield self._coerce(chunk)
+
+    def _file_chunks(self, path) -> Iterator[Data]:
+        if not self.binary:
+            with open(path, encoding=self.encoding, newline="") as f:
+                yield from self._chunks(f)
+            return
+        if os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), self.chunk_size):
+                yield mapped[start:start + self.chunk_size]
+
+    ############################################################## Terminals
+    def transform(self, source) -> Iterator[Data]:
+        """Yield transformed chunks; all other terminals are built on this"""
+        stages = self.compile()
+        stats = self.stats = PipelineStats()
+        tracing = self.measure_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            for chunk in self._chunks(source):
+                stats.bytes_in += len(chunk)
+                for stage in stages:
+                    chunk = stage.feed(chunk)
+                if chunk:
+                    stats.bytes_out += len(chunk)
+                    yield chunk
+            # Flush each stage's carry through the stages after it
+            for index, stage in enumerate(stages):
+                tail = stage.finish()
+                for later in stages[index + 1:]:
+                    tail = later.feed(tail)
+                if tail:
+                    stats.bytes_out += len(tail)
+                    yield tail
+        finally:
+            stats.seconds = time.perf_counter() - start
+            if self.measure_memory:
+                stats.peak_bytes = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+
+    def run(self, source, destination) -> PipelineStats:
+        """Stream the transformed data to a path or a writable file object"""
+        if hasattr(destination, "write"):
+            for chunk in self.transform(source):
+                destination.write(chunk)
+        else:
+            mode = "wb" if self.binary else "w"
+            with open(destination, mode, **({} if self.binary else {"encoding": self.encoding, "newline": ""})) as f:
+                for chunk in self.transform(source):
+                    f.write(chunk)
+        return self.stats
+
+    def find_all(self, source, sub: Data) -> Iterator[int]:
+        """Offsets of every non-overlapping `sub` in the transformed stream"""
+        sub = self._coerce(sub)
+        if not sub:
+            raise ValueError("find_all() needs a non-empty substring")
+        offset = 0  # Stream offset of buffer[0]
+        carry = sub[:0]
+        for chunk in self.transform(source):
+            buffer = carry + chunk
+            position = buffer.find(sub)
+            last_end = 0
+            while position >= 0:
+                yield offset + position
+                last_end = position + len(sub)
+                position = buffer.find(sub, last_end)
+            cut = max(last_end, len(buffer) - len(sub) + 1)
+            carry = buffer[cut:]
+            offset += cut
+
+    def find(self, source, sub: Data) -> int:
+        """Like str.find on the whole transformed stream: first offset or -1"""
+        return next(self.find_all(source, sub), -1)
+
+    def split(self, source, sep: Optional[Data] = None) -> Iterator[Data]:
+        """
+        Like str.split on the whole transformed stream, yielding one field at a
+        time. sep=None splits on runs of whitespace and drops empty fields.
+        """
+        sep = self._coerce(sep)
+        carry = None
+        for chunk in self.transform(source):
+            buffer = chunk if carry is None else carry + chunk
+            if sep is None:
+                fields = buffer.split()
+                if fields and not buffer[-1:].isspace():
+                    carry = fields.pop()   # The last word may continue in the next chunk
+                else:
+                    carry = buffer[:0]
+                yield from fields
+            else:
+                fields = buffer.split(sep)
+                carry = fields.pop()        # Incomplete until the next separator
+                yield from fields
+        if carry is None:
+            if sep is not None:
+                yield (b"" if self.binary else "")
+        elif sep is not None or carry:
+            yield carry
+
+    def __repr__(self) -> str:
+        return f"Pipeline({' | '.join(map(repr, self.compile()))})"
+
+
+################################################################## 3. Benchmark against load-everything
+def load_everything(path: str, destination: str) -> None:
+    """The original approach: read the whole file, one new string per step"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    text = text.upper()
+    text = text.replace("ERROR", "E")
+    text = text.replace("-", "_")
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    with open(destination, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def benchmark(megabytes: int = 64) -> dict:
+    """Normalise a generated log file both ways and compare throughput and peak memory"""
+    line = "  2024-01-01 12:00:00 error in module-a: Hello, World!  \n"
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(line * (megabytes * 1_000_000 // len(line)))
+        size = os.path.getsize(path)
+
+        expected = os.path.join(tmp, "expected.log")
+        tracemalloc.start()
+        start = time.perf_counter()
+        load_everything(path, expected)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results["load everything"] = (size / seconds / 1e6, peak)
+
+        for binary in (True, False):
+            pipeline = (Pipeline(binary=binary, measure_memory=True)
+                        .upper().replace("ERROR", "E").replace("-", "_").strip_lines())
+            output = os.path.join(tmp, f"pipeline_{binary}.log")
+            stats = pipeline.run(path, output)
+            with open(output, "rb") as a, open(expected, "rb") as b:
+                assert a.read() == b.read(), "pipeline output differs from the whole-file version"
+            results[f"pipeline ({'bytes' if binary else 'str'})"] = (stats.mb_per_s, stats.peak_bytes)
+    return results
+
+
+def main():
+    """
+    Demonstration of the streaming pipeline
+    """
+    message = "  Hello, World!  \n  hello again, world  \n"
+    pipeline = Pipeline(binary=False, chunk_size=4).upper().replace("WORLD", "Python").strip_lines()
+    print(pipeline)
+    print(repr("".join(pipeline.transform(io.StringIO(message)))))                  # 'HELLO, Python!\nHELLO AGAIN, Python\n'
+
+    # find/split across 3-character chunks still match str semantics
+    finder = Pipeline(binary=False, chunk_size=3)
+    print("Find 'World':", finder.find(io.StringIO("Hello, World!"), "World"))  # 7
+    print("Split message:", list(finder.split(io.StringIO("Hello, World!"))))  # ['Hello,', 'World!']
+    print("Fused steps:", Pipeline().upper().replace("-", "_").lower())
+
+    print("\nNormalising a 64 MB log file:")
+    for name, (mb_per_s, peak) in benchmark().items():
+        print(f"{name:<16} {mb_per_s:8.1f} MB/s  peak {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Bulk Numeric Parsing and Type Conversion
+
+02_variables.py converts one value at a time with str(a), int(b), float(y)
+and bool(1), and the intermediate guide reads CSV files with csv.reader,
+which creates a str object for every field before int()/float() is called on
+it. For billions of numeric tokens this script parses delimited byte buffers
+straight into typed array.array columns (or NumPy arrays, if installed):
+
+1. Fast path: the whole chunk is handed to the C JSON parser in one call,
+   which builds int/float objects directly from the bytes - no str or bytes
+   object per field - and columns are cut out of the result with slicing
+2. Slow path (only for chunks the fast path rejects): int()/float() on bytes
+   fields, with invalid values masked and reported instead of raising
+3. Files are split on newline boundaries and parsed by parallel workers
+4. A benchmark against csv.reader plus per-field int()/float()
+"""
+
+import csv
+import json
+import math
+import mmap
+import os
+import re
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Columns stay array.array without NumPy
+    np = None
+
+# Column type -> array typecode
+TYPECODES = {"int": "q", "float": "d", "bool": "b"}
+# Value stored in place of an invalid field (the mask says which ones)
+MISSING = {"int": 0, "float": math.nan, "bool": 0}
+_TRUE = {b"1", b"true", b"t", b"yes", b"y"}
+_FALSE = {b"0", b"false", b"f", b"no", b"n"}
+# Tokens the JSON parser would accept but int()/float() would not
+_JSON_ONLY = (b'"', b"true", b"false", b"null", b"[", b"{")
+# JSON reads "-0" as the int 0: float() keeps the sign and bool columns reject it
+_BARE_NEGATIVE_ZERO = re.compile(rb"-0(?![0-9.eE])")
+_NOT_SEPARATORS = bytes(byte for byte in range(256) if byte not in b",\n")
+DEFAULT_CHUNK_SIZE = 8 << 20  # 8 MiB
+
+
+################################################################## 1. Parsed columns
+class Columns:
+    """
+    Typed columns parsed from delimited text
+
+    data[name]    - array.array of values (invalid fields hold MISSING[type])
+    masks[name]   - array('b') with 1 for invalid fields, or None if all valid
+    errors        - the first `max_errors` (row, column, raw bytes) problems
+    invalid       - total number of invalid fields
+    """
+
+    def __init__(self, names: Sequence[str], types: Sequence[str], max_errors: int = 100):
+        self.names = list(names)
+        self.types = list(types)
+        self.data: Dict[str, array] = {name: array(TYPECODES[t]) for name, t in zip(names, types)}
+        self.masks: Dict[str, Optional[array]] = dict.fromkeys(names)
+        self.errors: List[Tuple[int, str, bytes]] = []
+        self.invalid = 0
+        self.rows = 0
+        self.max_errors = max_errors
+
+    def extend(self, other: "Columns") -> None:
+        """Append another chunk's columns, shifting its row numbers"""
+        for name in self.names:
+            if other.masks[name] is not None and self.masks[name] is None:
+                self.masks[name] = array("b", bytes(self.rows))
+            if self.masks[name] is not None:
+                self.masks[name].extend(other.masks[name] or array("b", bytes(other.rows)))
+            self.data[name].extend(other.data[name])
+        room = self.max_errors - len(self.errors)
+        self.errors.extend((row + self.rows, name, raw) for row, name, raw in other.errors[:room])
+        self.invalid += other.invalid
+        self.rows += other.rows
+
+    def to_numpy(self) -> Dict[str, "np.ndarray"]:
+        """Zero-copy NumPy views of the columns (masked arrays where needed)"""
+        if np is None:
+            raise RuntimeError("to_numpy() needs NumPy")
+        result = {}
+        for name in self.names:
+            column = np.frombuffer(self.data[name], dtype=self.data[name].typecode)
+            if self.masks[name] is not None:
+                column = np.ma.masked_array(column, mask=np.frombuffer(self.masks[name], dtype=np.int8).astype(bool))
+            result[name] = column
+        return result
+
+    def __repr__(self) -> str:
+        return f"Columns(rows={self.rows:,}, columns={self.names}, invalid={self.invalid})"
+
+
+################################################################## 2. Parsing one buffer
+def _fast_parse(data: bytes, types: Sequence[str], delimiter: bytes) -> Optional[List[array]]:
+    """
+    One json.loads call for the whole buffer: "1,2.5\n3,4" -> [1, 2.5, 3, 4],
+    then every column is a C-level slice of the flat list (values[i::width]).
+    Returns None whenever the result might differ from int()/float() per field.
+    """
+    if any(token in data for token in _JSON_ONLY) or _BARE_NEGATIVE_ZERO.search(data):
+        return None
+    body = data.replace(b"\r", b"")
+    if delimiter != b",":
+        if b"," in body:
+            return None
+        body = body.replace(delimiter, b",")
+    width = len(types)
+    lines = body.count(b"\n") + 1
+    # Rectangular check: keep only delimiters and newlines, compare with the expected shape
+    shape = body.translate(None, _NOT_SEPARATORS)
+    if shape != (b"," * (width - 1) + b"\n") * (lines - 1) + b"," * (width - 1):
+        return None  # Ragged rows: let the slow path report exactly where
+    try:
+        values = json.loads(b"[" + body.replace(b"\n", b",") + b"]")
+    except ValueError:
+        return None
+    columns = []
+    for index, column_type in enumerate(types):
+        try:
+            column = array(TYPECODES[column_type], values[index::width])
+        except (TypeError, OverflowError):
+            return None  # e.g. a float in an int column
+        if column_type == "bool" and column and (max(column) > 1 or min(column) < 0):
+            return None
+        columns.append(column)
+    return columns
+
+
+def _parse_field(raw: bytes, column_type: str):
+    if column_type == "int":
+        return int(raw)
+    if column_type == "float":
+        return float(raw)
+    token = raw.strip().lower()
+    if token in _TRUE:
+        return 1
+    if token in _FALSE:
+        return 0
+    raise ValueError(raw)
+
+
+def parse_buffer(data: bytes, names: Sequence[str], types: Sequence[str], delimiter: bytes = b",",
+                 max_errors: int = 100) -> Columns:
+    """
+    Parse complete lines of delimited numeric text into typed columns.
+    Invalid fields (and missing ones in short rows) are masked, never raised.
+    """
+    result = Columns(names, types, max_errors)
+    data = data.rstrip(b"\r\n")  # Leading blank lines are rows: stripping them would shift row numbers
+    if not data:
+        return result
+
+    columns = _fast_parse(data, types, delimiter)
+    if columns is not None:
+        for name, column in zip(names, columns):
+            result.data[name] = column
+        result.rows = len(columns[0])
+        return result
+
+    # Slow path: int()/float() straight on the bytes of each field
+    width = len(types)
+    for row_index, line in enumerate(data.replace(b"\r", b"").split(b"\n")):
+        fields = line.split(delimiter)
+        if len(fields) < width:
+            fields.extend([b""] * (width - len(fields)))
+        for column_index, (name, column_type) in enumerate(zip(names, types)):
+            raw = fields[column_index]
+            column = result.data[name]
+            try:
+                column.append(_parse_field(raw, column_type))
+            except (ValueError, OverflowError):  # OverflowError: does not fit in 64 bits
+                column.append(MISSING[column_type])
+                if result.masks[name] is None:
+                    result.masks[name] = array("b", bytes(row_index))
+                result.masks[name].append(1)
+                result.invalid += 1
+                if len(result.errors) < max_errors:
+                    result.errors.append((row_index, name, raw))
+            else:
+                if result.masks[name] is not None:
+                    result.masks[name].append(0)
+    result.rows = row_index + 1
+    return result
+
+
+################################################################## 3. Files: newline-aligned chunks and parallel workers
+def _chunk_bounds(mapped, start: int, chunk_size: int) -> List[Tuple[int, int]]:
+    bounds = []
+    size = len(mapped)
+    while start < size:
+        end = mapped.find(b"\n", min(start + chunk_size, size - 1))
+        end = size if end < 0 else end + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def _parse_range(path: str, start: int, end: int, names, types, delimiter: bytes) -> Columns:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return parse_buffer(mapped[start:end], names, types, delimiter)
+
+
+def parse_file(path: str, types: Sequence[str], names: Optional[Sequence[str]] = None, header: bool = True,
+               delimiter: bytes = b",", workers: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Columns:
+    """
+    Parse a delimited numeric file into typed columns.
+
+    types:   one of "int", "float", "bool" per column
+    header:  take column names from (and skip) the first line
+    workers: number of processes; 0 or 1 parses in this process
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return Columns(names or [f"col{i}" for i in range(len(types))], types)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            if header:
+                start = mapped.find(b"\n") + 1 or len(mapped)
+                header_names = [name.strip().decode() for name in mapped[:start].rstrip(b"\r\n").split(delimiter)]
+                names = names or header_names
+            bounds = _chunk_bounds(mapped, start, chunk_size)
+    names = list(names or [f"col{i}" for i in range(len(types))])
+
+    result = Columns(names, types)
+    if workers is None:
+        workers = min(len(bounds), os.cpu_count() or 1)
+    if workers <= 1 or len(bounds) == 1:
+        for chunk_start, chunk_end in bounds:
+            result.extend(_parse_range(path, chunk_start, chunk_end, names, types, delimiter))
+        return result
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_parse_range, path, s, e, names, types, delimiter) for s, e in bounds]
+        for future in futures:  # In file order
+            result.extend(future.result())
+    return result
+
+
+################################################################## 4. Benchmark against csv.reader + int()/float()
+def _csv_reader_baseline(path: str) -> Tuple[list, list]:
+    ids, prices = [], []
+    with open(path, newline="") as csvfile:
+        csv_reader = csv.reader(csvfile)
+        next(csv_reader)
+        for row in csv_reader:
+            ids.append(int(row[0]))
+            prices.append(float(row[1]))
+    return ids, prices
+
+
+def benchmark(rows: int = 1_000_000) -> Dict[str, float]:
+    """Parse a two-column CSV every way; returns rows per second"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.csv")
+        with open(path, "w") as f:
+            f.write("id,price\n")
+            f.writelines(f"{i},{i * 0.25 + 0.1:.2f}\n" for i in range(rows))
+
+        start = time.perf_counter()
+        ids, prices = _csv_reader_baseline(path)
+        results["csv.reader + int()/float()"] = rows / (time.perf_counter() - start)
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            columns = parse_file(path, ["int", "float"], workers=workers)
+            results[f"parse_file (workers={workers})"] = rows / (time.perf_counter() - start)
+            assert columns.data["id"].tolist() == ids and columns.data["price"].tolist() == prices
+    return results
+
+
+def main():
+    """
+    Demonstration of the bulk converter
+    """
+    # The same conversions as 02_variables.py, but for a whole buffer at once
+    good = parse_buffer(b"10,3.14,1\n20,2.5,0\n", ["a", "y", "flag"], ["int", "float", "bool"])
+    print(good, good.data)
+
+    # Invalid and missing fields are masked and reported instead of raising
+    bad = parse_buffer(b"10,3.14,true\nabc,2.5,no\n30,,1\n40\n", ["a", "y", "flag"], ["int", "float", "bool"])
+    print(bad, bad.data)
+    print("Masks:", {name: mask.tolist() for name, mask in bad.masks.items() if mask is not None})
+    print("Errors:", bad.errors)
+
+    print("\nParsing 1,000,000 CSV rows:")
+    for name, rows_per_s in benchmark().items():
+        print(f"{name:<28} {rows_per_s / 1e6:6.2f} M rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+"""
+Loop Idiom Benchmark Harness
+
+02_loops.py and 03_control_statements.py show for loops, while loops, range,
+enumerate, zip, nested loops, comprehensions, break/continue and for-else, but
+never measure them. This harness runs every one of those patterns as a
+parameterised kernel over growing inputs and compares it with the equivalent
+itertools / map / comprehension / builtin (and optional NumPy) form.
+
+1. Kernels are registered with the @kernel(pattern, variant) decorator
+2. Every variant of a pattern must return the same result (checked per size)
+3. Results are rows of a machine-readable table (CSV or JSON)
+4. Optional per-variant executed-bytecode counts and peak allocations
+
+Usage:
+    python 04_loop_benchmarks.py
+    python 04_loop_benchmarks.py --sizes 1000 100000 --bytecode --alloc --json loops.json
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import operator
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy variants are skipped when it is not installed
+    np = None
+
+# pattern -> {"setup": callable(n) -> args, "variants": {variant: kernel}}
+KERNELS: Dict[str, Dict] = {}
+
+
+def pattern(name: str, setup: Callable[[int], tuple]) -> None:
+    """Declare a loop pattern and how to build its input of size n"""
+    KERNELS[name] = {"setup": setup, "variants": {}}
+
+
+def kernel(pattern_name: str, variant: str, requires: Optional[object] = True):
+    """Register a kernel as one variant of a pattern (skipped if `requires` is falsy)"""
+    def decorator(func):
+        if requires:
+            KERNELS[pattern_name]["variants"][variant] = func
+        return func
+    return decorator
+
+
+def _words(n: int) -> List[str]:
+    base = ["apple", "banana", "cherry", "kiwi", "mango", "grape"]
+    return [base[i % len(base)] for i in range(n)]
+
+
+################################################################## 1. for loop over a list (02_loops Example 1)
+pattern("for loop transform", lambda n: (list(range(n)),))
+
+
+@kernel("for loop transform", "for + append")
+def _for_append(xs):
+    out = []
+    for x in xs:
+        out.append(x * 2)
+    return out
+
+
+@kernel("for loop transform", "list comprehension")
+def _for_comprehension(xs):
+    return [x * 2 for x in xs]
+
+
+@kernel("for loop transform", "map(operator.mul)")
+def _for_map(xs):
+    return list(map(operator.mul, xs, itertools.repeat(2)))
+
+
+@kernel("for loop transform", "numpy vectorized", requires=np)
+def _for_numpy(xs):
+    return (np.asarray(xs) * 2).tolist()
+
+
+################################################################## 2. while loop counter (02_loops Example 2, 12)
+pattern("while counter sum", lambda n: (n,))
+
+
+@kernel("while counter sum", "while loop")
+def _while_sum(n):
+    total = 0
+    count = 0
+    while count < n:
+        total += count
+        count += 1
+    return total
+
+
+@kernel("while counter sum", "while True + break")
+def _while_true_sum(n):
+    total = 0
+    count = 0
+    while True:
+        if count == n:
+            break
+        total += count
+        count += 1
+    return total
+
+
+@kernel("while counter sum", "for in range")
+def _range_sum(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+@kernel("while counter sum", "sum(range)")
+def _builtin_sum(n):
+    return sum(range(n))
+
+
+################################################################## 3. range() indexing vs direct iteration (02_loops Example 3)
+pattern("range indexing", lambda n: (list(range(n)),))
+
+
+@kernel("range indexing", "for i in range(len)")
+def _range_len(xs):
+    total = 0
+    for i in range(len(xs)):
+        total += xs[i]
+    return total
+
+
+@kernel("range indexing", "for x in xs")
+def _direct_iteration(xs):
+    total = 0
+    for x in xs:
+        total += x
+    return total
+
+
+@kernel("range indexing", "sum(xs)")
+def _direct_sum(xs):
+    return sum(xs)
+
+
+################################################################## 4. Dictionary iteration (02_loops Example 4)
+pattern("dict iteration", lambda n: ({f"key{i}": i for i in range(n)},))
+
+
+@kernel("dict iteration", "for k in d: d[k]")
+def _dict_keys_lookup(d):
+    total = 0
+    for key in d:
+        total += d[key]
+    return total
+
+
+@kernel("dict iteration", "for k, v in d.items()")
+def _dict_items(d):
+    total = 0
+    for _, value in d.items():
+        total += value
+    return total
+
+
+@kernel("dict iteration", "sum(d.values())")
+def _dict_values_sum(d):
+    return sum(d.values())
+
+
+################################################################## 5. enumerate() (02_loops Example 5)
+pattern("enumerate", lambda n: (_words(n),))
+
+
+@kernel("enumerate", "manual counter")
+def _manual_counter(words):
+    out = []
+    index = 0
+    for word in words:
+        out.append((index, word))
+        index += 1
+    return out
+
+
+@kernel("enumerate", "range(len) indexing")
+def _enumerate_range(words):
+    return [(i, words[i]) for i in range(len(words))]
+
+
+@kernel("enumerate", "for i, w in enumerate")
+def _enumerate_loop(words):
+    out = []
+    for index, word in enumerate(words):
+        out.append((index, word))
+    return out
+
+
+@kernel("enumerate", "list(enumerate)")
+def _enumerate_list(words):
+    return list(enumerate(words))
+
+
+################################################################## 6. zip() over several sequences (02_loops Example 6)
+pattern("zip pairwise add", lambda n: (list(range(n)), list(range(n, 2 * n))))
+
+
+@kernel("zip pairwise add", "index both lists")
+def _zip_index(xs, ys):
+    return [xs[i] + ys[i] for i in range(len(xs))]
+
+
+@kernel("zip pairwise add", "for x, y in zip + append")
+def _zip_loop(xs, ys):
+    out = []
+    for x, y in zip(xs, ys):
+        out.append(x + y)
+    return out
+
+
+@kernel("zip pairwise add", "comprehension over zip")
+def _zip_comprehension(xs, ys):
+    return [x + y for x, y in zip(xs, ys)]
+
+
+@kernel("zip pairwise add", "map(operator.add)")
+def _zip_map(xs, ys):
+    return list(map(operator.add, xs, ys))
+
+
+@kernel("zip pairwise add", "numpy vectorized", requires=np)
+def _zip_numpy(xs, ys):
+    return (np.asarray(xs) + np.asarray(ys)).tolist()
+
+
+################################################################## 7. break: find the first match (02_loops Example 7, 03_control Example 1)
+pattern("break search", lambda n: (list(range(n)), n - 1))
+
+
+@kernel("break search", "for + break")
+def _break_search(xs, target):
+    found = -1
+    for i, x in enumerate(xs):
+        if x == target:
+            found = i
+            break
+    return found
+
+
+@kernel("break search", "while + break")
+def _while_break_search(xs, target):
+    i = 0
+    while i < len(xs):
+        if xs[i] == target:
+            return i
+        i += 1
+    return -1
+
+
+@kernel("break search", "next(generator)")
+def _next_search(xs, target):
+    return next((i for i, x in enumerate(xs) if x == target), -1)
+
+
+@kernel("break search", "list.index")
+def _index_search(xs, target):
+    try:
+        return xs.index(target)
+    except ValueError:
+        return -1
+
+
+################################################################## 8. continue: filtering (02_loops Example 8, 03_control Example 2, 9)
+# A range input: the loop variants iterate it like a list, the slice variant needs to know it is one
+pattern("continue filter", lambda n: (range(n),))
+
+
+@kernel("continue filter", "for + continue")
+def _continue_filter(xs):
+    out = []
+    for x in xs:
+        if x % 2 == 0:
+            continue
+        out.append(x)
+    return out
+
+
+@kernel("continue filter", "comprehension with if")
+def _comprehension_filter(xs):
+    return [x for x in xs if x % 2]
+
+
+@kernel("continue filter", "compress + map")
+def _filter_builtin(xs):
+    return list(itertools.compress(xs, map((2).__rmod__, xs)))
+
+
+@kernel("continue filter", "slice step (range input)")
+def _slice_filter(xs):
+    # No loop at all: the odd numbers of a step-1 range are every other element
+    if isinstance(xs, range) and xs.step == 1:
+        return list(xs[xs.start % 2 == 0::2])
+    return [x for x in xs if x % 2]  # Any other sequence has to be looked at
+
+
+################################################################## 9. for-else (02_loops Example 9, 03_control Example 4)
+pattern("for-else membership", lambda n: (_words(n), "pear"))
+
+
+@kernel("for-else membership", "for + break + else")
+def _for_else(words, target):
+    for word in words:
+        if word == target:
+            break
+    else:
+        return False
+    return True
+
+
+@kernel("for-else membership", "any(generator)")
+def _any_generator(words, target):
+    return any(word == target for word in words)
+
+
+@kernel("for-else membership", "in operator")
+def _in_operator(words, target):
+    return target in words
+
+
+################################################################## 10. Nested loops (02_loops Example 10, 03_control Example 5, 6)
+pattern("nested loops", lambda n: (_words(max(1, n // 6)),))
+
+
+@kernel("nested loops", "nested for + continue")
+def _nested_for(words):
+    out = []
+    for word in words:
+        for char in word:
+            if char == "a":
+                continue
+            out.append(char)
+    return out
+
+
+@kernel("nested loops", "nested comprehension")
+def _nested_comprehension(words):
+    return [char for word in words for char in word if char != "a"]
+
+
+@kernel("nested loops", "chain.from_iterable")
+def _nested_chain(words):
+    return [char for char in itertools.chain.from_iterable(words) if char != "a"]
+
+
+@kernel("nested loops", "join + replace")
+def _nested_join(words):
+    return list("".join(words).replace("a", ""))
+
+
+pattern("nested product", lambda n: (list(range(int(n ** 0.5) or 1)),))
+
+
+@kernel("nested product", "nested for")
+def _product_nested(xs):
+    out = []
+    for a in xs:
+        for b in xs:
+            out.append(a * b)
+    return out
+
+
+@kernel("nested product", "itertools.product")
+def _product_itertools(xs):
+    return list(itertools.starmap(operator.mul, itertools.product(xs, repeat=2)))
+
+
+@kernel("nested product", "numpy outer", requires=np)
+def _product_numpy(xs):
+    arr = np.asarray(xs)
+    return np.outer(arr, arr).ravel().tolist()
+
+
+################################################################## 11. Comprehensions (02_loops Example 11)
+pattern("squares", lambda n: (n,))
+
+
+@kernel("squares", "for + append")
+def _squares_loop(n):
+    out = []
+    for x in range(n):
+        out.append(x ** 2)
+    return out
+
+
+@kernel("squares", "list comprehension x**2")
+def _squares_comprehension(n):
+    return [x ** 2 for x in range(n)]
+
+
+@kernel("squares", "list comprehension x*x")
+def _squares_mul(n):
+    return [x * x for x in range(n)]
+
+
+@kernel("squares", "map(pow)")
+def _squares_map(n):
+    return list(map(pow, range(n), itertools.repeat(2)))
+
+
+@kernel("squares", "numpy vectorized", requires=np)
+def _squares_numpy(n):
+    return (np.arange(n) ** 2).tolist()
+
+
+################################################################## 12. break + continue together (03_control Example 7)
+pattern("break + continue", lambda n: (n, n // 2))
+
+
+@kernel("break + continue", "for + break + continue")
+def _break_continue(n, stop):
+    out = []
+    for num in range(n):
+        if num == stop:
+            break
+        if num % 2 == 0:
+            continue
+        out.append(num)
+    return out
+
+
+@kernel("break + continue", "takewhile + filter")
+def _takewhile_filter(n, stop):
+    return list(filter((2).__rmod__, itertools.takewhile(stop.__gt__, range(n))))
+
+
+@kernel("break + continue", "range step")
+def _range_step(n, stop):
+    return list(range(1, min(n, stop), 2))
+
+
+################################################################## 13. Consuming an iterator for side effects
+pattern("consume iterator", lambda n: (list(range(n)),))
+
+
+@kernel("consume iterator", "for + pass")
+def _consume_for(xs):
+    for _ in xs:
+        pass
+    return None
+
+
+@kernel("consume iterator", "deque(maxlen=0)")
+def _consume_deque(xs):
+    deque(xs, maxlen=0)
+    return None
+
+
+################################################################## The harness
+def count_bytecodes(func: Callable, args: tuple) -> int:
+    """
+    Count bytecode instructions executed by Python frames during func(*args).
+    Work done inside C builtins (sum, map, list.index, ...) executes no bytecode.
+    """
+    executed = 0
+
+    def tracer(frame, event, arg):
+        nonlocal executed
+        frame.f_trace_opcodes = True
+        frame.f_trace_lines = False
+        if event == "opcode":
+            executed += 1
+        return tracer
+
+    old_trace = sys.gettrace()
+    sys.settrace(tracer)
+    try:
+        func(*args)
+    finally:
+        sys.settrace(old_trace)
+    return executed
+
+
+def peak_allocation(func: Callable, args: tuple) -> int:
+    """Peak bytes allocated by Python while running func(*args)"""
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return peak - baseline
+
+
+def time_kernel(func: Callable, args: tuple, repeat: int = 5) -> float:
+    """Best wall time of `repeat` runs, auto-looping very fast kernels"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.01 or loops >= 1_000_000:
+            break
+        loops *= 10
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / loops
+
+
+def run_benchmarks(sizes: Sequence[int] = (1_000, 10_000, 100_000), patterns: Optional[Sequence[str]] = None,
+                   repeat: int = 5, bytecode: bool = False, allocations: bool = False,
+                   bytecode_size: int = 100) -> List[Dict]:
+    """
+    Run every variant of every pattern at every size.
+
+    Returns one dict per (pattern, variant, n) with:
+    seconds, ns_per_item, relative (to the first variant of the pattern) and,
+    when requested, bytecodes (executed at n=bytecode_size) and peak_bytes.
+    """
+    rows = []
+    for name in patterns or KERNELS:
+        spec = KERNELS[name]
+        for n in sizes:
+            args = spec["setup"](n)
+            expected = None
+            baseline = None
+            for variant, func in spec["variants"].items():
+                result = func(*args)
+                if expected is None:
+                    expected = result
+                elif result != expected:
+                    raise AssertionError(f"{name}/{variant} disagrees with the first variant at n={n}")
+                seconds = time_kernel(func, args, repeat)
+                baseline = baseline or seconds
+                row = {
+                    "pattern": name,
+                    "variant": variant,
+                    "n": n,
+                    "seconds": seconds,
+                    "ns_per_item": seconds / n * 1e9,
+                    "relative": seconds / baseline,
+                }
+                if bytecode:
+                    row["bytecodes"] = count_bytecodes(func, spec["setup"](bytecode_size))
+                if allocations:
+                    row["peak_bytes"] = peak_allocation(func, args)
+                rows.append(row)
+    return rows
+
+
+def write_csv(rows: List[Dict], file) -> None:
+    fields = list(dict.fromkeys(key for row in rows for key in row))
+    writer = csv.DictWriter(file, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_json(rows: List[Dict], file) -> None:
+    json.dump(rows, file, indent=2)
+
+
+def print_table(rows: List[Dict]) -> None:
+    extra = [key for key in ("bytecodes", "peak_bytes") if rows and key in rows[0]]
+    header = f"{'pattern':<22} {'variant':<28} {'n':>8} {'ns/item':>9} {'rel':>6}"
+    header += "".join(f" {key:>11}" for key in extra)
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        line = f"{row['pattern']:<22} {row['variant']:<28} {row['n']:>8} {row['ns_per_item']:>9.1f} {row['relative']:>6.2f}"
+        line += "".join(f" {row[key]:>11}" for key in extra)
+        print(line)
+
+
+def main():
+    """
+    Run the harness and print (and optionally save) the results table
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--pattern", action="append", choices=list(KERNELS), help="Only run these patterns")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bytecode", action="store_true", help="Count executed bytecodes per variant")
+    parser.add_argument("--alloc", action="store_true", help="Report peak allocated bytes per variant")
+    parser.add_argument("--csv", metavar="PATH", help="Write the results table as CSV")
+    parser.add_argument("--json", metavar="PATH", help="Write the results table as JSON")
+    options = parser.parse_args()
+
+    rows = run_benchmarks(options.sizes, options.pattern, options.repeat, options.bytecode, options.alloc)
+    print_table(rows)
+    if options.csv:
+        with open(options.csv, "w", newline="") as f:
+            write_csv(rows, f)
+    if options.json:
+        with open(options.json, "w") as f:
+            write_json(rows, f)
+
+
+if __name__ == "__main__":
+    main()
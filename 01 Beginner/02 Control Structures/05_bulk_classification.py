@@ -0,0 +1,328 @@
+"""
+Bulk Number Classification Engine
+
+01_conditional_statements.py classifies one number at a time: positive / zero /
+negative, even / odd and above / below a threshold, with if/elif chains and a
+match statement. This script runs exactly those rules over whole streams:
+
+1. Rules are declared as data: an ordered if/elif list of conditions + a default
+2. RuleEngine compiles a rule set into
+   - a generated if/elif function (the "chain" backend)
+   - a dict/list dispatch table over a bounded integer domain ("table")
+   - NumPy boolean masks combined with np.select ("vectorized", if installed)
+3. classify() returns one integer category code per value, counts() returns
+   how many values fell into each category
+4. A benchmark of match vs if-chain vs table dispatch vs vectorized masks
+"""
+
+import random
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # The vectorized backend is only available with NumPy
+    np = None
+
+# op -> Python source template used by the generated if/elif chain. The
+# placeholders are filled with the names operands are bound to in the exec
+# namespace, so any object works as an operand, not only ones with a literal repr
+_OPERATORS = {
+    ">": "{x} > {0}",
+    ">=": "{x} >= {0}",
+    "<": "{x} < {0}",
+    "<=": "{x} <= {0}",
+    "==": "{x} == {0}",
+    "!=": "{x} != {0}",
+    "%": "{x} % {0} == {1}",     # ("%", divisor, remainder)
+    "in": "{x} in {0}",          # ("in", frozenset_of_values)
+}
+
+
+################################################################## 1. Declaring rules
+class Rule:
+    """
+    One if/elif/else chain expressed as data
+
+    Example 2 of 01_conditional_statements.py:
+        if num > 0: "Positive number" elif num == 0: "Zero" else: "Negative number"
+    becomes:
+        Rule("sign", [("positive", ">", 0), ("zero", "==", 0)], default="negative")
+
+    Each branch is (label, op, *operands) with op one of
+    >, >=, <, <=, ==, !=, % (divisor, remainder) and in (collection).
+    """
+
+    def __init__(self, name: str, branches: Sequence[tuple], default: str):
+        self.name = name
+        self.branches = []
+        for label, op, *operands in branches:
+            if op not in _OPERATORS:
+                raise ValueError(f"Unsupported operator {op!r} in rule {name!r}")
+            if op == "in":
+                operands = [frozenset(operands[0])]
+            self.branches.append((label, op, tuple(operands)))
+        self.default = default
+        self.labels: List[str] = [label for label, _, _ in self.branches] + [default]
+
+    def condition_source(self, op: str, names: Sequence[str], x: str = "x") -> str:
+        """Source of one condition; `names` are the variables holding its operands"""
+        return _OPERATORS[op].format(*names, x=x)
+
+    def numpy_mask(self, op: str, operands: tuple, values):
+        if op == "%":
+            return values % operands[0] == operands[1]
+        if op == "in":
+            return np.isin(values, list(operands[0]))
+        return {
+            ">": np.greater, ">=": np.greater_equal, "<": np.less,
+            "<=": np.less_equal, "==": np.equal, "!=": np.not_equal,
+        }[op](values, operands[0])
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, labels={self.labels})"
+
+
+def number_rules(threshold: int = 10) -> List[Rule]:
+    """The three classifications used in 01_conditional_statements.py"""
+    return [
+        Rule("sign", [("positive", ">", 0), ("zero", "==", 0)], default="negative"),
+        Rule("parity", [("even", "%", 2, 0)], default="odd"),
+        Rule("threshold", [("above", ">", threshold)], default="not above"),
+    ]
+
+
+################################################################## 2. Compiling a rule set
+class RuleEngine:
+    """
+    Compile several rules into one classifier that returns a single integer
+    code per value. The code packs each rule's branch index in mixed radix:
+
+        code = sum(branch_index[rule] * stride[rule])
+
+    decode(code) turns it back into one label per rule.
+
+    Backends:
+    1. "chain"      - one generated function with nested if/elif chains
+    2. "table"      - list lookup for integers in [low, high), chain otherwise
+    3. "vectorized" - NumPy masks + np.select over a whole array
+    """
+
+    def __init__(self, rules: Sequence[Rule], domain: Optional[Tuple[int, int]] = None):
+        self.rules = list(rules)
+        self.strides = []
+        stride = 1
+        for rule in self.rules:
+            self.strides.append(stride)
+            stride *= len(rule.labels)
+        if stride > 1 << 32:
+            raise ValueError(f"{stride:,} label combinations do not fit in 32-bit codes")
+        self.n_codes = stride
+        self.classify_one = self._compile_chain()
+        self.domain = domain
+        self._table: Optional[List[int]] = None
+        if domain is not None:
+            low, high = domain
+            self._table = [self.classify_one(value) for value in range(low, high)]
+
+    def _compile_chain(self):
+        lines = ["def classify_one(x):", "    code = 0"]
+        namespace = {}
+        for rule, stride in zip(self.rules, self.strides):
+            keyword = "if"
+            for index, (_, op, operands) in enumerate(rule.branches):
+                names = []
+                for operand in operands:  # _c0, _c1, ... are globals of the generated function
+                    names.append(f"_c{len(namespace)}")
+                    namespace[names[-1]] = operand
+                lines.append(f"    {keyword} {rule.condition_source(op, names)}:")
+                lines.append(f"        code += {index * stride}")
+                keyword = "elif"
+            default_code = (len(rule.labels) - 1) * stride
+            if rule.branches:
+                lines.append("    else:")
+                lines.append(f"        code += {default_code}")
+            else:
+                lines.append(f"    code += {default_code}")
+        lines.append("    return code")
+        exec(compile("\n".join(lines) + "\n", "<rule chain>", "exec"), namespace)
+        return namespace["classify_one"]
+
+    def decode(self, code: int) -> Tuple[str, ...]:
+        labels = []
+        for rule, stride in zip(self.rules, self.strides):
+            labels.append(rule.labels[code // stride % len(rule.labels)])
+        return tuple(labels)
+
+    def category_labels(self) -> List[Tuple[str, ...]]:
+        """Every possible label combination, indexed by code"""
+        return [self.decode(code) for code in range(self.n_codes)]
+
+    ############################################################## Bulk classification
+    def classify(self, values: Iterable, backend: str = "auto"):
+        """
+        Classify every value. Returns an array('B'/'H'/'I') of codes for the
+        chain/table backends and a NumPy array for the vectorized backend.
+        """
+        backend = self._pick_backend(values, backend)
+        if backend == "vectorized":
+            return self._classify_vectorized(np.asarray(values))
+        typecode = "B" if self.n_codes <= 1 << 8 else "H" if self.n_codes <= 1 << 16 else "I"
+        if backend == "table":
+            return array(typecode, map(self._table_lookup(), values))
+        return array(typecode, map(self.classify_one, values))
+
+    def counts(self, values: Iterable, backend: str = "auto") -> Dict[Tuple[str, ...], int]:
+        """Number of values per label combination (zero counts omitted)"""
+        codes = self.classify(values, backend)
+        if np is not None and isinstance(codes, np.ndarray):
+            tally = np.bincount(codes, minlength=self.n_codes)
+            return {self.decode(code): int(count) for code, count in enumerate(tally) if count}
+        return {self.decode(code): count for code, count in sorted(Counter(codes).items())}
+
+    def rule_counts(self, values: Iterable, backend: str = "auto") -> Dict[str, Dict[str, int]]:
+        """Per-rule label counts, e.g. {"sign": {"positive": 3, ...}, ...}"""
+        result = {rule.name: dict.fromkeys(rule.labels, 0) for rule in self.rules}
+        for labels, count in self.counts(values, backend).items():
+            for rule, label in zip(self.rules, labels):
+                result[rule.name][label] += count
+        return result
+
+    def _pick_backend(self, values, backend: str) -> str:
+        if backend == "auto":
+            if np is not None and isinstance(values, np.ndarray):
+                return "vectorized"
+            return "table" if self._table is not None else "chain"
+        if backend == "vectorized" and np is None:
+            raise RuntimeError("The vectorized backend needs NumPy")
+        if backend == "table" and self._table is None:
+            raise ValueError("The table backend needs RuleEngine(..., domain=(low, high))")
+        if backend not in ("chain", "table", "vectorized"):
+            raise ValueError(f"Unknown backend {backend!r}")
+        return backend
+
+    def _table_lookup(self):
+        table, classify_one = self._table, self.classify_one
+        low, high = self.domain
+        if low == 0:
+            size = len(table)
+
+            def lookup(value):
+                # Non-negative ints index the table directly, everything else falls back
+                if value.__class__ is int and 0 <= value < size:
+                    return table[value]
+                return classify_one(value)
+        else:
+            def lookup(value):
+                if value.__class__ is int and low <= value < high:
+                    return table[value - low]
+                return classify_one(value)
+        return lookup
+
+    def _classify_vectorized(self, values):
+        dtype = np.uint8 if self.n_codes <= 1 << 8 else np.uint16 if self.n_codes <= 1 << 16 else np.uint32
+        codes = np.zeros(values.shape, dtype=dtype)
+        for rule, stride in zip(self.rules, self.strides):
+            masks = [rule.numpy_mask(op, operands, values) for _, op, operands in rule.branches]
+            choices = [index * stride for index in range(len(rule.branches))]
+            codes += np.select(masks, choices, default=(len(rule.labels) - 1) * stride).astype(dtype)
+        return codes
+
+
+################################################################## 3. Benchmark: match vs if-chain vs table vs vectorized
+def _if_chain(values, threshold):
+    # Hand-written version of Examples 2 and 7
+    counts = Counter()
+    for num in values:
+        if num > 0:
+            sign = "positive"
+        elif num == 0:
+            sign = "zero"
+        else:
+            sign = "negative"
+        parity = "even" if num % 2 == 0 else "odd"
+        above = "above" if num > threshold else "not above"
+        counts[sign, parity, above] += 1
+    return dict(counts)
+
+
+def _match_statement(values, threshold):
+    # Same rules written with match (Example 6) and guards
+    counts = Counter()
+    for num in values:
+        match num:
+            case 0:
+                sign = "zero"
+            case _ if num > 0:
+                sign = "positive"
+            case _:
+                sign = "negative"
+        match num % 2:
+            case 0:
+                parity = "even"
+            case _:
+                parity = "odd"
+        match num:
+            case _ if num > threshold:
+                above = "above"
+            case _:
+                above = "not above"
+        counts[sign, parity, above] += 1
+    return dict(counts)
+
+
+def benchmark(n: int = 1_000_000, low: int = -1000, high: int = 1000, threshold: int = 10,
+              repeat: int = 3) -> Dict[str, float]:
+    """Classify n random ints in [low, high) with every approach, best of `repeat`"""
+    rng = random.Random(42)
+    values = [rng.randrange(low, high) for _ in range(n)]
+    engine = RuleEngine(number_rules(threshold), domain=(low, high))
+
+    variants = {
+        "match statement": lambda: _match_statement(values, threshold),
+        "if/elif chain": lambda: _if_chain(values, threshold),
+        "engine chain": lambda: engine.counts(values, "chain"),
+        "engine table": lambda: engine.counts(values, "table"),
+    }
+    if np is not None:
+        array_values = np.asarray(values)
+        variants["engine vectorized"] = lambda: engine.counts(array_values, "vectorized")
+
+    expected = {key: count for key, count in sorted(_if_chain(values, threshold).items())}
+    results = {}
+    for name, run in variants.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = run()
+            best = min(best, time.perf_counter() - start)
+        assert dict(sorted(output.items())) == expected, f"{name} disagrees with the if/elif chain"
+        results[name] = best
+    return results
+
+
+def main():
+    """
+    Demonstration of the rule engine
+    """
+    engine = RuleEngine(number_rules(threshold=10), domain=(-100, 100))
+    numbers = [10, -5, 15, 0, 7, 12, 2]  # The numbers used in 01_conditional_statements.py
+    for num, code in zip(numbers, engine.classify(numbers)):
+        print(f"{num:>4} -> code {code:>2} {engine.decode(code)}")
+
+    print("\nCounts:", engine.counts(range(-20, 21)))
+    print("Per rule:", engine.rule_counts(range(-20, 21)))
+
+    n = 1_000_000
+    print(f"\nClassifying {n:,} numbers (best of 3):")
+    results = benchmark(n)
+    baseline = results["if/elif chain"]
+    for name, seconds in results.items():
+        print(f"{name:<18} {seconds * 1000:8.1f} ms  {n / seconds / 1e6:6.1f} M values/s  "
+              f"{baseline / seconds:5.2f}x if/elif")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+CSR Graph: BFS, Dijkstra and Connected Components on Typed Arrays
+
+The `bfs` example in basics_dsa_python.md keeps the graph as a dict of
+lists and marks a node visited only when it is popped, so a node is queued
+once per incoming edge. With tens of millions of edges that costs both time
+and gigabytes of Python objects. This module stores the graph in compressed
+sparse row (CSR) form:
+
+    offsets[u] .. offsets[u + 1]   slice of `targets` holding u's neighbours
+    targets                        array('l') of neighbour ids
+    weights                        optional array('d'), parallel to targets
+
+1. O(E) counting-sort build from edge arrays or pairs, from a
+   whitespace-separated edge-list file, or from a saved binary file
+2. BFS that marks visited on enqueue - every node is queued at most once
+3. Multi-source BFS (distance to the nearest source)
+4. Dijkstra on heapq with lazy deletion
+5. Connected components (weakly connected for directed graphs)
+6. Benchmarks against the dict-of-lists bfs
+"""
+
+import heapq
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from itertools import accumulate, chain
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+INFINITY = float("inf")
+
+
+################################################################## 1. Building the CSR arrays
+class CSRGraph:
+    """
+    Immutable graph with nodes 0 .. num_nodes - 1.
+
+    graph = CSRGraph.from_edges([(0, 1), (1, 2)], directed=False)
+    graph.bfs(0)               # [0, 1, 2]
+    """
+
+    def __init__(self, offsets: array, targets: array, weights: Optional[array] = None, directed: bool = True):
+        if len(offsets) == 0 or offsets[-1] != len(targets):
+            raise ValueError("offsets must end with len(targets)")
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError("weights must be parallel to targets")
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.directed = directed
+
+    @classmethod
+    def from_arrays(cls, sources: Sequence[int], targets: Sequence[int], num_nodes: Optional[int] = None,
+                    weights: Optional[Sequence[float]] = None, directed: bool = True) -> "CSRGraph":
+        """
+        Build from parallel source/target (and weight) sequences. Undirected
+        graphs store each edge in both directions.
+        """
+        if len(sources) != len(targets):
+            raise ValueError("sources and targets must have the same length")
+        sources = array("l", sources)
+        targets = array("l", targets)
+        if weights is not None:
+            weights = array("d", weights)
+        if not directed:
+            sources, targets = sources + targets, targets + sources
+            if weights is not None:
+                weights = weights + weights
+        if sources and min(min(sources), min(targets)) < 0:
+            raise ValueError("node ids must be non-negative")  # -1 would silently index the last node
+        if num_nodes is None:
+            num_nodes = max(max(sources, default=-1), max(targets, default=-1)) + 1
+        elif sources and max(max(sources), max(targets)) >= num_nodes:
+            raise ValueError(f"edge endpoint out of range for {num_nodes} nodes")
+
+        # Counting sort by source: one pass for the degrees, one to place the
+        # targets. O(E), and cheaper than sorting edge positions in C
+        degree = [0] * num_nodes
+        for source in sources:
+            degree[source] += 1
+        offsets = array("q", accumulate(degree, initial=0))
+        cursor = offsets.tolist()
+        csr_targets = array("l", bytes(len(targets) * array("l").itemsize))
+        csr_weights = None
+        if weights is None:
+            for source, target in zip(sources, targets):
+                position = cursor[source]
+                csr_targets[position] = target
+                cursor[source] = position + 1
+        else:
+            csr_weights = array("d", bytes(len(weights) * 8))
+            for source, target, weight in zip(sources, targets, weights):
+                position = cursor[source]
+                csr_targets[position] = target
+                csr_weights[position] = weight
+                cursor[source] = position + 1
+        return cls(offsets, csr_targets, csr_weights, directed)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple], num_nodes: Optional[int] = None,
+                   directed: bool = True) -> "CSRGraph":
+        """Build from (u, v) or (u, v, weight) tuples"""
+        edges = list(edges)
+        if not edges:
+            return cls.from_arrays([], [], num_nodes or 0, directed=directed)
+        columns = list(zip(*edges))
+        weights = columns[2] if len(columns) == 3 else None
+        return cls.from_arrays(columns[0], columns[1], num_nodes, weights, directed)
+
+    @classmethod
+    def from_edge_file(cls, path: str, num_nodes: Optional[int] = None, directed: bool = True,
+                       weighted: bool = False) -> "CSRGraph":
+        """
+        Build from a text file with one "u v" (or "u v weight") edge per
+        line; lines starting with # are skipped.
+        """
+        sources, targets, weights = array("l"), array("l"), array("d") if weighted else None
+        with open(path, encoding="ascii") as f:
+            for line in f:
+                fields = line.split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                sources.append(int(fields[0]))
+                targets.append(int(fields[1]))
+                if weighted:
+                    weights.append(float(fields[2]))
+        return cls.from_arrays(sources, targets, num_nodes, weights, directed)
+
+    def save(self, path: str) -> None:
+        """Binary format: header line, then the raw arrays"""
+        with open(path, "wb") as f:
+            header = f"{self.num_nodes} {self.num_edges} {int(self.directed)} {int(self.weights is not None)}\n"
+            f.write(header.encode("ascii"))
+            self.offsets.tofile(f)
+            self.targets.tofile(f)
+            if self.weights is not None:
+                self.weights.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "CSRGraph":
+        with open(path, "rb") as f:
+            num_nodes, num_edges, directed, weighted = map(int, f.readline().split())
+            offsets, targets = array("q"), array("l")
+            offsets.fromfile(f, num_nodes + 1)
+            targets.fromfile(f, num_edges)
+            weights = None
+            if weighted:
+                weights = array("d")
+                weights.fromfile(f, num_edges)
+        return cls(offsets, targets, weights, bool(directed))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """Stored (directed) edges; an undirected edge counts twice"""
+        return len(self.targets)
+
+    def neighbors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def nbytes(self) -> int:
+        total = len(self.offsets) * self.offsets.itemsize + len(self.targets) * self.targets.itemsize
+        if self.weights is not None:
+            total += len(self.weights) * self.weights.itemsize
+        return total
+
+    def transpose(self) -> "CSRGraph":
+        """The graph with every edge reversed"""
+        sources = array("l", chain.from_iterable(
+            [node] * self.degree(node) for node in range(self.num_nodes)))
+        return CSRGraph.from_arrays(self.targets, sources, self.num_nodes, self.weights, directed=True)
+
+    ################################################################## 2. BFS
+    def bfs(self, start: int) -> List[int]:
+        """Nodes in BFS order from `start`; each node is queued once"""
+        offsets, targets = self.offsets, self.targets
+        seen = bytearray(self.num_nodes)
+        seen[start] = 1
+        order = [start]
+        append = order.append
+        head = 0
+        while head < len(order):  # `order` doubles as the queue
+            node = order[head]
+            head += 1
+            for neighbor in targets[offsets[node]:offsets[node + 1]]:
+                if not seen[neighbor]:
+                    seen[neighbor] = 1
+                    append(neighbor)
+        return order
+
+    def bfs_distances(self, sources: Iterable[int]) -> array:
+        """
+        Multi-source BFS: hops from the nearest source for every node,
+        -1 where unreachable.
+        """
+        offsets, targets = self.offsets, self.targets
+        distance = array("l", [-1]) * self.num_nodes
+        frontier = []
+        for source in sources:
+            if distance[source] == -1:
+                distance[source] = 0
+                frontier.append(source)
+        level = 0
+        while frontier:
+            level += 1
+            next_frontier = []
+            append = next_frontier.append
+            for node in frontier:
+                for neighbor in targets[offsets[node]:offsets[node + 1]]:
+                    if distance[neighbor] == -1:
+                        distance[neighbor] = level
+                        append(neighbor)
+            frontier = next_frontier
+        return distance
+
+    ################################################################## 3. Dijkstra
+    def dijkstra(self, source: int, target: Optional[int] = None) -> Tuple[array, array]:
+        """
+        Shortest distances from `source` (inf where unreachable) and the
+        predecessor of every node (-1 for none). Unweighted graphs use
+        weight 1. Stops early once `target` is settled.
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        distance = array("d", [INFINITY]) * self.num_nodes
+        previous = array("l", [-1]) * self.num_nodes
+        distance[source] = 0.0
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            dist, node = pop(heap)
+            if dist > distance[node]:
+                continue  # Stale entry: a shorter path was found after it was pushed
+            if node == target:
+                break
+            start, end = offsets[node], offsets[node + 1]
+            if weights is None:
+                candidate = dist + 1.0
+                for neighbor in targets[start:end]:
+                    if candidate < distance[neighbor]:
+                        distance[neighbor] = candidate
+                        previous[neighbor] = node
+                        push(heap, (candidate, neighbor))
+            else:
+                for neighbor, weight in zip(targets[start:end], weights[start:end]):
+                    candidate = dist + weight
+                    if candidate < distance[neighbor]:
+                        distance[neighbor] = candidate
+                        previous[neighbor] = node
+                        push(heap, (candidate, neighbor))
+        return distance, previous
+
+    @staticmethod
+    def path(previous: array, target: int) -> List[int]:
+        """Rebuild the path to `target` from dijkstra()'s predecessors"""
+        path = [target]
+        while previous[path[-1]] != -1:
+            path.append(previous[path[-1]])
+        return path[::-1]
+
+    ################################################################## 4. Connected components
+    def connected_components(self) -> Tuple[int, array]:
+        """
+        (number of components, component label per node). Directed graphs
+        get weakly connected components, following edges both ways.
+        """
+        graphs = [self] if not self.directed else [self, self.transpose()]
+        label = array("l", [-1]) * self.num_nodes
+        count = 0
+        for root in range(self.num_nodes):
+            if label[root] != -1:
+                continue
+            label[root] = count
+            stack = [root]
+            pop, push = stack.pop, stack.append
+            while stack:
+                node = pop()
+                for graph in graphs:
+                    offsets = graph.offsets
+                    for neighbor in graph.targets[offsets[node]:offsets[node + 1]]:
+                        if label[neighbor] == -1:
+                            label[neighbor] = count
+                            push(neighbor)
+            count += 1
+        return count, label
+
+
+################################################################## 5. Benchmarks
+def _dict_bfs(graph, start):
+    """bfs from basics_dsa_python.md, returning the order instead of printing"""
+    visited = set()
+    order = []
+    queue = deque([start])
+    pushes = 1
+    while queue:
+        node = queue.popleft()
+        if node not in visited:
+            order.append(node)
+            visited.add(node)
+            queue.extend(graph[node])
+            pushes += len(graph[node])
+    return order, pushes
+
+
+def random_edges(num_nodes: int, num_edges: int, seed: int = 7) -> Tuple[array, array]:
+    rng = random.Random(seed)
+    sources = array("l", (rng.randrange(num_nodes) for _ in range(num_edges)))
+    targets = array("l", (rng.randrange(num_nodes) for _ in range(num_edges)))
+    return sources, targets
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(num_nodes: int = 200_000, num_edges: int = 1_000_000) -> None:
+    sources, targets = random_edges(num_nodes, num_edges)
+    print(f"\nRandom undirected graph: {num_nodes:,} nodes, {num_edges:,} edges")
+
+    tracemalloc.start()
+    graph_dict = {node: [] for node in range(num_nodes)}
+    for u, v in zip(sources, targets):
+        graph_dict[u].append(v)
+        graph_dict[v].append(u)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    csr, build_time = _timed(CSRGraph.from_arrays, sources, targets, num_nodes, None, False)
+    print(f"CSR build: {build_time:.2f} s")
+    print(f"Memory: dict of lists {dict_bytes / 2**20:.1f} MB, CSR arrays {csr.nbytes() / 2**20:.1f} MB")
+
+    (dict_order, pushes), dict_time = _timed(_dict_bfs, graph_dict, 0)
+    csr_order, csr_time = _timed(csr.bfs, 0)
+    assert set(dict_order) == set(csr_order)
+    print(f"BFS: dict {dict_time:.2f} s ({pushes:,} queue pushes), "
+          f"CSR {csr_time:.2f} s ({len(csr_order):,} queue pushes)")
+
+    _, multi_time = _timed(csr.bfs_distances, range(0, num_nodes, num_nodes // 10))
+    print(f"Multi-source BFS from 10 sources: {multi_time:.2f} s")
+
+    weighted = CSRGraph.from_arrays(sources, targets, num_nodes, array("d", (1.0 + (i % 10) for i in range(num_edges))),
+                                    directed=False)
+    _, dijkstra_time = _timed(weighted.dijkstra, 0)
+    print(f"Dijkstra (weighted, full): {dijkstra_time:.2f} s")
+
+    (count, _), components_time = _timed(csr.connected_components)
+    print(f"Connected components: {count:,} in {components_time:.2f} s")
+
+
+def main():
+    """
+    Demonstration of the CSR graph
+    """
+    # Same graph as basics_dsa_python.md, shifted to 0-based ids
+    graph = CSRGraph.from_edges([(0, 1), (0, 2), (1, 3)], directed=False)
+    print("BFS:", graph.bfs(0))  # Output: [0, 1, 2, 3]
+    print("Neighbours of 0:", list(graph.neighbors(0)))
+    print("Hops from {2, 3}:", list(graph.bfs_distances([2, 3])))
+
+    roads = CSRGraph.from_edges([(0, 1, 4.0), (0, 2, 1.0), (2, 1, 2.0), (1, 3, 5.0), (4, 5, 1.0)])
+    distance, previous = roads.dijkstra(0)
+    print("Dijkstra distances:", list(distance))
+    print("Shortest path 0 -> 3:", CSRGraph.path(previous, 3))
+    print("Weakly connected components:", roads.connected_components())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        edge_file = os.path.join(tmp, "edges.txt")
+        with open(edge_file, "w") as f:
+            f.write("# u v weight\n0 1 4\n0 2 1\n2 1 2\n1 3 5\n")
+        from_file = CSRGraph.from_edge_file(edge_file, weighted=True)
+        binary_file = os.path.join(tmp, "graph.csr")
+        from_file.save(binary_file)
+        print("Reloaded graph, 0 -> 3:", CSRGraph.load(binary_file).dijkstra(0)[0][3])
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
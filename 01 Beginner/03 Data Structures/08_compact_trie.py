@@ -0,0 +1,311 @@
+"""
+Compact Trie: Flat Arrays, Bulk Build and mmap Loading
+
+The `Trie` in basics_dsa_python.md creates a TrieNode object with its own
+`children` dict for every character, which comes to a few hundred bytes per
+node - gigabytes for a large dictionary. This trie is built once from a
+word list into three flat sections of one buffer, LOUDS style (nodes
+numbered in breadth-first order, so the children of a node are
+consecutive):
+
+    first_child   int32 per node (+1): children of n are first_child[n] .. first_child[n + 1] - 1
+    labels        the character leading into each node, 1, 2 or 4 bytes wide
+    terminal      one bit per node: a word ends here
+
+1. Sorted bulk construction - no node objects, not even while building
+2. search, starts_with and sorted prefix enumeration straight from the buffer
+3. save() writes the buffer as it is; load() mmaps the file, so startup does
+   not depend on the dictionary size and processes share the pages
+4. Memory, build, load and lookup benchmarks against the node-based Trie
+"""
+
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Iterable, Iterator, List
+
+MAGIC = b"CTRIE001"
+HEADER = struct.Struct("<8sQQQ")  # magic, nodes, words, label width
+ENCODINGS = {1: "latin-1", 2: "utf-16-le", 4: "utf-32-le"}
+_SINGLE_BYTES = [bytes([code]) for code in range(256)]
+
+if sys.byteorder != "little":  # first_child is read through memoryview.cast, i.e. native order
+    raise ImportError("08_compact_trie.py expects a little-endian machine")
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+################################################################## 1. The trie
+class CompactTrie:
+    """
+    Read-only trie over a bytes-like buffer (bytes, or an mmap of a saved
+    file).
+
+    trie = CompactTrie.build(["hello", "help", "world"])
+    trie.search("help"), trie.starts_with("wor")    # True, True
+    list(trie.keys("hel"))                          # ['hello', 'help']
+    """
+
+    def __init__(self, buffer):
+        magic, self.node_count, self.word_count, self.width = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a compact trie buffer")
+        self.encoding = ENCODINGS[self.width]
+        self._buffer = buffer
+        view = memoryview(buffer)
+        start = HEADER.size
+        end = start + 4 * (self.node_count + 1)
+        self._first_child = view[start:end].cast("i")
+        start = _aligned(end)
+        self._labels_start = start  # labels are searched with buffer.find(), not through the view
+        start = _aligned(start + self.width * self.node_count)
+        self._terminal = view[start:start + (self.node_count + 7) // 8]
+
+    ################################################################## 2. Bulk construction
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "CompactTrie":
+        """Build from any iterable of words (sorted and deduplicated here)"""
+        words = sorted(set(words))
+        max_code = max((max(map(ord, word), default=0) for word in words), default=0)
+        width = 1 if max_code < 0x100 else 2 if max_code < 0x10000 else 4
+
+        # Nodes are numbered in the order they leave the queue; a node is the
+        # range words[lo:hi] sharing its prefix of length `depth`
+        first_child: List[int] = []
+        labels = ["\0"]  # The root has no incoming edge
+        terminal = bytearray()
+        queue = deque([(0, len(words), 0)])
+        next_id = 1
+        while queue:
+            lo, hi, depth = queue.popleft()
+            first_child.append(next_id)
+            if lo < hi and len(words[lo]) == depth:  # The shortest word sorts first
+                terminal.append(1)
+                lo += 1
+            else:
+                terminal.append(0)
+            while lo < hi:
+                char = words[lo][depth]
+                # Every word starting with prefix+char sorts before prefix+next(char)
+                end = hi if char == "\U0010ffff" else bisect_left(
+                    words, words[lo][:depth] + chr(ord(char) + 1), lo, hi)
+                labels.append(char)
+                queue.append((lo, end, depth + 1))
+                next_id += 1
+                lo = end
+        first_child.append(next_id)  # Sentinel: the children of the last node end at node_count
+        return cls(cls._pack(first_child, labels, terminal, len(words), width))
+
+    @staticmethod
+    def _pack(first_child: List[int], labels: List[str], terminal: bytearray, word_count: int, width: int) -> bytes:
+        node_count = len(terminal)
+        bits = bytearray((node_count + 7) // 8)
+        for node in range(node_count):
+            if terminal[node]:
+                bits[node >> 3] |= 1 << (node & 7)
+        out = bytearray(HEADER.pack(MAGIC, node_count, word_count, width))
+        out += array("i", first_child).tobytes()
+        out += bytes(_aligned(len(out)) - len(out))
+        out += "".join(labels).encode(ENCODINGS[width])
+        out += bytes(_aligned(len(out)) - len(out))
+        out += bits
+        return bytes(out)
+
+    ################################################################## 3. Lookups
+    def _child(self, node: int, label: bytes) -> int:
+        """Child of `node` reached by the (encoded) label, or -1"""
+        width, base = self.width, self._labels_start
+        lo = base + width * self._first_child[node]
+        hi = base + width * self._first_child[node + 1]
+        find = self._buffer.find
+        position = find(label, lo, hi)
+        while position >= 0 and (position - base) % width:  # Match straddling two labels
+            position = find(label, position + 1, hi)
+        return -1 if position < 0 else (position - base) // width
+
+    def _walk(self, prefix: str) -> int:
+        try:
+            encoded = prefix.encode(self.encoding)
+        except UnicodeEncodeError:  # A character no word in the trie contains
+            return -1
+        width = self.width
+        node = 0
+        if width == 1:  # The common case, inlined: a label can't straddle others
+            first_child, find, base = self._first_child, self._buffer.find, self._labels_start
+            for code in encoded:
+                position = find(_SINGLE_BYTES[code], base + first_child[node], base + first_child[node + 1])
+                if position < 0:
+                    return -1
+                node = position - base
+            return node
+        for start in range(0, len(encoded), width):
+            node = self._child(node, encoded[start:start + width])
+            if node < 0:
+                return -1
+        return node
+
+    def _is_terminal(self, node: int) -> bool:
+        return bool(self._terminal[node >> 3] >> (node & 7) & 1)
+
+    def search(self, word: str) -> bool:
+        node = self._walk(word)
+        return node >= 0 and self._is_terminal(node)
+
+    __contains__ = search
+
+    def starts_with(self, prefix: str) -> bool:
+        return self._walk(prefix) >= 0
+
+    def keys(self, prefix: str = "") -> Iterator[str]:
+        """Words starting with `prefix`, in sorted order"""
+        node = self._walk(prefix)
+        if node < 0:
+            return
+        first_child, width, base = self._first_child, self.width, self._labels_start
+        buffer, encoding = self._buffer, self.encoding
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            if self._is_terminal(node):
+                yield word
+            lo, hi = first_child[node], first_child[node + 1]
+            if lo < hi:
+                chars = buffer[base + width * lo:base + width * hi].decode(encoding)
+                stack.extend((child, word + char) for child, char in zip(range(hi - 1, lo - 1, -1), reversed(chars)))
+
+    def __len__(self) -> int:
+        return self.word_count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    ################################################################## 4. Files
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self._buffer)
+
+    @classmethod
+    def load(cls, path: str) -> "CompactTrie":
+        """Map the file read-only; pages are read from disk as lookups touch them"""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+################################################################## 5. Benchmarks
+class TrieNode:
+    def __init__(self):
+        self.children = {}
+        self.is_end_of_word = False
+
+
+class Trie:
+    """The node-based Trie from basics_dsa_python.md"""
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, word):
+        node = self.root
+        for char in word:
+            if char not in node.children:
+                node.children[char] = TrieNode()
+            node = node.children[char]
+        node.is_end_of_word = True
+
+    def search(self, word):
+        node = self.root
+        for char in word:
+            if char not in node.children:
+                return False
+            node = node.children[char]
+        return node.is_end_of_word
+
+
+def random_words(count: int, seed: int = 3) -> List[str]:
+    """Words built from a small set of stems, so prefixes are shared as in real vocabularies"""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    stems = ["".join(rng.choices(letters, k=rng.randint(2, 6))) for _ in range(count // 20 + 1)]
+    return [rng.choice(stems) + "".join(rng.choices(letters, k=rng.randint(1, 6))) for _ in range(count)]
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(count: int = 200_000) -> None:
+    words = random_words(count)
+    queries = words[::4] + [word + "q" for word in words[1::4]]
+    print(f"\n{len(set(words)):,} distinct words, {len(queries):,} lookups (half misses)")
+
+    def build_node_trie():
+        trie = Trie()
+        for word in words:
+            trie.insert(word)
+        return trie
+
+    tracemalloc.start()
+    node_trie, node_build = _timed(build_node_trie)
+    node_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    compact, compact_build = _timed(CompactTrie.build, words)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "words.trie")
+        compact.save(path)
+        mapped, load_time = _timed(CompactTrie.load, path)
+
+        def lookups(trie):
+            search = trie.search
+            return sum(map(search, queries))
+
+        node_hits, node_lookup = _timed(lookups, node_trie)
+        compact_hits, compact_lookup = _timed(lookups, compact)
+        mapped_hits, mapped_lookup = _timed(lookups, mapped)
+        assert node_hits == compact_hits == mapped_hits
+        prefix = words[0][:3]
+        matches, enumerate_time = _timed(lambda: list(mapped.keys(prefix)))
+        assert matches == sorted(w for w in set(words) if w.startswith(prefix))
+
+        print(f"{'':<16} {'memory MB':>10} {'build s':>8} {'load s':>8} {'lookups/s':>11}")
+        print(f"{'node Trie':<16} {node_bytes / 2**20:10.1f} {node_build:8.2f} {'-':>8} "
+              f"{len(queries) / node_lookup / 1e6:9.2f} M")
+        print(f"{'CompactTrie':<16} {compact.nbytes / 2**20:10.1f} {compact_build:8.2f} {'-':>8} "
+              f"{len(queries) / compact_lookup / 1e6:9.2f} M")
+        print(f"{'CompactTrie mmap':<16} {mapped.nbytes / 2**20:10.1f} {'-':>8} {load_time:8.4f} "
+              f"{len(queries) / mapped_lookup / 1e6:9.2f} M")
+        print(f"{compact.node_count:,} nodes; {len(matches):,} words under {prefix!r} enumerated in "
+              f"{enumerate_time * 1000:.1f} ms")
+
+
+def main():
+    """
+    Demonstration of the compact trie
+    """
+    trie = CompactTrie.build(["hello", "help", "helm", "world", "hell"])
+    print(trie.search("hello"))  # Output: True
+    print(trie.search("world"))  # Output: True
+    print(trie.search("wor"), trie.starts_with("wor"))  # Output: False True
+    print(list(trie.keys("hel")))  # Output: ['hell', 'hello', 'helm', 'help']
+
+    unicode_trie = CompactTrie.build(["café", "cafés", "東京", "東北"])
+    print(unicode_trie.width, list(unicode_trie.keys("東")), "cafe" in unicode_trie)
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Array-backed Union-Find with Batch Unions and Forest Merging
+
+`UnionFind` in basics_dsa_python.md keeps `parent` in a list of Python
+ints, links roots in argument order (trees can degrade into long chains)
+and finds roots recursively, so a chain of a few thousand records raises
+RecursionError. For merging billions of record-pair matches this version:
+
+1. Stores parent and set size in array('l') - 8 bytes per element each,
+   instead of a pointer plus an int object
+2. Unions by size and finds iteratively with path halving (no recursion,
+   trees stay O(log n) deep even before compression)
+3. union_many(pairs): bulk unions from an iterable of pairs or from a flat
+   buffer of interleaved ids (array, bytes from a file, numpy array ...),
+   growing the structure to fit the largest id
+4. components() / labels() to export the sets
+5. A parallel phase: workers build forests over their share of the pairs,
+   the parent process merges them with merge()
+6. Benchmarks against the list-based version
+"""
+
+import os
+import random
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+_INTEGER_FORMATS = set("bBhHiIlLqQ")
+
+
+################################################################## 1. The structure
+class UnionFind:
+    """
+    Disjoint sets over the ids 0 .. len(uf) - 1.
+
+    uf = UnionFind(5)
+    uf.union(0, 1)
+    uf.find(1) == uf.find(0)    # True
+    """
+
+    def __init__(self, size: int = 0):
+        self.parent = array("l", range(size))
+        self.size = array("l", [1]) * size
+        self.count = size  # Number of disjoint sets
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def grow(self, size: int) -> None:
+        """Add singleton sets until there are `size` elements"""
+        old = len(self.parent)
+        if size > old:
+            self.parent.extend(range(old, size))
+            self.size.extend(array("l", [1]) * (size - old))
+            self.count += size - old
+
+    def add(self) -> int:
+        """New singleton set; returns its id"""
+        self.grow(len(self.parent) + 1)
+        return len(self.parent) - 1
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = x = parent[parent[x]]  # Path halving: point x at its grandparent
+        return x
+
+    def union(self, x: int, y: int) -> bool:
+        """Merge the sets of x and y; False if they were already one set"""
+        if x < 0 or y < 0:
+            raise ValueError("ids must be non-negative")  # -1 would silently index the last element
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x == root_y:
+            return False
+        size = self.size
+        if size[root_x] < size[root_y]:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        size[root_x] += size[root_y]
+        self.count -= 1
+        return True
+
+    def connected(self, x: int, y: int) -> bool:
+        return self.find(x) == self.find(y)
+
+    ################################################################## 2. Batch unions
+    def union_many(self, pairs) -> int:
+        """
+        Union every (x, y) pair; returns the number of merges.
+
+        `pairs` is an iterable of 2-tuples, or a 1-D integer buffer holding
+        x0, y0, x1, y1, ... (array('l'), bytes cast by the caller, numpy).
+        """
+        try:
+            view = memoryview(pairs)
+        except TypeError:
+            pairs = list(pairs)
+            if not pairs:
+                return 0
+            xs, ys = zip(*pairs)
+        else:
+            if view.ndim != 1 or view.format not in _INTEGER_FORMATS or len(view) % 2:
+                raise ValueError("pair buffers must be 1-D integer buffers of even length")
+            if not len(view):
+                return 0
+            xs, ys = view[0::2], view[1::2]
+        if min(min(xs), min(ys)) < 0:
+            raise ValueError("ids must be non-negative")
+        self.grow(max(max(xs), max(ys)) + 1)
+
+        # union() and find() inlined: one Python frame for the whole batch
+        parent, size = self.parent, self.size
+        merges = 0
+        for x, y in zip(xs, ys):
+            while parent[x] != x:
+                parent[x] = x = parent[parent[x]]
+            while parent[y] != y:
+                parent[y] = y = parent[parent[y]]
+            if x != y:
+                if size[x] < size[y]:
+                    x, y = y, x
+                parent[y] = x
+                size[x] += size[y]
+                merges += 1
+        self.count -= merges
+        return merges
+
+    ################################################################## 3. Export
+    def roots(self) -> array:
+        """Root of every element (compresses every path completely)"""
+        parent = self.parent
+        for x in range(len(parent)):
+            root = parent[x]
+            if parent[root] != root:  # Most elements already point at their root; walk for the rest
+                root = self.find(root)
+                parent[x] = root
+        return array("l", parent)
+
+    def labels(self) -> Tuple[int, array]:
+        """(number of sets, set number 0 .. count - 1 for every element)"""
+        roots = self.roots()
+        numbers: Dict[int, int] = {}
+        labels = array("l", [numbers.setdefault(root, len(numbers)) for root in roots])
+        return len(numbers), labels
+
+    def components(self) -> Dict[int, List[int]]:
+        """Root -> members of its set"""
+        groups: Dict[int, List[int]] = {}
+        for x, root in enumerate(self.roots()):
+            groups.setdefault(root, []).append(x)
+        return groups
+
+    ################################################################## 4. Merging forests
+    def merge(self, other: "UnionFind") -> int:
+        """
+        Add every union recorded in `other` (a forest over the same ids,
+        e.g. built by a worker); returns the number of merges.
+        """
+        links = array("l")
+        for x, root in enumerate(other.roots()):
+            if root != x:
+                links.append(x)
+                links.append(root)
+        self.grow(len(other))
+        return self.union_many(links)
+
+
+def _worker_forest(chunk: bytes) -> bytes:
+    """Runs in a worker process: unions for one chunk, returned as the roots array"""
+    pairs = array("l")
+    pairs.frombytes(chunk)
+    forest = UnionFind()
+    forest.union_many(pairs)
+    return forest.roots().tobytes()
+
+
+def parallel_union(pairs: array, size: int, workers: int = 4) -> UnionFind:
+    """
+    Split a flat pair buffer between processes; each builds its own forest,
+    then the forests are merged here.
+    """
+    if len(pairs) % 2:
+        raise ValueError("pair buffers must have even length")
+    if not pairs:
+        return UnionFind(size)
+    per_chunk = (len(pairs) // 2 + workers - 1) // workers * 2
+    chunks = [pairs[start:start + per_chunk].tobytes() for start in range(0, len(pairs), per_chunk)]
+    result = UnionFind(size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for roots_bytes in pool.map(_worker_forest, chunks):
+            forest = UnionFind()
+            forest.parent.frombytes(roots_bytes)  # A roots array is itself a valid (flat) forest
+            result.merge(forest)
+    return result
+
+
+################################################################## 5. Benchmarks
+class ListUnionFind:
+    """UnionFind from basics_dsa_python.md"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        if self.parent[x] != x:
+            self.parent[x] = self.find(self.parent[x])
+        return self.parent[x]
+
+    def union(self, x, y):
+        root_x = self.find(x)
+        root_y = self.find(y)
+        if root_x != root_y:
+            self.parent[root_y] = root_x
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark(size: int = 500_000, pair_count: int = 1_000_000) -> None:
+    rng = random.Random(11)
+    pairs = array("l", (rng.randrange(size) for _ in range(2 * pair_count)))
+    tuples = list(zip(pairs[0::2], pairs[1::2]))
+    print(f"\n{size:,} elements, {pair_count:,} random pairs")
+
+    def list_version():
+        uf = ListUnionFind(size)
+        for x, y in tuples:
+            uf.union(x, y)
+        return uf
+
+    tracemalloc.start()
+    fresh = ListUnionFind(size)
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del fresh
+    baseline, list_time = _timed(list_version)
+    uf = UnionFind(size)
+    array_bytes = len(uf.parent) * uf.parent.itemsize + len(uf.size) * uf.size.itemsize
+    _, array_time = _timed(uf.union_many, pairs)
+    forest, parallel_time = _timed(parallel_union, pairs, size, min(4, os.cpu_count() or 1))
+    check = UnionFind()
+    check.parent = array("l", baseline.parent)  # roots() only reads parent, and never recurses
+    assert forest.labels() == uf.labels() == check.labels()
+
+    print(f"{'':<28} {'seconds':>8} {'memory MB':>10}")
+    print(f"{'list, recursive find':<28} {list_time:8.2f} {list_bytes / 2**20:10.1f}")
+    print(f"{'array, union_many':<28} {array_time:8.2f} {array_bytes / 2**20:10.1f}")
+    print(f"{'array, worker forests':<28} {parallel_time:8.2f} {'':>10}")
+    print(f"{uf.count:,} sets")
+
+    chain = 20_000
+    old = ListUnionFind(chain)
+    for i in range(chain - 1):
+        old.union(i + 1, i)
+    try:
+        old.find(0)
+    except RecursionError:
+        print(f"List version on a {chain:,}-long chain: RecursionError")
+    new = UnionFind(chain)
+    new.union_many(array("l", [v for i in range(chain - 1) for v in (i + 1, i)]))
+    print(f"Array version on the same chain: one set, find(0) = {new.find(0)}, count = {new.count}")
+
+
+def main():
+    """
+    Demonstration of the array-backed Union-Find
+    """
+    uf = UnionFind(5)
+    uf.union(0, 1)
+    print(uf.find(1) == uf.find(0))  # Output: True
+    print(uf.union_many([(3, 4), (1, 4), (7, 8)]), "merges; grown to", len(uf))
+    print("Sets:", uf.count, uf.components())
+    print("Labels:", uf.labels())
+
+    worker = UnionFind(9)
+    worker.union_many(array("l", [2, 5, 5, 6]))
+    uf.merge(worker)
+    print("After merging a worker forest:", uf.components())
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
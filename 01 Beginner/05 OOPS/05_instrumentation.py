@@ -0,0 +1,397 @@
+"""
+Hot-path Instrumentation built from the timer decorator
+
+The `timer` decorator in 03_decorators_code.md uses time.time(), prints once
+per call and throws the measurement away. This module keeps the same idea -
+wrap a function and time it - but makes it usable on hot paths:
+
+1. perf_counter_ns timings collected into per-function, per-thread histograms
+   (count, total, min, max, p50, p99) without printing anything
+2. Switchable at runtime: instrument_class() installs wrappers only while the
+   profiler is enabled and puts the original functions back when it is
+   disabled, so a disabled profiler costs nothing at all
+3. Optional tracemalloc and cProfile sampling for selected functions
+4. instrument_class(CodingProblems) wraps every method of a class at once
+5. Export as JSON or as folded stacks ("a;b;c 123") for flamegraph.pl,
+   speedscope and similar tools
+"""
+
+import contextlib
+import cProfile
+import functools
+import importlib.util
+import io
+import json
+import os
+import pstats
+import threading
+import tracemalloc
+import types
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterable, List, Optional
+
+_SUB_BUCKETS = 4  # Histogram resolution: 4 buckets per power of two (~19% error)
+
+
+################################################################## 1. Per-function statistics
+class FunctionStats:
+    """
+    Timing statistics for one function in one thread
+
+    The histogram uses log-linear buckets: the bucket of a duration is its bit
+    length plus its next two bits, so recording a sample is a few integer
+    operations and percentiles are accurate to about one bucket width.
+    """
+
+    __slots__ = ("name", "count", "total_ns", "min_ns", "max_ns", "buckets", "peak_bytes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 1 << 63
+        self.max_ns = 0
+        self.buckets = [0] * (64 * _SUB_BUCKETS)
+        self.peak_bytes = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        bits = elapsed_ns.bit_length()
+        sub = (elapsed_ns >> (bits - 3)) & 3 if bits > 3 else 0
+        self.buckets[bits * _SUB_BUCKETS + sub] += 1
+
+    def merge(self, other: "FunctionStats") -> None:
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.min_ns = min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound (ns) of the bucket that holds the given fraction of calls"""
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                bits, sub = divmod(index, _SUB_BUCKETS)
+                if bits <= 3:
+                    return (1 << bits) - 1
+                upper = ((4 | sub) + 1) << (bits - 3)
+                return min(upper - 1, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "min_us": self.min_ns / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(0.50) / 1e3,
+            "p99_us": self.percentile(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+################################################################## 2. The profiler
+class Profiler:
+    """
+    Collects FunctionStats for instrumented functions
+
+    Usage:
+        profiler = Profiler()
+
+        @profiler.timed                     # Checks profiler.enabled per call
+        def hot_function(): ...
+
+        profiler.instrument_class(CodingProblems, memory=["is_prime"])
+        profiler.enable()                   # Installs the class wrappers
+        ...
+        profiler.disable()                  # Restores the original methods
+        print(profiler.report())
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stats: List[Dict[str, FunctionStats]] = []
+        self._thread_folded: List[Dict[str, int]] = []
+        self._classes: Dict[type, Dict[str, object]] = {}  # cls -> {name: original attribute}
+        self._memory: set = set()
+        self._cprofile: set = set()  # Names to run under cProfile
+        self._thread_profiles: List[Dict[str, cProfile.Profile]] = []  # One Profile per name and thread
+        self.memory_sample_every = 1
+
+    ############################################################## Switching on and off
+    def enable(self) -> None:
+        with self._lock:
+            if self.enabled:
+                return
+            self.enabled = True
+            for cls in self._classes:
+                self._install(cls)
+
+    def disable(self) -> None:
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            for cls, originals in self._classes.items():
+                for name, original in originals.items():
+                    setattr(cls, name, original)
+
+    def reset(self) -> None:
+        with self._lock:
+            for stats in self._thread_stats:
+                stats.clear()
+            for folded in self._thread_folded:
+                folded.clear()
+            for profiles in self._thread_profiles:
+                profiles.clear()
+
+    ############################################################## Per-thread state
+    def _state(self):
+        local = self._local
+        try:
+            return local.stats, local.stack, local.folded
+        except AttributeError:
+            local.stats, local.stack, local.folded = {}, [], {}
+            with self._lock:
+                self._thread_stats.append(local.stats)
+                self._thread_folded.append(local.folded)
+            return local.stats, local.stack, local.folded
+
+    def _profile(self, name: str) -> cProfile.Profile:
+        """This thread's cProfile.Profile for `name` (a Profile must not be shared between threads)"""
+        local = self._local
+        try:
+            profiles = local.profiles
+        except AttributeError:
+            profiles = local.profiles = {}
+            with self._lock:
+                self._thread_profiles.append(profiles)
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = cProfile.Profile()
+        return profile
+
+    ############################################################## Wrapping
+    def _wrap(self, func: Callable, name: str, check_enabled: bool) -> Callable:
+        profiler = self
+        memory = name in self._memory
+        cprofile_name = name if name in self._cprofile else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if check_enabled and not profiler.enabled:
+                return func(*args, **kwargs)
+            stats, stack, folded = profiler._state()
+            function_stats = stats.get(name)
+            if function_stats is None:
+                function_stats = stats[name] = FunctionStats(name)
+            frame = [name, 0]  # [name, time spent in instrumented children]
+            stack.append(frame)
+            sample_memory = memory and function_stats.count % profiler.memory_sample_every == 0
+            if sample_memory:
+                memory_base = profiler._start_memory()
+            profile = None
+            if cprofile_name and not getattr(profiler._local, "profiling", False):
+                profile = profiler._profile(cprofile_name)  # Only one can be active per thread
+            if profile is not None:
+                profiler._local.profiling = True
+                profile.enable()
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                if profile is not None:
+                    profile.disable()
+                    profiler._local.profiling = False
+                if sample_memory:
+                    function_stats.peak_bytes = max(function_stats.peak_bytes, profiler._stop_memory(memory_base))
+                function_stats.record(elapsed)
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                key = ";".join(entry[0] for entry in stack) + (";" if stack else "") + name
+                folded[key] = folded.get(key, 0) + elapsed - frame[1]
+
+        wrapper.__wrapped_by_profiler__ = True
+        return wrapper
+
+    def timed(self, func: Optional[Callable] = None, *, name: Optional[str] = None):
+        """Decorator for plain functions; costs one attribute check when disabled"""
+        def decorator(f):
+            return self._wrap(f, name or f.__qualname__, check_enabled=True)
+        return decorator(func) if func is not None else decorator
+
+    def instrument_class(self, cls: type, include: Optional[Iterable[str]] = None,
+                         memory: Iterable[str] = (), cprofile: Iterable[str] = ()) -> type:
+        """
+        Instrument every method of `cls` (or just `include`): plain functions,
+        staticmethods and classmethods defined in the class body. Wrappers are
+        installed while the profiler is enabled and removed when it is not.
+
+        memory:   method names to sample with tracemalloc (peak bytes per call)
+        cprofile: method names to run under cProfile (see cprofile_stats())
+        """
+        with self._lock:
+            known = self._classes.get(cls, {})  # Instrumenting again while enabled: keep the real originals
+        originals = {}
+        for attr, value in vars(cls).items():
+            if include is not None and attr not in include:
+                continue
+            if attr.startswith("__") or not isinstance(value, (types.FunctionType, staticmethod, classmethod)):
+                continue
+            if attr in known:
+                originals[attr] = known[attr]
+            elif not getattr(getattr(value, "__func__", value), "__wrapped_by_profiler__", False):
+                originals[attr] = value  # Already-timed methods (@profiler.timed) are left as they are
+        self._memory.update(f"{cls.__qualname__}.{attr}" for attr in memory)
+        self._cprofile.update(f"{cls.__qualname__}.{attr}" for attr in cprofile)
+        with self._lock:
+            self._classes[cls] = originals
+            if self.enabled:
+                self._install(cls)
+        return cls
+
+    def _install(self, cls: type) -> None:
+        for attr, original in self._classes[cls].items():
+            name = f"{cls.__qualname__}.{attr}"
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(self._wrap(original.__func__, name, check_enabled=False))
+            elif isinstance(original, classmethod):
+                wrapped = classmethod(self._wrap(original.__func__, name, check_enabled=False))
+            else:
+                wrapped = self._wrap(original, name, check_enabled=False)
+            setattr(cls, attr, wrapped)
+
+    ############################################################## Memory sampling
+    def _start_memory(self) -> int:
+        """
+        Begin a (possibly nested) sampled call; returns its base usage.
+        reset_peak() is global, so every enclosing sampled call keeps the
+        highest peak seen before the reset in `memory_peaks`.
+        """
+        local = self._local
+        peaks = getattr(local, "memory_peaks", None)
+        if not peaks:
+            local.memory_peaks = peaks = []
+            if not tracemalloc.is_tracing():  # Only the outermost call starts tracing
+                tracemalloc.start()
+                local.started_tracing = True
+        else:
+            peaks[-1] = max(peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        peaks.append(base)
+        return base
+
+    def _stop_memory(self, base: int) -> int:
+        local = self._local
+        peak = max(local.memory_peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if local.memory_peaks:
+            local.memory_peaks[-1] = max(local.memory_peaks[-1], peak)
+        elif getattr(local, "started_tracing", False):  # ... and only the outermost one stops it
+            tracemalloc.stop()
+            local.started_tracing = False
+        return peak - base
+
+    ############################################################## Reporting
+    def stats(self) -> Dict[str, FunctionStats]:
+        """Statistics merged across all threads"""
+        merged: Dict[str, FunctionStats] = {}
+        with self._lock:
+            for thread_stats in self._thread_stats:
+                for name, function_stats in list(thread_stats.items()):
+                    merged.setdefault(name, FunctionStats(name)).merge(function_stats)
+        return merged
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps({name: s.to_dict() for name, s in sorted(self.stats().items())}, indent=indent)
+
+    def folded_stacks(self) -> str:
+        """Self time per call stack in microseconds, one "a;b;c value" line each"""
+        merged: Dict[str, int] = {}
+        with self._lock:
+            for folded in self._thread_folded:
+                for key, ns in list(folded.items()):
+                    merged[key] = merged.get(key, 0) + ns
+        return "\n".join(f"{key} {max(ns // 1000, 1)}" for key, ns in sorted(merged.items()))
+
+    def cprofile_stats(self, name: str, limit: int = 10) -> str:
+        """cProfile statistics for `name`, merged across threads"""
+        with self._lock:
+            profiles = [p[name] for p in self._thread_profiles if name in p and p[name].getstats()]
+        if not profiles:
+            return f"{name}: no calls profiled"
+        stream = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def report(self) -> str:
+        lines = [f"{'function':<40} {'calls':>8} {'total ms':>10} {'p50 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for name, function_stats in sorted(self.stats().items(), key=lambda item: -item[1].total_ns):
+            data = function_stats.to_dict()
+            lines.append(f"{name:<40} {data['count']:>8} {data['total_ms']:>10.3f} "
+                         f"{data['p50_us']:>9.1f} {data['p99_us']:>9.1f} {data['max_us']:>9.1f}")
+        return "\n".join(lines)
+
+
+profiler = Profiler()
+
+
+################################################################## 3. Demonstration on CodingProblems
+def load_coding_problems():
+    """Import basic_code_questions.py (its folder name is not a package)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "basic_code_questions.py")
+    spec = importlib.util.spec_from_file_location("basic_code_questions", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    """
+    Instrument every CodingProblems method, run the demo quietly and report
+    """
+    module = load_coding_problems()
+    profiler.instrument_class(module.CodingProblems, memory=["fibonacci_series"], cprofile=["is_prime"])
+
+    @profiler.timed
+    def run_demo():
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.main()
+
+    run_demo()  # Disabled: nothing is recorded
+    profiler.enable()
+    for _ in range(200):
+        run_demo()
+    profiler.disable()
+    run_demo()  # Disabled again: original methods are back
+
+    print(profiler.report())
+    print("\nJSON (excerpt):")
+    print("\n".join(profiler.to_json().splitlines()[:11]))
+    print("\nFolded stacks:")
+    print(profiler.folded_stacks())
+    print("\ncProfile of CodingProblems.is_prime:")
+    print("\n".join(profiler.cprofile_stats("CodingProblems.is_prime", limit=3).splitlines()[:12]))
+
+
+if __name__ == "__main__":
+    main()
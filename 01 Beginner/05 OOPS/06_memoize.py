@@ -0,0 +1,435 @@
+"""
+Production-grade memoize
+
+The `memoize` decorator in 03_decorators_code.md keeps an unbounded dict,
+ignores keyword arguments and is not thread-safe. Applied to fibonacci- and
+factorial-style functions in a process that runs for months, its memory only
+grows. This module replaces it with a small memoization subsystem:
+
+1. Bounded stores with LRU or LFU eviction
+2. Key building that understands keyword arguments (f(1, b=2) == f(1, 2))
+   and can keep types apart (typed=True: f(1) != f(1.0))
+3. Per-key locking: concurrent misses for the same key compute it once,
+   the other threads wait for that result
+4. Optional persistent second tier in SQLite or dbm, so a restarted process
+   starts warm instead of recomputing everything
+5. Hit-rate statistics through cache_info()
+"""
+
+import copy
+import dbm
+import functools
+import inspect
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+################################################################## 1. Bounded in-memory stores
+class LRUStore:
+    """Evicts the least recently used key once maxsize is reached"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value) -> int:
+        """Store a value; returns how many keys were evicted"""
+        if self.maxsize is not None and self.maxsize <= 0:  # Like lru_cache(maxsize=0): never store
+            return 0
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            return 1
+        return 0
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LFUStore:
+    """
+    Evicts the least frequently used key (oldest first among ties) in O(1):
+    keys are grouped in one OrderedDict per use count.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._values: Dict[Hashable, object] = {}
+        self._counts: Dict[Hashable, int] = {}
+        self._by_count: Dict[int, OrderedDict] = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def _touch(self, key) -> None:
+        count = self._counts[key]
+        bucket = self._by_count[count]
+        del bucket[key]
+        if not bucket:
+            del self._by_count[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._by_count[count + 1][key] = None
+
+    def get(self, key):
+        value = self._values.get(key, _MISSING)
+        if value is not _MISSING:
+            self._touch(key)
+        return value
+
+    def set(self, key, value) -> int:
+        if key in self._values:
+            self._values[key] = value
+            self._touch(key)
+            return 0
+        if self.maxsize is not None and self.maxsize <= 0:
+            return 0
+        evicted = 0
+        if self.maxsize is not None and len(self._values) >= self.maxsize:
+            victim, _ = self._by_count[self._min_count].popitem(last=False)
+            if not self._by_count[self._min_count]:
+                del self._by_count[self._min_count]
+            del self._values[victim], self._counts[victim]
+            evicted = 1
+        self._values[key] = value
+        self._counts[key] = 1
+        self._by_count[1][key] = None
+        self._min_count = 1
+        return evicted
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._counts.clear()
+        self._by_count.clear()
+        self._min_count = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+STORES = {"lru": LRUStore, "lfu": LFUStore}
+
+
+################################################################## 2. Persistent second tier
+class SQLiteTier:
+    """Pickled results in one SQLite table, namespaced per function"""
+
+    def __init__(self, path: str, namespace: str):
+        self.namespace = namespace
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS memo (namespace TEXT, key BLOB, value BLOB, PRIMARY KEY (namespace, key))")
+        self._lock = threading.Lock()
+
+    def get(self, key_bytes: bytes):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM memo WHERE namespace = ? AND key = ?", (self.namespace, key_bytes)).fetchone()
+        return _MISSING if row is None else pickle.loads(row[0])
+
+    def set(self, key_bytes: bytes, value) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO memo VALUES (?, ?, ?)", (self.namespace, key_bytes, blob))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM memo WHERE namespace = ?", (self.namespace,))
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class DbmTier:
+    """Pickled results in a dbm file (one file per function)"""
+
+    def __init__(self, path: str, namespace: str):
+        self.namespace = namespace.encode()
+        self._db = dbm.open(path, "c")
+        self._lock = threading.Lock()
+
+    def get(self, key_bytes: bytes):
+        with self._lock:
+            blob = self._db.get(self.namespace + b"\0" + key_bytes)
+        return _MISSING if blob is None else pickle.loads(blob)
+
+    def set(self, key_bytes: bytes, value) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._db[self.namespace + b"\0" + key_bytes] = blob
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in [k for k in self._db.keys() if k.startswith(self.namespace + b"\0")]:
+                del self._db[key]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+TIERS = {"sqlite": SQLiteTier, "dbm": DbmTier}
+
+
+################################################################## 3. Statistics
+class CacheInfo:
+    """Counters for one memoized function (cache_info() returns a copy)"""
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0  # Calls that waited for another thread's computation
+        self.currsize = 0
+        self.maxsize: Optional[int] = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return (f"CacheInfo(hits={self.hits}, disk_hits={self.disk_hits}, misses={self.misses}, "
+                f"waits={self.waits}, evictions={self.evictions}, currsize={self.currsize}, "
+                f"maxsize={self.maxsize}, hit_rate={self.hit_rate:.1%})")
+
+
+################################################################## 4. The decorator
+class _InFlight:
+    """A computation other threads can wait for"""
+
+    __slots__ = ("event", "owner", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.owner = threading.get_ident()
+        self.value = _MISSING
+        self.error: Optional[BaseException] = None
+
+
+def memoize(func: Optional[Callable] = None, *, maxsize: Optional[int] = 1024, policy: str = "lru",
+            typed: bool = False, persist: Optional[str] = None, backend: str = "sqlite"):
+    """
+    Memoize a function with bounded memory, kwargs-aware keys, per-key
+    locking and an optional on-disk tier.
+
+    maxsize:  number of results kept in memory (None = unbounded)
+    policy:   "lru" or "lfu"
+    typed:    cache f(1) and f(1.0) separately
+    persist:  path of a SQLite database (backend="sqlite") or dbm file
+              (backend="dbm"); results are written through and read back
+              after a restart. Arguments and results must be picklable.
+
+    Usable as @memoize or @memoize(maxsize=..., ...). The wrapper exposes
+    cache_info(), cache_clear() and close().
+    """
+    if policy not in STORES:
+        raise ValueError(f"Unknown policy {policy!r}, expected one of {sorted(STORES)}")
+    if backend not in TIERS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {sorted(TIERS)}")
+
+    def decorator(f: Callable) -> Callable:
+        signature = inspect.signature(f)
+        parameters = signature.parameters.values()
+        var_keyword = next((p.name for p in parameters if p.kind is p.VAR_KEYWORD), None)
+        # Calls passing exactly these positionally are already canonical and skip binding
+        positional = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in parameters)
+        exact = not any(p.kind is p.VAR_POSITIONAL for p in parameters)
+        store = STORES[policy](maxsize)
+        tier = TIERS[backend](persist, f"{f.__module__}.{f.__qualname__}") if persist else None
+        get = store.get
+        info = CacheInfo()
+        info.maxsize = maxsize
+        lock = threading.Lock()
+        in_flight: Dict[Hashable, _InFlight] = {}
+
+        def make_key(args, kwargs):
+            if kwargs or not exact or len(args) != positional:
+                # Bind to the signature so f(1), f(1, 2), f(1, b=2) and f(b=2, a=1) share a key
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                extra = bound.arguments.pop(var_keyword, None) if var_keyword else None
+                args = tuple(bound.arguments.values())
+                if extra:
+                    args += tuple(sorted(extra.items()))
+            if typed:
+                return args + tuple(type(arg) for arg in args)
+            return args if len(args) != 1 or type(args[0]) not in (int, str) else args[0]
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if kwargs or typed or len(args) != positional or not exact:
+                key = make_key(args, kwargs)
+            else:  # Common case inlined: plain positional call
+                key = args[0] if positional == 1 and type(args[0]) in (int, str) else args
+            with lock:
+                value = get(key)
+                if value is not _MISSING:
+                    info.hits += 1
+                    return value
+                pending = in_flight.get(key)
+                if pending is None:
+                    pending = in_flight[key] = _InFlight()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                if pending.owner == threading.get_ident():
+                    return f(*args, **kwargs)  # Same key re-entered recursively: don't deadlock
+                with lock:
+                    info.waits += 1
+                pending.event.wait()
+                if pending.error is not None:
+                    raise pending.error
+                return pending.value
+
+            # This thread computes the value (or loads it from disk)
+            try:
+                value = _MISSING
+                key_bytes = None
+                if tier is not None:
+                    key_bytes = pickle.dumps(key, protocol=4)
+                    value = tier.get(key_bytes)
+                from_disk = value is not _MISSING
+                if not from_disk:
+                    value = f(*args, **kwargs)
+                    if tier is not None:
+                        tier.set(key_bytes, value)
+                with lock:
+                    if from_disk:
+                        info.disk_hits += 1
+                    else:
+                        info.misses += 1
+                    info.evictions += store.set(key, value)
+                    info.currsize = len(store)
+                pending.value = value
+                return value
+            except BaseException as error:
+                pending.error = error
+                raise
+            finally:
+                with lock:
+                    del in_flight[key]
+                pending.event.set()
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return copy.copy(info)  # A snapshot: later calls don't change it
+
+        def cache_clear(disk: bool = False) -> None:
+            with lock:
+                store.clear()
+                info.currsize = 0
+            if disk and tier is not None:
+                tier.clear()
+
+        def close() -> None:
+            if tier is not None:
+                tier.close()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.close = close
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+################################################################## 5. Demonstration
+def main():
+    """
+    The fibonacci/factorial examples with bounded, concurrent and persistent caches
+    """
+    @memoize(maxsize=128)
+    def fibonacci(n):
+        if n < 2:
+            return n
+        return fibonacci(n - 1) + fibonacci(n - 2)
+
+    print("fibonacci(300):", fibonacci(300))
+    print(fibonacci.cache_info())
+
+    @memoize(maxsize=3, policy="lfu")
+    def factorial(n, step=1):
+        return 1 if n <= 1 else n * factorial(n - step, step=step)
+
+    print("\nfactorial(5) / factorial(5, step=1) / factorial(n=5):",
+          factorial(5), factorial(5, step=1), factorial(n=5))
+    print(factorial.cache_info())
+
+    # Eight threads miss on the same key at once: the body runs once
+    calls = []
+
+    @memoize
+    def slow_square(x):
+        calls.append(x)
+        time.sleep(0.1)
+        return x * x
+
+    threads = [threading.Thread(target=slow_square, args=(12,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"\n8 concurrent calls, body ran {len(calls)} time(s):", slow_square.cache_info())
+
+    # Cost of a cache hit, next to the original dict memoize and functools.lru_cache
+    def original_memoize(func):
+        cache = {}
+        def wrapper(*args):
+            if args in cache:
+                return cache[args]
+            result = func(*args)
+            cache[args] = result
+            return result
+        return wrapper
+
+    print()
+    for name, decorate in (("original memoize", original_memoize), ("functools.lru_cache", functools.lru_cache(1024)),
+                           ("memoize (lru)", memoize), ("memoize (lfu)", memoize(policy="lfu"))):
+        square = decorate(lambda x: x * x)
+        for i in range(100):
+            square(i)
+        start = time.perf_counter()
+        for _ in range(1000):
+            for i in range(100):
+                square(i)
+        print(f"{name:<20} {(time.perf_counter() - start) * 1e4:6.0f} ns per hit")
+
+    # Warm restart: a second "process" reads what the first one computed
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, path in (("sqlite", os.path.join(tmp, "memo.sqlite")), ("dbm", os.path.join(tmp, "memo.dbm"))):
+            for run in ("cold", "warm"):
+                @memoize(maxsize=None, persist=path, backend=backend)
+                def expensive(n):
+                    time.sleep(0.001)
+                    return sum(i * i for i in range(n))
+
+                start = time.perf_counter()
+                for n in range(200):
+                    expensive(n)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"{backend:<6} {run} start: {elapsed:7.1f} ms  {expensive.cache_info()}")
+                expensive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+Cached Attributes for Slotted Classes, Threads and Async Code
+
+The `cached_property` in 03_decorators_code.md caches with
+setattr(instance, name, value), so it:
+- fails on __slots__ classes (no instance __dict__ to write to)
+- lets two threads run the expensive computation at the same time
+- keeps returning stale results after `comp.data = ...`
+
+`cached_attribute` fixes all three:
+
+1. Storage picked per class: the instance __dict__ (repeat reads cost the
+   same as a plain attribute), a declared slot named `_<name>`, or a weak
+   side table for slotted classes that have neither
+2. Per-instance locking, so concurrent first reads compute once
+3. depends_on=("data",): assigning any listed attribute drops the cached value
+4. async def methods: the first read starts one task, every reader awaits it
+5. A benchmark of read cost against plain attributes and functools.cached_property
+"""
+
+import asyncio
+import functools
+import inspect
+import sys
+import threading
+import time
+import timeit
+import types
+import weakref
+from typing import Callable, Dict, List, Optional, Sequence
+
+_MISSING = object()
+
+
+################################################################## 1. Where the value lives
+# Every storage has load(instance), which raises AttributeError/KeyError when
+# nothing is cached, so the hit path is one call without a sentinel check.
+class _Storage:
+    def get(self, instance):
+        try:
+            return self.load(instance)
+        except (AttributeError, KeyError):
+            return _MISSING
+
+
+class _DictStorage(_Storage):
+    """The instance __dict__; the descriptor is non-data, so hits never reach it"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def load(self, instance):
+        return instance.__dict__[self.name]
+
+    def set(self, instance, value) -> None:
+        instance.__dict__[self.name] = value
+
+    def delete(self, instance) -> None:
+        instance.__dict__.pop(self.name, None)
+
+
+class _SlotStorage(_Storage):
+    """A slot the class declares for the value, e.g. __slots__ = ("data", "_processed_data")"""
+
+    def __init__(self, member: types.MemberDescriptorType):
+        self.member = member
+        self.load = member.__get__  # Raises AttributeError while the slot is empty
+
+    def set(self, instance, value) -> None:
+        self.member.__set__(instance, value)
+
+    def delete(self, instance) -> None:
+        try:
+            self.member.__delete__(instance)
+        except AttributeError:
+            pass
+
+
+class _SideTableStorage(_Storage):
+    """Values keyed weakly by instance, for slotted classes without a spare slot (needs __weakref__)"""
+
+    def __init__(self):
+        self.table: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.load = self.table.__getitem__
+
+    def set(self, instance, value) -> None:
+        self.table[instance] = value
+
+    def delete(self, instance) -> None:
+        self.table.pop(instance, None)
+
+
+def _find_slot(owner: type, slot_name: str) -> Optional[types.MemberDescriptorType]:
+    for klass in owner.__mro__:
+        member = klass.__dict__.get(slot_name)
+        if isinstance(member, types.MemberDescriptorType):
+            return member
+    return None
+
+
+################################################################## 2. Invalidating dependencies
+class _Dependency:
+    """
+    Data descriptor installed over an attribute that cached values depend on.
+    It wraps whatever the class had under that name: a slot or a property
+    handles reads and writes, a class-level default is returned until the
+    instance sets its own value. Every write and delete also invalidates the
+    dependent cached attributes.
+    """
+
+    def __init__(self, name: str, wrapped=_MISSING):
+        self.name = name
+        self.wrapped = wrapped
+        self.data_descriptor = hasattr(type(wrapped), "__set__")  # Slot member, property, ...
+        self.dependents: List["cached_attribute"] = []
+
+    def __get__(self, instance, owner=None):
+        if instance is None:  # Class access looks like it did before the wrapping
+            if self.wrapped is _MISSING:
+                return self
+            return self.wrapped.__get__(None, owner) if hasattr(type(self.wrapped), "__get__") else self.wrapped
+        if self.data_descriptor:
+            return self.wrapped.__get__(instance, owner)
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        if self.wrapped is _MISSING:
+            raise AttributeError(f"{type(instance).__name__!r} object has no attribute {self.name!r}")
+        if hasattr(type(self.wrapped), "__get__"):
+            return self.wrapped.__get__(instance, owner)
+        return self.wrapped  # Class-level default
+
+    def __set__(self, instance, value) -> None:
+        if self.data_descriptor:
+            self.wrapped.__set__(instance, value)
+        else:
+            instance.__dict__[self.name] = value
+        for dependent in self.dependents:
+            dependent.invalidate(instance)
+
+    def __delete__(self, instance) -> None:
+        if self.data_descriptor:
+            self.wrapped.__delete__(instance)
+        else:
+            instance.__dict__.pop(self.name, None)
+        for dependent in self.dependents:
+            dependent.invalidate(instance)
+
+
+def _class_attribute(owner: type, name: str):
+    """What `name` resolves to on the class (slot, property, default ...), or _MISSING"""
+    for klass in owner.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+    return _MISSING
+
+
+################################################################## 3. The descriptor
+class _Computation:
+    """Lock and invalidation counter for one instance while its value is computed"""
+
+    __slots__ = ("lock", "users", "generation")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+        self.generation = 0
+
+
+class cached_attribute:
+    """
+    Compute an attribute once per instance and cache it.
+
+    @cached_attribute
+    def processed_data(self): ...
+
+    @cached_attribute(depends_on=("data",))
+    def processed_data(self): ...
+
+    Methods:
+    - invalidate(instance): drop the cached value (e.g. after mutating
+      self.data in place, which assignment tracking cannot see)
+    - For `async def` functions the attribute is an awaitable task that is
+      shared by all readers; a failed task is not cached.
+    """
+
+    def __init__(self, func: Optional[Callable] = None, *, depends_on: Sequence[str] = ()):
+        self.depends_on = tuple(depends_on)
+        self.func: Optional[Callable] = None
+        self.name = ""
+        self.storage = None
+        self._load: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self._computing: Dict[int, _Computation] = {}  # id(instance) -> in-progress computation
+        if func is not None:
+            self(func)
+
+    def __call__(self, func: Callable) -> "cached_attribute":
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        functools.update_wrapper(self, func)
+        return self
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        member = _find_slot(owner, f"_{name}")
+        if member is not None:
+            self.storage = _SlotStorage(member)
+        elif owner.__dictoffset__:
+            self.storage = _DictStorage(name)
+        elif owner.__weakrefoffset__:
+            self.storage = _SideTableStorage()
+        else:
+            raise TypeError(f"cached_attribute {name!r} needs a '_{name}' or '__weakref__' slot in "
+                            f"{owner.__name__}.__slots__")
+        self._load = self.storage.load
+        for attribute in self.depends_on:
+            current = owner.__dict__.get(attribute)
+            if not isinstance(current, _Dependency):
+                current = _Dependency(attribute, _class_attribute(owner, attribute))
+                setattr(owner, attribute, current)
+            current.dependents.append(self)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return self._load(instance)
+        except (AttributeError, KeyError):
+            return self._compute(instance)
+
+    def _compute(self, instance):
+        key = id(instance)
+        with self._lock:
+            computation = self._computing.get(key)
+            if computation is None:
+                computation = self._computing[key] = _Computation()
+            computation.users += 1
+        try:
+            with computation.lock:  # Other threads wait here, then find the stored value
+                value = self.storage.get(instance)
+                if value is not _MISSING:
+                    return value
+                generation = computation.generation
+                if self.is_async:
+                    try:
+                        loop = asyncio.get_running_loop()
+                    except RuntimeError:
+                        raise RuntimeError(f"async cached_attribute {self.name!r} must be read inside a "
+                                           f"running event loop") from None
+                    value = loop.create_task(self.func(instance))
+                    value.add_done_callback(functools.partial(self._forget_failed, instance))
+                else:
+                    value = self.func(instance)
+                with self._lock:
+                    if computation.generation == generation:  # No dependency changed while computing
+                        self.storage.set(instance, value)
+                return value
+        finally:
+            with self._lock:
+                computation.users -= 1
+                if not computation.users:
+                    del self._computing[key]
+
+    def _forget_failed(self, instance, task: "asyncio.Future") -> None:
+        if (task.cancelled() or task.exception() is not None) and self.storage.get(instance) is task:
+            self.storage.delete(instance)
+
+    def invalidate(self, instance) -> None:
+        with self._lock:
+            self.storage.delete(instance)
+            computation = self._computing.get(id(instance))
+            if computation is not None:
+                computation.generation += 1
+
+    def __repr__(self) -> str:
+        return f"<cached_attribute {self.name!r} depends_on={self.depends_on}>"
+
+
+################################################################## 4. The ExpensiveComputation example, three ways
+class ExpensiveComputation:
+    """Plain class: the value lands in __dict__ and later reads are plain attribute reads"""
+
+    def __init__(self, data):
+        self.data = data
+
+    @cached_attribute(depends_on=("data",))
+    def processed_data(self):
+        print("Processing data...")
+        time.sleep(0.1)  # Simulate expensive computation
+        return [x * 2 for x in self.data]
+
+
+class SlottedComputation:
+    """Slotted class with a declared slot for the cached value"""
+
+    __slots__ = ("data", "_processed_data")
+
+    def __init__(self, data):
+        self.data = data
+
+    @cached_attribute(depends_on=("data",))
+    def processed_data(self):
+        return [x * 2 for x in self.data]
+
+
+class SideTableComputation:
+    """Slotted class without a spare slot: the value goes to a weak side table"""
+
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data):
+        self.data = data
+
+    @cached_attribute(depends_on=("data",))
+    def processed_data(self):
+        return [x * 2 for x in self.data]
+
+
+class AsyncComputation:
+    __slots__ = ("data", "_processed_data")
+
+    def __init__(self, data):
+        self.data = data
+
+    @cached_attribute(depends_on=("data",))
+    async def processed_data(self):
+        print("Fetching and processing...")
+        await asyncio.sleep(0.05)
+        return [x * 2 for x in self.data]
+
+
+################################################################## 5. Benchmark
+def benchmark(number: int = 1_000_000) -> Dict[str, float]:
+    """Nanoseconds per read of an already cached value"""
+
+    class Plain:
+        __slots__ = ("processed_data",)
+
+    class WithFunctools:
+        @functools.cached_property
+        def processed_data(self):
+            return [1]
+
+    class Original:  # The version in 03_decorators_code.md
+        class cached_property:
+            def __init__(self, func):
+                self.func = func
+                self.name = func.__name__
+
+            def __get__(self, instance, owner=None):
+                if instance is None:
+                    return self
+                value = self.func(instance)
+                setattr(instance, self.name, value)
+                return value
+
+        @cached_property
+        def processed_data(self):
+            return [1]
+
+    plain = Plain()
+    plain.processed_data = [1]
+    candidates = {
+        "plain slot attribute": plain,
+        "original cached_property": Original(),
+        "functools.cached_property": WithFunctools(),
+        "cached_attribute (__dict__)": ExpensiveComputation.__new__(ExpensiveComputation),
+        "cached_attribute (slot)": SlottedComputation([1]),
+        "cached_attribute (side table)": SideTableComputation([1]),
+    }
+    candidates["cached_attribute (__dict__)"].__dict__["processed_data"] = [1]
+    results = {}
+    for name, instance in candidates.items():
+        instance.processed_data  # Fill the cache
+        seconds = min(timeit.repeat("obj.processed_data", globals={"obj": instance}, number=number, repeat=3))
+        results[name] = seconds / number * 1e9
+    # The price of depends_on: reads of the tracked attribute go through a descriptor
+    for name, instance in (("plain attribute", Original()), ("depends_on attribute", ExpensiveComputation([1]))):
+        instance.data = [1]
+        seconds = min(timeit.repeat("obj.data", globals={"obj": instance}, number=number, repeat=3))
+        results[f"read .data ({name})"] = seconds / number * 1e9
+    return results
+
+
+def main():
+    """
+    Demonstration of cached_attribute
+    """
+    comp = ExpensiveComputation([1, 2, 3, 4, 5])
+    print(comp.processed_data)  # Computes and caches
+    print(comp.processed_data)  # Returns cached value
+    comp.data = [10, 20]        # Invalidates
+    print(comp.processed_data)  # Recomputes
+
+    # Eight threads read an uncached value at once: one computation
+    comp = ExpensiveComputation([1, 2, 3])
+    threads = [threading.Thread(target=lambda: comp.processed_data) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    slotted = SlottedComputation([1, 2, 3])
+    print("\nSlotted:", slotted.processed_data, "-> after data change:", end=" ")
+    slotted.data = [4]
+    print(slotted.processed_data)
+    print(f"Instance size: slots {sys.getsizeof(slotted)} bytes, "
+          f"dict-based {sys.getsizeof(comp) + sys.getsizeof(comp.__dict__)} bytes")
+
+    async def readers():
+        computation = AsyncComputation([1, 2, 3])
+        results = await asyncio.gather(*(computation.processed_data for _ in range(5)))
+        print("5 concurrent awaits:", results[0], "(computed once)")
+        computation.data = [7]
+        print("After data change:", await computation.processed_data)
+
+    print()
+    asyncio.run(readers())
+
+    print("\nRead cost of a cached value:")
+    for name, ns in benchmark().items():
+        print(f"{name:<32} {ns:6.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
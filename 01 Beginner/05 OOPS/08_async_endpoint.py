@@ -0,0 +1,409 @@
+"""
+Async APIEndpoint: Request Coalescing, Micro-batching and a TTL Cache
+
+`APIEndpoint.cache_result` in 03_decorators_code.md caches forever in a plain
+dict and is synchronous, so N concurrent requests for the same user_id make
+N backend calls. This is an asyncio version of the endpoint:
+
+1. Single-flight: concurrent get_user calls for the same user_id share one
+   in-flight lookup
+2. Micro-batching: distinct user_ids requested within a short window are
+   fetched with one backend call (GET /users?ids=1,2,3)
+3. TTL/LRU cache with stale-while-revalidate: a slightly stale value is
+   returned at once while one background refresh updates it
+4. A pooled keep-alive HTTP/1.1 client built on asyncio streams
+5. A local stub server and a load test reporting latency and QPS
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+################################################################## 1. Pooled HTTP client
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to one host, reused across requests.
+    At most `size` connections exist; extra requests wait for a free one.
+    """
+
+    def __init__(self, base_url: str, size: int = 10, timeout: float = 5.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _connection(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        self.connections_opened += 1
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def get(self, path: str) -> Tuple[int, bytes]:
+        """GET path; returns (status, body). Retries once on a connection the server closed."""
+        async with self._slots:
+            for attempt in (1, 2):
+                reader, writer = await self._connection()
+                try:
+                    writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+                    status, body, keep_alive = await asyncio.wait_for(_read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if attempt == 2:
+                        raise
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, body
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes, bool]:
+    status_line = await reader.readuntil(b"\r\n")
+    status = int(status_line.split()[1])
+    length, keep_alive = 0, True
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    return status, await reader.readexactly(length), keep_alive
+
+
+################################################################## 2. TTL/LRU cache with stale-while-revalidate
+class TTLCache:
+    """
+    LRU-bounded cache whose entries are fresh for `ttl` seconds and may be
+    served stale for another `stale_ttl` seconds while being refreshed.
+    """
+
+    FRESH, STALE, MISSING = "fresh", "stale", "missing"
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0, stale_ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[object, Tuple[object, float]]" = OrderedDict()
+
+    def get(self, key) -> Tuple[object, str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None, self.MISSING
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._data[key]
+            return None, self.MISSING
+        self._data.move_to_end(key)
+        return value, self.FRESH if age <= self.ttl else self.STALE
+
+    def set(self, key, value) -> None:
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+################################################################## 3. The endpoint
+class AsyncAPIEndpoint:
+    """
+    Async counterpart of APIEndpoint.
+
+    get_user(user_id=...) looks in the cache, joins an in-flight lookup for
+    the same id, or queues the id for the next batch. A batch is sent when
+    `max_batch` ids are waiting or `batch_window` seconds after the first one.
+    """
+
+    def __init__(self, base_url: str, ttl: float = 30.0, stale_ttl: float = 300.0, maxsize: int = 10_000,
+                 batch_window: float = 0.002, max_batch: int = 100, pool_size: int = 10):
+        self.base_url = base_url
+        self._cache = TTLCache(maxsize, ttl, stale_ttl)
+        self._pool = ConnectionPool(base_url, pool_size)
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self._pending: List[int] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = {"hits": 0, "stale_hits": 0, "coalesced": 0, "misses": 0, "backend_calls": 0}
+
+    @classmethod
+    def create_development(cls, **options):
+        return cls("http://api.dev.example.com", **options)
+
+    @classmethod
+    def create_production(cls, **options):
+        return cls("http://api.example.com", **options)
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._cache)
+
+    async def get_user(self, **params) -> dict:
+        if "user_id" not in params:
+            raise ValueError("Missing required parameter: user_id")
+        user_id = params["user_id"]
+        value, state = self._cache.get(user_id)
+        if state == TTLCache.FRESH:
+            self.stats["hits"] += 1
+            return value
+        if state == TTLCache.STALE:
+            self.stats["stale_hits"] += 1
+            if user_id not in self._in_flight:
+                self._lookup(user_id)  # Background refresh; this caller doesn't wait
+            return value
+        future = self._in_flight.get(user_id)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            future = self._lookup(user_id)
+        return await asyncio.shield(future)  # A cancelled caller must not cancel the shared lookup
+
+    def _lookup(self, user_id: int) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = self._in_flight[user_id] = loop.create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # Never "exception never retrieved"
+        self._pending.append(user_id)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._fetch_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_batch(self, user_ids: List[int]) -> None:
+        self.stats["backend_calls"] += 1
+        try:
+            status, body = await self._pool.get("/users?ids=" + ",".join(map(str, user_ids)))
+            if status != 200:
+                raise RuntimeError(f"backend returned HTTP {status}")
+            users = {user["id"]: user for user in json.loads(body)}
+        except BaseException as error:
+            # Cancellation (e.g. the loop shutting down) must not leave callers
+            # waiting on futures nobody will complete
+            for user_id in user_ids:
+                future = self._in_flight.pop(user_id, None)
+                if future is not None and not future.done():
+                    if isinstance(error, Exception):
+                        future.set_exception(error)
+                    else:
+                        future.cancel()
+            if not isinstance(error, Exception):
+                raise
+            return
+        for user_id in user_ids:
+            user = users.get(user_id)
+            future = self._in_flight.pop(user_id)
+            if user is None:
+                future.set_exception(KeyError(user_id))
+                continue
+            self._cache.set(user_id, user)
+            if not future.done():
+                future.set_result(user)
+
+    async def close(self) -> None:
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+################################################################## 4. Local stub server
+class StubUserServer:
+    """
+    Minimal keep-alive HTTP server: GET /users?ids=1,2 returns those users
+    as JSON after `latency` seconds, whatever the batch size.
+    """
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.requests = 0
+        self.users_served = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: set = set()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> "StubUserServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self) -> None:
+        """Stop accepting; wait for open connections to be closed by their clients"""
+        self._server.close()
+        await self._server.wait_closed()
+        if self._handlers:
+            await asyncio.wait(self._handlers, timeout=1.0)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request_line = await reader.readuntil(b"\r\n")
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                target = request_line.split()[1].decode()
+                self.requests += 1
+                ids = parse_qs(urlsplit(target).query).get("ids", [""])[0]
+                users = [{"id": int(i), "name": f"User {i}"} for i in ids.split(",") if i]
+                self.users_served += len(users)
+                await asyncio.sleep(self.latency)
+                body = json.dumps(users).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            self._handlers.discard(task)
+
+
+################################################################## 5. Load test
+async def _naive_get_user(pool: ConnectionPool, user_id: int) -> dict:
+    """What the synchronous endpoint does on a cache miss: one backend call per request"""
+    _, body = await pool.get(f"/users?ids={user_id}")
+    return json.loads(body)[0]
+
+
+async def _cached_get_user(pool: ConnectionPool, cache: TTLCache, user_id: int) -> dict:
+    """Cache in front of the naive call, but no coalescing: concurrent misses all go to the backend"""
+    value, state = cache.get(user_id)
+    if state == TTLCache.FRESH:
+        return value
+    user = await _naive_get_user(pool, user_id)
+    cache.set(user_id, user)
+    return user
+
+
+async def load_test(mode: str, clients: int = 200, requests_per_client: int = 20, users: int = 500,
+                    latency: float = 0.01, ttl: float = 30.0) -> Dict[str, float]:
+    """
+    `clients` concurrent tasks each request `requests_per_client` users
+    (skewed towards low ids). mode is "naive", "cached" (TTL cache without
+    coalescing) or "coalescing".
+    """
+    server = await StubUserServer(latency).start()
+    rng = random.Random(42)
+    workload = [[min(int(rng.paretovariate(1.2)), users) for _ in range(requests_per_client)]
+                for _ in range(clients)]
+    latencies: List[float] = []
+    pool = ConnectionPool(server.base_url, size=10)
+    cache = TTLCache(ttl=ttl)
+    endpoint = AsyncAPIEndpoint(server.base_url, ttl=ttl)
+
+    async def client(user_ids: List[int]) -> None:
+        for user_id in user_ids:
+            start = time.perf_counter()
+            if mode == "naive":
+                await _naive_get_user(pool, user_id)
+            elif mode == "cached":
+                await _cached_get_user(pool, cache, user_id)
+            else:
+                await endpoint.get_user(user_id=user_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(ids) for ids in workload))
+    elapsed = time.perf_counter() - start
+    await endpoint.close()
+    await pool.close()
+    await server.stop()
+    latencies.sort()
+    return {"qps": len(latencies) / elapsed, "p50_ms": statistics.median(latencies) * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000, "backend_calls": server.requests}
+
+
+async def demo() -> None:
+    server = await StubUserServer(latency=0.01).start()
+    async with AsyncAPIEndpoint(server.base_url, ttl=0.05, stale_ttl=1.0) as api:
+        # 100 concurrent requests for 3 users: one backend call
+        users = await asyncio.gather(*(api.get_user(user_id=i % 3) for i in range(100)))
+        print(users[:3])
+        print(f"100 concurrent get_user calls -> {server.requests} backend call(s), stats {api.stats}")
+
+        await asyncio.sleep(0.1)  # Entries are now stale: served at once, refreshed in the background
+        start = time.perf_counter()
+        await api.get_user(user_id=1)
+        print(f"Stale read took {(time.perf_counter() - start) * 1000:.2f} ms; "
+              f"backend calls now {server.requests} after the refresh starts")
+        await asyncio.sleep(0.05)
+        print(f"After refresh: backend calls {server.requests}, cache size {api.cache_size}")
+
+        try:
+            await api.get_user()
+        except ValueError as e:
+            print(e)
+    await server.stop()
+
+
+def main():
+    """
+    Demonstration of the coalescing endpoint and the load test against the stub server
+    """
+    asyncio.run(demo())
+
+    print("\n200 clients x 20 requests, 10 ms backend latency, 10 pooled connections")
+    print(f"{'mode':<12} {'QPS':>10} {'p50 ms':>8} {'p99 ms':>8} {'backend calls':>14}")
+    for mode in ("naive", "cached", "coalescing"):
+        result = asyncio.run(load_test(mode))
+        print(f"{mode:<12} {result['qps']:10.0f} {result['p50_ms']:8.3f} {result['p99_ms']:8.3f} "
+              f"{result['backend_calls']:14d}")
+
+
+if __name__ == "__main__":
+    main()
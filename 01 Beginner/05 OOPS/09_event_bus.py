@@ -0,0 +1,501 @@
+"""
+Batched Asynchronous Event Bus
+
+`Observable._notify_observers` in 03_advanced.md calls every observer's
+update() inline on each `state` assignment: one slow observer stalls the
+producer, producer cost grows with the number of observers, and every
+intermediate state is delivered even when only the latest one matters.
+
+This event bus decouples the two sides:
+
+1. publish() is O(1): it appends to the topic and, if needed, schedules one
+   dispatcher run; fan-out to subscribers happens off the producer's path
+2. Each subscriber has its own bounded mailbox: "latest" keeps only the newest
+   value (intermediate states are coalesced), "queue" keeps up to `maxsize`
+   values and drops the oldest when a slow subscriber falls behind
+3. Batch delivery: observers with update_batch(values) get everything
+   queued since their last run in one call
+4. Delivery runs on a thread pool or on an asyncio loop (async update()
+   methods are awaited); one subscriber's deliveries never overlap
+5. Observers are held by weak reference, so a dropped observer unsubscribes itself
+6. A benchmark of producer-side latency with 1 to 1000 observers
+"""
+
+import asyncio
+import threading
+import time
+import types
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, List, Optional
+
+_EMPTY = object()
+
+
+################################################################## 1. Subscriptions and mailboxes
+def _weak_reference(observer, callback) -> Callable:
+    """
+    Zero-argument callable returning the observer, or None once it is gone.
+    A bound method object dies right away, so it is tracked through its
+    instance; a builtin one (list.append) whose instance can't be weakly
+    referenced is kept alive instead.
+    """
+    if isinstance(observer, types.MethodType):
+        return weakref.WeakMethod(observer, callback)
+    owner = getattr(observer, "__self__", None)
+    if isinstance(observer, types.BuiltinMethodType) and owner is not None and not isinstance(owner, types.ModuleType):
+        try:
+            owner_ref = weakref.ref(owner, callback)
+        except TypeError:
+            return lambda: observer
+        name = observer.__name__
+        return lambda: None if (target := owner_ref()) is None else getattr(target, name)
+    return weakref.ref(observer, callback)
+
+
+class Subscription:
+    """
+    One subscriber's mailbox and delivery state.
+
+    policy="latest": only the newest undelivered value is kept
+    policy="queue":  up to maxsize values, oldest dropped when full
+    """
+
+    def __init__(self, bus: "EventBus", observer, policy: str, maxsize: int, weak: bool):
+        if policy not in ("latest", "queue"):
+            raise ValueError(f"Unknown policy {policy!r}, expected 'latest' or 'queue'")
+        self.bus = bus
+        self.policy = policy
+        self._latest = _EMPTY
+        self._queue: Deque = deque(maxlen=maxsize)
+        self._scheduled = False
+        self.delivered = 0
+        self.dropped = 0  # Values coalesced away or pushed out of a full queue
+        self.active = True
+        if weak:
+            # May run inside any allocation, even on a thread holding bus._lock:
+            # only flag and queue here, the bus prunes later under its lock
+            def on_collect(_ref, bus=bus):
+                self.active = False
+                bus._collected.append(self)
+            self._ref = _weak_reference(observer, on_collect)
+        else:
+            self._ref = lambda: observer
+
+    def _target(self):
+        """(callable, takes_batch) for the observer, or None if it was collected"""
+        observer = self._ref()
+        if observer is None:
+            return None
+        if hasattr(observer, "update_batch"):
+            return observer.update_batch, True
+        return getattr(observer, "update", observer), False
+
+    def offer(self, values: List) -> bool:
+        """Put values in the mailbox (dispatcher side); True if a delivery must be scheduled"""
+        with self.bus._lock:
+            if self.policy == "latest":
+                self.dropped += len(values) - (self._latest is _EMPTY)
+                self._latest = values[-1]
+            else:
+                overflow = len(self._queue) + len(values) - self._queue.maxlen
+                if overflow > 0:
+                    self.dropped += overflow
+                self._queue.extend(values)
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+
+    def take(self) -> List:
+        with self.bus._lock:
+            if self.policy == "latest":
+                values = [] if self._latest is _EMPTY else [self._latest]
+                self._latest = _EMPTY
+            else:
+                values = list(self._queue)
+                self._queue.clear()
+            if not values:
+                self._scheduled = False
+            return values
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.policy}, delivered={self.delivered}, dropped={self.dropped})"
+
+
+################################################################## 2. Execution backends
+class ThreadPoolBackend:
+    """
+    Runs dispatch and deliveries on a shared ThreadPoolExecutor. An async
+    update() is run to completion in the worker with asyncio.run().
+    """
+
+    def __init__(self, workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="event-bus")
+
+    def submit(self, job: Callable) -> None:
+        self._pool.submit(self._run, job)
+
+    @staticmethod
+    def _run(job: Callable) -> None:
+        result = job()
+        if asyncio.iscoroutine(result):  # A delivery returns the observer's coroutine
+            asyncio.run(result)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class AsyncioBackend:
+    """Runs dispatch and deliveries as tasks on an event loop (publish may come from any thread)"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self._tasks: set = set()
+
+    def submit(self, job: Callable) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._start(job)
+        else:
+            self.loop.call_soon_threadsafe(self._start, job)
+
+    def _start(self, job: Callable) -> None:
+        task = self.loop.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(job: Callable) -> None:
+        result = job()
+        while asyncio.iscoroutine(result):  # A delivery returns the observer's coroutine
+            result = await result
+
+    def close(self) -> None:
+        pass
+
+
+################################################################## 3. The bus
+class EventBus:
+    """
+    Fan-out of published values to subscribers, off the producer's path.
+
+    bus = EventBus()                      # thread pool
+    bus = EventBus(AsyncioBackend())      # inside a running loop
+    bus.subscribe(observer, policy="latest")
+    bus.publish(value)
+    bus.join()                            # wait until everything is delivered
+    """
+
+    def __init__(self, backend=None, log_size: int = 10_000):
+        self.backend = backend or ThreadPoolBackend()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._subscriptions: List[Subscription] = []  # Copy-on-write: the dispatcher iterates a snapshot
+        self._collected: Deque[Subscription] = deque()  # Appended by weakref callbacks, without the lock
+        self._async_waiters: List = []  # (loop, asyncio.Event) pairs from join_async()
+        self._log: Deque = deque(maxlen=log_size)
+        self._dispatch_scheduled = False
+        self._outstanding = 0  # Scheduled dispatcher runs + deliveries
+        self.published = 0
+        self.errors: Deque = deque(maxlen=100)
+
+    def subscribe(self, observer, policy: str = "latest", maxsize: int = 100, weak: bool = True) -> Subscription:
+        """
+        observer: an object with update(value) or update_batch(values), or a
+        callable. Pass weak=False for lambdas and other callables nothing else keeps alive.
+        """
+        subscription = Subscription(self, observer, policy, maxsize, weak)
+        with self._lock:
+            self._prune()
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscription.active = False
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def subscriptions(self) -> List[Subscription]:
+        with self._lock:
+            self._prune()
+            return list(self._subscriptions)
+
+    def _prune(self) -> None:
+        """Drop subscriptions whose observers were collected (caller holds the lock)"""
+        if self._collected:
+            self._collected.clear()
+            self._subscriptions = [s for s in self._subscriptions if s.active]
+
+    def publish(self, value) -> None:
+        """Record the value; at most one dispatcher run is pending at a time"""
+        with self._lock:
+            self._prune()
+            self._log.append(value)
+            self.published += 1
+            if self._dispatch_scheduled:
+                return
+            self._dispatch_scheduled = True
+            self._outstanding += 1
+        self.backend.submit(self._dispatch)
+
+    def _dispatch(self) -> None:
+        """Fan out until the log is empty; only one run at a time, so values stay in order"""
+        try:
+            while True:
+                with self._lock:
+                    if not self._log:
+                        self._dispatch_scheduled = False
+                        return
+                    values = list(self._log)
+                    self._log.clear()
+                    subscriptions = self._subscriptions
+                for subscription in subscriptions:
+                    if subscription.offer(values):
+                        with self._lock:
+                            self._outstanding += 1
+                        self.backend.submit(lambda s=subscription: self._deliver(s))
+        finally:
+            self._done()
+
+    def _deliver(self, subscription: Subscription):
+        values = subscription.take()
+        if not values or not subscription.active:
+            self._done()
+            return None
+        target = subscription._target()
+        if target is None:
+            subscription.take()
+            self._done()
+            return None
+        function, takes_batch = target
+        try:
+            result = function(values) if takes_batch else function(values[-1] if subscription.policy == "latest"
+                                                                    else values[0])
+            if not takes_batch and subscription.policy == "queue" and len(values) > 1:
+                result = self._deliver_rest(function, values[1:], result)
+        except Exception as error:
+            self.errors.append(error)
+            result = None
+        subscription.delivered += len(values) if takes_batch or subscription.policy == "queue" else 1
+        if asyncio.iscoroutine(result):
+            return self._finish_async(subscription, result)
+        self._again(subscription)
+        return None
+
+    @staticmethod
+    def _deliver_rest(function: Callable, values: List, first_result):
+        if asyncio.iscoroutine(first_result):
+            async def run_all():
+                await first_result
+                for value in values:
+                    result = function(value)
+                    if asyncio.iscoroutine(result):
+                        await result
+            return run_all()
+        for value in values:
+            function(value)
+        return None
+
+    async def _finish_async(self, subscription: Subscription, result) -> None:
+        try:
+            await result
+        except Exception as error:
+            self.errors.append(error)
+        self._again(subscription)
+
+    def _again(self, subscription: Subscription) -> None:
+        """Deliver whatever arrived meanwhile, or mark the subscriber idle"""
+        with self._lock:
+            more = subscription._latest is not _EMPTY or bool(subscription._queue)
+            if not more:
+                subscription._scheduled = False
+        if more:
+            with self._lock:
+                self._outstanding += 1
+            self.backend.submit(lambda: self._deliver(subscription))
+        self._done()
+
+    def _done(self) -> None:
+        waiters = ()
+        with self._lock:
+            self._outstanding -= 1
+            if not self._outstanding:
+                self._idle.notify_all()
+                waiters, self._async_waiters = self._async_waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Block until every published value is delivered (thread backend)"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._outstanding, timeout)
+
+    async def join_async(self) -> None:
+        """Wait until every published value is delivered (asyncio backend)"""
+        with self._lock:
+            if not self._outstanding:
+                return
+            event = asyncio.Event()
+            self._async_waiters.append((asyncio.get_running_loop(), event))
+        await event.wait()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+################################################################## 4. Observable on top of the bus
+class Observable:
+    """Drop-in for the 03_advanced.md Observable: `state = ...` publishes instead of calling observers inline"""
+
+    def __init__(self, bus: Optional[EventBus] = None):
+        self._bus = bus or EventBus()
+        self._subscriptions = {}
+        self._state = None
+
+    def attach(self, observer, policy: str = "latest", maxsize: int = 100) -> None:
+        # Entries of collected observers are dropped here, so ids can't pile up (or be reused stale)
+        self._subscriptions = {key: s for key, s in self._subscriptions.items() if s.active}
+        self._subscriptions[id(observer)] = self._bus.subscribe(observer, policy, maxsize)
+
+    def detach(self, observer) -> None:
+        self._bus.unsubscribe(self._subscriptions.pop(id(observer)))
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+        self._bus.publish(value)
+
+
+class Observer:
+    def __init__(self, name):
+        self.name = name
+        self.received = []
+
+    def update(self, state):
+        self.received.append(state)
+
+
+class BatchObserver(Observer):
+    def update_batch(self, states):
+        self.received.extend(states)
+
+
+class SlowObserver(Observer):
+    def update(self, state):
+        time.sleep(0.001)
+        self.received.append(state)
+
+
+################################################################## 5. Benchmark
+class _InlineObservable:
+    """The original synchronous Observable from 03_advanced.md"""
+
+    def __init__(self):
+        self._observers = []
+        self._state = None
+
+    def attach(self, observer):
+        self._observers.append(observer)
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+        for observer in self._observers:
+            observer.update(self._state)
+
+
+def benchmark(observer_counts=(1, 10, 100, 1000), updates: int = 2000) -> List[dict]:
+    """Producer-side microseconds per `state = ...` assignment"""
+    rows = []
+    for count in observer_counts:
+        row = {"observers": count}
+        for name in ("inline", "bus latest", "bus queue"):
+            observers = [Observer(f"o{i}") for i in range(count)]
+            if name == "inline":
+                subject = _InlineObservable()
+                for observer in observers:
+                    subject.attach(observer)
+            else:
+                bus = EventBus()
+                subject = Observable(bus)
+                for observer in observers:
+                    subject.attach(observer, policy=name.split()[1], maxsize=updates)
+            start = time.perf_counter()
+            for i in range(updates):
+                subject.state = i
+            row[name] = (time.perf_counter() - start) / updates * 1e6
+            if name != "inline":
+                bus.join()
+                assert all(observer.received[-1] == updates - 1 for observer in observers)
+                row[f"{name} deliveries/observer"] = sum(len(o.received) for o in observers) / count
+                bus.close()
+        rows.append(row)
+    return rows
+
+
+def main():
+    """
+    Demonstration of the event bus
+    """
+    bus = EventBus()
+    subject = Observable(bus)
+    fast, batch, slow = Observer("fast"), BatchObserver("batch"), SlowObserver("slow")
+    subject.attach(fast, policy="queue", maxsize=1000)
+    subject.attach(batch, policy="queue", maxsize=1000)
+    subject.attach(slow, policy="latest")
+
+    start = time.perf_counter()
+    for i in range(500):
+        subject.state = i
+    produced_ms = (time.perf_counter() - start) * 1000
+    bus.join()
+    print(f"500 updates published in {produced_ms:.1f} ms (a 1 ms observer inline would take 500 ms)")
+    for observer in (fast, batch, slow):
+        print(f"  {observer.name:<6} got {len(observer.received):3d} values, last = {observer.received[-1]}")
+
+    # Weak references: a dropped observer unsubscribes itself
+    temporary = Observer("temporary")
+    subject.attach(temporary)
+    del temporary
+    print("Subscriptions after dropping an observer:", len(bus.subscriptions()))
+    bus.close()
+
+    # Async observers on an asyncio loop
+    class AsyncObserver(Observer):
+        async def update(self, state):
+            await asyncio.sleep(0.001)
+            self.received.append(state)
+
+    async def run_async():
+        async_bus = EventBus(AsyncioBackend())
+        observer = AsyncObserver("async")
+        async_bus.subscribe(observer, policy="latest")
+        for i in range(100):
+            async_bus.publish(i)
+            await asyncio.sleep(0)
+        await async_bus.join_async()
+        print(f"Async observer got {len(observer.received)} of 100 values, last = {observer.received[-1]}")
+
+    asyncio.run(run_async())
+
+    print(f"\n{'observers':>9} {'inline us':>10} {'latest us':>10} {'queue us':>9} {'latest deliveries':>18}")
+    for row in benchmark():
+        print(f"{row['observers']:9d} {row['inline']:10.2f} {row['bus latest']:10.2f} {row['bus queue']:9.2f} "
+              f"{row['bus latest deliveries/observer']:18.1f}")
+
+
+if __name__ == "__main__":
+    main()
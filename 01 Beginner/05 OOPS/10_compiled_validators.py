@@ -0,0 +1,432 @@
+"""
+Code-generated Validators
+
+`ValidatedDescriptor.__set__` (03_advanced.md) re-reads minimum/maximum and
+tests them against None on every assignment, and `validate_types`
+(03_decorators_code.md) walks zip(args, expected_types) and kwargs.items()
+on every call. Here each constraint spec is compiled once, with exec, into
+specialised straight-line Python:
+
+1. ValidatedDescriptor: every field gets its own generated setter with the
+   bounds inlined as constants, which __set__ calls. Assignment costs about
+   the same as the original (the dispatch call eats the saved attribute
+   reads); the gains are validate_types and validate_many
+2. validate_types: the wrapper is generated with the function's own
+   signature, so Python binds the arguments and each check is one isinstance()
+3. validate_many(cls, records): one generated loop validating a batch of
+   dicts and returning every problem instead of stopping at the first
+4. set_validation(False) / validation_disabled(): for trusted pipelines,
+   every descriptor switches to its generated unchecked setter and every
+   wrapper skips its checks; `descriptor.enabled = False` does the same for
+   one field
+5. Before/after overhead benchmarks
+"""
+
+import contextlib
+import functools
+import inspect
+import math
+import timeit
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+################################################################## 1. The global switch
+class _Toggle:
+    """Switches one compiled validator between its checked and unchecked form"""
+
+    def __init__(self, apply: Callable[[bool], None]):
+        self.apply = apply
+
+
+_TOGGLES: "weakref.WeakSet[_Toggle]" = weakref.WeakSet()
+# class -> {name: ValidatedDescriptor}, for validate_many
+_FIELDS: "weakref.WeakKeyDictionary[type, Dict]" = weakref.WeakKeyDictionary()
+_enabled = True
+
+
+def set_validation(enabled: bool) -> None:
+    """Turn every compiled validator on or off (existing and future ones)"""
+    global _enabled
+    _enabled = enabled
+    for toggle in list(_TOGGLES):
+        toggle.apply(enabled)
+
+
+def validation_is_enabled() -> bool:
+    return _enabled
+
+
+@contextlib.contextmanager
+def validation_disabled():
+    previous = _enabled
+    set_validation(False)
+    try:
+        yield
+    finally:
+        set_validation(previous)
+
+
+def _register(apply: Callable[[bool], None]) -> _Toggle:
+    toggle = _Toggle(apply)
+    _TOGGLES.add(toggle)
+    apply(_enabled)
+    return toggle
+
+
+def _constant(value, namespace: Dict, name: str) -> str:
+    """Source text for a value: an inlined literal for plain numbers, else a namespace name"""
+    if type(value) in (int, float) and math.isfinite(value):
+        return repr(value)
+    namespace[name] = value
+    return name
+
+
+def _compile(source: str, namespace: Dict, filename: str) -> Dict:
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace
+
+
+################################################################## 2. ValidatedDescriptor
+class ValidatedDescriptor:
+    """
+    Range (and optional type) checked attribute.
+
+    age = ValidatedDescriptor(minimum=0, maximum=150)
+    ratio = ValidatedDescriptor(minimum=0.0, maximum=1.0, expected_type=float)
+
+    Reading a field that was never assigned returns None, as before.
+    `enabled` switches this one field's checks; they run only while it and
+    the global switch are both on.
+    """
+
+    def __init__(self, minimum=None, maximum=None, expected_type: Optional[type] = None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.expected_type = expected_type
+        self.name: Optional[str] = None
+        self.source = ""
+        self._enabled = True
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self._checked, self._unchecked = self._generate()
+        _FIELDS.setdefault(owner, {})[name] = self
+        self._toggle = _register(self._apply)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name)
+
+    def __set__(self, instance, value):
+        self._set(instance, value)  # The generated setter currently in use
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self._enabled = bool(value)
+        if self.name is not None:
+            self._apply(_enabled)
+
+    def _apply(self, on: bool) -> None:
+        self._set = self._checked if on and self._enabled else self._unchecked
+
+    def checks(self, value_name: str, namespace: Dict) -> List[Tuple[str, str, str]]:
+        """(condition, exception, message) triples that reject `value_name`"""
+        checks = []
+        if self.expected_type is not None:
+            namespace[f"_type_{self.name}"] = self.expected_type
+            checks.append((f"not isinstance({value_name}, _type_{self.name})", "TypeError",
+                           f"{self.name} must be {self.expected_type.__name__}"))
+        if self.minimum is not None:
+            minimum = _constant(self.minimum, namespace, f"_min_{self.name}")
+            checks.append((f"{value_name} < {minimum}", "ValueError",
+                           f"{self.name} cannot be less than {self.minimum}"))
+        if self.maximum is not None:
+            maximum = _constant(self.maximum, namespace, f"_max_{self.name}")
+            checks.append((f"{value_name} > {maximum}", "ValueError",
+                           f"{self.name} cannot be greater than {self.maximum}"))
+        return checks
+
+    def _generate(self):
+        """(checked setter, unchecked setter), both called as setter(instance, value)"""
+        namespace: Dict = {}
+        lines = ["def set_checked(instance, value):"]
+        for condition, exception, message in self.checks("value", namespace):
+            lines.append(f"    if {condition}: raise {exception}({message!r})")
+        store = f"    instance.__dict__[{self.name!r}] = value"
+        lines.append(store)
+        self.source = "\n".join(lines)
+        source = "\n".join([self.source, "", "def set_unchecked(instance, value):", store])
+        namespace = _compile(source, namespace, f"<validator {self.name}>")
+        return namespace["set_checked"], namespace["set_unchecked"]
+
+
+################################################################## 3. Bulk validation of records
+_RECORD_VALIDATORS: "weakref.WeakKeyDictionary[type, Callable]" = weakref.WeakKeyDictionary()
+
+
+def _fields(cls: type) -> Dict[str, ValidatedDescriptor]:
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        fields.update(_FIELDS.get(klass, {}))
+    return fields
+
+
+def compile_record_validator(cls: type) -> Callable[[Iterable[dict]], List[Tuple[int, str, str]]]:
+    """Generate validate(records) -> [(index, field, message), ...] for cls's ValidatedDescriptors"""
+    namespace: Dict = {"_MISSING": _MISSING}
+    lines = ["def validate_many(records):",
+             "    errors = []",
+             "    append = errors.append",
+             "    for index, record in enumerate(records):",
+             "        get = record.get"]
+    for name, field in _fields(cls).items():
+        variable = f"v_{name}"
+        lines += [f"        {variable} = get({name!r}, _MISSING)",
+                  f"        if {variable} is _MISSING:",
+                  f"            append((index, {name!r}, 'missing'))"]
+        for condition, _, message in field.checks(variable, namespace):
+            lines += [f"        elif {condition}:",
+                      f"            append((index, {name!r}, {message!r}))"]
+    lines.append("    return errors")
+    source = "\n".join(lines)
+    validate = _compile(source, namespace, f"<validate_many {cls.__name__}>")["validate_many"]
+    validate.source = source
+    return validate
+
+
+def validate_many(cls: type, records: Iterable[dict]) -> List[Tuple[int, str, str]]:
+    """
+    Check a batch of dicts against cls's fields; returns every problem as
+    (record index, field, message). Always checks, even when validation is
+    disabled: it is called explicitly.
+    """
+    validator = _RECORD_VALIDATORS.get(cls)
+    if validator is None:
+        validator = _RECORD_VALIDATORS[cls] = compile_record_validator(cls)
+    return validator(records)
+
+
+################################################################## 4. validate_types
+def validate_types(**expected_types):
+    """
+    Check argument types by parameter name. The wrapper is generated with
+    the wrapped function's signature; a parameter left at its default is
+    not checked (so `x: int = None` style defaults keep working).
+    The wrapper's own globals start with _vt_, which parameters may not.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        unknown = set(expected_types) - set(signature.parameters)
+        if unknown:
+            raise TypeError(f"validate_types: {func.__qualname__} has no parameter(s) {sorted(unknown)}")
+        reserved = [name for name in signature.parameters if name.startswith("_vt_")]
+        if reserved:
+            raise TypeError(f"validate_types: parameter names starting with '_vt_' are reserved: {reserved}")
+        namespace: Dict = {"_vt_func": func, "_vt_on": True}
+        parameters, call, checks = [], [], []
+        keyword_only_started = False
+        ordered = list(signature.parameters.values())
+        for index, parameter in enumerate(ordered):
+            name = parameter.name
+            text = name
+            if parameter.default is not parameter.empty:
+                namespace[f"_vt_default_{name}"] = parameter.default
+                text += f"=_vt_default_{name}"
+            if parameter.kind is parameter.VAR_POSITIONAL:
+                parameters.append(f"*{name}")
+                call.append(f"*{name}")
+                keyword_only_started = True
+                continue
+            if parameter.kind is parameter.VAR_KEYWORD:
+                parameters.append(f"**{name}")
+                call.append(f"**{name}")
+                continue
+            if parameter.kind is parameter.KEYWORD_ONLY:
+                if not keyword_only_started:
+                    parameters.append("*")
+                    keyword_only_started = True
+                call.append(f"{name}={name}")
+            else:
+                call.append(name)
+            parameters.append(text)
+            if parameter.kind is parameter.POSITIONAL_ONLY and (
+                    index + 1 == len(ordered) or ordered[index + 1].kind is not parameter.POSITIONAL_ONLY):
+                parameters.append("/")
+            if name in expected_types:
+                namespace[f"_vt_type_{name}"] = expected_types[name]
+                condition = f"not isinstance({name}, _vt_type_{name})"
+                if parameter.default is not parameter.empty:
+                    condition += f" and {name} is not _vt_default_{name}"
+                message = f"Expected {expected_types[name]} for {name}, got "
+                checks.append(f"        if {condition}:\n"
+                              f"            raise TypeError({message!r} + str(type({name})))")
+        header = f"({', '.join(parameters)})"
+        if checks:  # _vt_on is a global of the generated code: one dict lookup when switched off
+            checks.insert(0, "    if _vt_on:")
+        source = "\n".join([f"def wrapper{header}:", *checks, f"    return _vt_func({', '.join(call)})"])
+        wrapper = _compile(source, namespace, f"<validate_types {func.__qualname__}>")["wrapper"]
+        functools.update_wrapper(wrapper, func)
+        wrapper.source = source
+
+        def apply(on: bool) -> None:
+            namespace["_vt_on"] = on
+
+        wrapper._validation_toggle = _register(apply)
+        return wrapper
+    return decorator
+
+
+################################################################## 5. Benchmarks
+class _OriginalDescriptor:
+    """ValidatedDescriptor as written in 03_advanced.md"""
+
+    def __init__(self, minimum=None, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name)
+
+    def __set__(self, instance, value):
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name} cannot be less than {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name} cannot be greater than {self.maximum}")
+        instance.__dict__[self.name] = value
+
+
+def _original_validate_types(**expected_types):
+    """validate_types as written in 03_decorators_code.md"""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            for arg, expected_type in zip(args[1:], expected_types.values()):
+                if not isinstance(arg, expected_type):
+                    raise TypeError(f"Expected {expected_type}, got {type(arg)}")
+            for arg_name, arg_value in kwargs.items():
+                if arg_name in expected_types:
+                    expected_type = expected_types[arg_name]
+                    if not isinstance(arg_value, expected_type):
+                        raise TypeError(f"Expected {expected_type} for {arg_name}, got {type(arg_value)}")
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Person:
+    age = ValidatedDescriptor(minimum=0, maximum=150)
+    height = ValidatedDescriptor(minimum=0, maximum=300)
+
+    def __init__(self, name="", age=0):
+        self.name = name
+        self.age = age
+
+    @validate_types(name=str, age=int)
+    def update_info(self, name, age):
+        self.name = name
+        self.age = age
+
+
+def _ns(statement: str, namespace: Dict, number: int) -> float:
+    return min(timeit.repeat(statement, globals=namespace, number=number, repeat=5)) / number * 1e9
+
+
+def benchmark(number: int = 300_000, records: int = 100_000) -> Dict[str, float]:
+    """Nanoseconds per operation"""
+    class OriginalPerson:
+        age = _OriginalDescriptor(minimum=0, maximum=150)
+
+        @_original_validate_types(name=str, age=int)
+        def update_info(self, name, age):
+            pass
+
+    class PlainPerson:
+        def update_info(self, name, age):
+            pass
+
+    class UpdateOnly:
+        @validate_types(name=str, age=int)
+        def update_info(self, name, age):
+            pass
+
+    original, plain, compiled, update_only = OriginalPerson(), PlainPerson(), Person(), UpdateOnly()
+    original.age = plain.age = compiled.age = 30
+    results = {
+        "set: plain attribute": _ns("o.age = 30", {"o": plain}, number),
+        "set: original descriptor": _ns("o.age = 30", {"o": original}, number),
+        "set: compiled descriptor": _ns("o.age = 30", {"o": compiled}, number),
+        "get: plain attribute": _ns("o.age", {"o": plain}, number),
+        "get: original descriptor": _ns("o.age", {"o": original}, number),
+        "get: compiled descriptor": _ns("o.age", {"o": compiled}, number),
+        "call: undecorated": _ns("o.update_info('Jane', 25)", {"o": plain}, number),
+        "call: original validate_types": _ns("o.update_info('Jane', 25)", {"o": original}, number),
+        "call: compiled validate_types": _ns("o.update_info('Jane', 25)", {"o": update_only}, number),
+    }
+    with validation_disabled():
+        results["set: compiled, validation off"] = _ns("o.age = 30", {"o": compiled}, number)
+        results["call: compiled, validation off"] = _ns("o.update_info('Jane', 25)", {"o": update_only}, number)
+
+    batch = [{"age": i % 200, "height": i % 250} for i in range(records)]
+
+    def one_by_one():
+        errors = []
+        target = OriginalPerson()
+        for index, record in enumerate(batch):
+            try:
+                target.age = record["age"]
+            except ValueError as error:
+                errors.append((index, "age", str(error)))
+        return errors
+
+    results["bulk: original descriptor per record"] = _ns("f()", {"f": one_by_one}, 1) / records
+    results["bulk: validate_many per record"] = _ns("f(Person, batch)", {"f": validate_many, "Person": Person,
+                                                                         "batch": batch}, 1) / records
+    return results
+
+
+def main():
+    """
+    Demonstration of the compiled validators
+    """
+    person = Person("John", 30)
+    person.age = 25  # OK
+    try:
+        person.age = -1  # Raises ValueError
+    except ValueError as e:
+        print(e)
+    person.update_info("Jane", 25)  # Works
+    try:
+        person.update_info("Jane", "25")  # Raises TypeError
+    except TypeError as e:
+        print(e)
+
+    print("\nGenerated setter:\n" + Person.__dict__["age"].source)
+    print("\nGenerated wrapper:\n" + Person.update_info.source)
+
+    errors = validate_many(Person, [{"age": 30, "height": 180}, {"age": -5, "height": 170}, {"height": 400}])
+    print("\nvalidate_many:", errors)
+
+    with validation_disabled():
+        person.age = -1  # Trusted pipeline: not checked
+    print("Assigned with validation off:", person.age)
+
+    print()
+    for name, ns in benchmark().items():
+        print(f"{name:<40} {ns:7.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
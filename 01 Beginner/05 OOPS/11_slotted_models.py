@@ -0,0 +1,244 @@
+"""
+Slotted Model Factory with Generated Methods
+
+`create_model` in 03_advanced.md builds classes whose __init__ loops over
+`fields` calling setattr(self, field, kwargs.get(field)), and every
+instance carries a __dict__. For tens of millions of UserModel instances
+both the construction loop and the per-instance dict add up. This factory:
+
+1. Emits __slots__ (no per-instance __dict__)
+2. Generates a specialised __init__, __repr__ and __eq__ with exec, one
+   straight-line statement per field
+3. storage="tuple": instances are tuple subclasses with read-only field
+   properties - immutable and hashable, with C-level __eq__/__hash__ and
+   the fastest bulk construction from existing tuples
+4. from_rows(iterable): bulk construction from row tuples that skips the
+   __init__ call per record
+5. Memory-per-instance and construction-rate benchmarks against the current
+   factory and dataclass(slots=True)
+"""
+
+import dataclasses
+import gc
+import keyword
+import operator
+import time
+import tracemalloc
+from typing import Dict, Optional, Sequence, Tuple
+
+
+class ValidationMixin:
+    __slots__ = ()  # Without this every model instance would get a __dict__ back
+
+    def validate(self):
+        return all(hasattr(self, attr) for attr in self.required_attrs)
+
+
+################################################################## 1. Code generation helpers
+# Names the generated methods and the class itself already use
+_RESERVED = frozenset({"self", "cls", "other", "obj", "row", "rows", "new", "result", "append",
+                       "_tuple_new", "_tuple_eq", "required_attrs", "_fields", "from_rows", "validate"})
+
+
+def _check_fields(fields: Sequence[str]) -> Tuple[str, ...]:
+    fields = tuple(fields)
+    for field in fields:
+        if not isinstance(field, str) or not field.isidentifier() or field.startswith("__"):
+            raise ValueError(f"Invalid field name: {field!r}")
+        if keyword.iskeyword(field):
+            raise ValueError(f"Field name {field!r} is a Python keyword")
+        if field in _RESERVED or field.startswith("_default_"):
+            raise ValueError(f"Field name {field!r} is reserved by create_model")
+    if len(set(fields)) != len(fields):
+        raise ValueError(f"Duplicate field names in {fields}")
+    return fields
+
+
+def _build(source: str, namespace: Dict, name: str) -> Dict:
+    exec(compile(source, f"<create_model {name}>", "exec"), namespace)
+    return namespace
+
+
+def _repr_source(name: str, fields: Sequence[str]) -> str:
+    parts = ", ".join(f"{field}={{self.{field}!r}}" for field in fields)
+    return f"def __repr__(self):\n    return f'{name}({parts})'\n"
+
+
+################################################################## 2. The factory
+def create_model(name: str, fields: Sequence[str], bases: Tuple[type, ...] = (object,), storage: str = "slots",
+                 defaults: Optional[Dict[str, object]] = None) -> type:
+    """
+    Build a record class.
+
+    storage="slots": mutable, one slot per field
+    storage="tuple": immutable tuple subclass, fields are read-only properties
+
+    Fields missing from the constructor call default to None, like
+    kwargs.get() in the original factory, unless `defaults` says otherwise.
+    `object` is dropped from `bases` (placing it before the mixin is what
+    makes the original raise "Cannot create a consistent MRO").
+    The generated code is kept in the class attribute __source__.
+    """
+    if not isinstance(name, str) or not name.isidentifier() or keyword.iskeyword(name):
+        raise ValueError(f"Invalid model name: {name!r}")  # It is pasted into the generated __repr__
+    fields = _check_fields(fields)
+    defaults = defaults or {}
+    namespace: Dict[str, object] = {"__builtins__": __builtins__}
+    signature = []
+    for field in fields:
+        namespace[f"_default_{field}"] = defaults.get(field)
+        signature.append(f"{field}=_default_{field}")
+    signature = ", ".join(signature)
+    values = ", ".join(fields) + ("," if len(fields) == 1 else "")
+    row_length_error = f"{name} rows must have {len(fields)} values"
+
+    if storage == "slots":
+        init = f"def __init__(self, {signature}):\n" + "".join(f"    self.{f} = {f}\n" for f in fields)
+        if not fields:
+            init += "    pass\n"
+        mine = " and ".join(f"self.{f} == other.{f}" for f in fields) or "True"
+        eq = (f"def __eq__(self, other):\n"
+              f"    if other.__class__ is self.__class__:\n"
+              f"        return {mine}\n"
+              f"    return NotImplemented\n")
+        targets = ", ".join(f"obj.{f}" for f in fields)
+        from_rows = (f"def from_rows(cls, rows):\n"
+                     f"    new = object.__new__\n"
+                     f"    result = []\n"
+                     f"    append = result.append\n"
+                     f"    for row in rows:\n"
+                     f"        obj = new(cls)\n"
+                     f"        {targets}{',' if len(fields) == 1 else ''} = row\n"
+                     f"        append(obj)\n"
+                     f"    return result\n") if fields else "def from_rows(cls, rows):\n    return [cls() for _ in rows]\n"
+        source = "\n".join([init, _repr_source(name, fields), eq, from_rows])
+        namespace = _build(source, namespace, name)
+        class_dict = {"__slots__": fields, "__init__": namespace["__init__"]}
+        bases = tuple(base for base in bases if base is not object) or ()
+    elif storage == "tuple":
+        namespace["_tuple_new"] = tuple.__new__
+        new = (f"def __new__(cls, {signature}):\n"
+               f"    return _tuple_new(cls, ({values}))\n")
+        eq = ("def __eq__(self, other):\n"
+              "    if other.__class__ is self.__class__:\n"
+              "        return _tuple_eq(self, other)\n"
+              "    return NotImplemented\n")
+        namespace["_tuple_eq"] = tuple.__eq__
+        from_rows = (f"def from_rows(cls, rows):\n"
+                     f"    result = [_tuple_new(cls, row) for row in rows]\n"
+                     f"    for obj in result:\n"
+                     f"        if len(obj) != {len(fields)}:\n"
+                     f"            raise ValueError({row_length_error!r})\n"
+                     f"    return result\n")
+        source = "\n".join([new, _repr_source(name, fields), eq, from_rows])
+        namespace = _build(source, namespace, name)
+        class_dict = {"__slots__": (), "__new__": namespace["__new__"],
+                      "__getnewargs__": lambda self: tuple(self)}
+        for index, field in enumerate(fields):
+            class_dict[field] = property(operator.itemgetter(index), doc=f"Field {index}: {field}")
+        bases = (tuple,) + tuple(base for base in bases if base is not object)
+    else:
+        raise ValueError(f"Unknown storage {storage!r}, expected 'slots' or 'tuple'")
+
+    class_dict.update({
+        "required_attrs": list(fields),
+        "_fields": fields,
+        "__repr__": namespace["__repr__"],
+        "__eq__": namespace["__eq__"],
+        "__hash__": None if storage == "slots" else tuple.__hash__,
+        "from_rows": classmethod(namespace["from_rows"]),
+        "__source__": source,
+    })
+    return type(name, bases + (ValidationMixin,), class_dict)
+
+
+################################################################## 3. Benchmarks
+def _original_create_model(name, fields, bases=(object,)):
+    """create_model as written in 03_advanced.md"""
+    class OriginalValidationMixin:
+        def validate(self):
+            return all(hasattr(self, attr) for attr in self.required_attrs)
+
+    def __init__(self, **kwargs):
+        for field in fields:
+            setattr(self, field, kwargs.get(field))
+
+    return type(name, bases + (OriginalValidationMixin,), {"__init__": __init__, "required_attrs": fields})
+
+
+def _candidates() -> Dict[str, type]:
+    @dataclasses.dataclass(slots=True)
+    class DataclassUser:
+        name: Optional[str] = None
+        email: Optional[str] = None
+        age: Optional[int] = None
+
+    fields = ["name", "email", "age"]
+    return {
+        # bases=(): the default (object,) + (ValidationMixin,) is not a consistent MRO
+        "original create_model": _original_create_model("User", fields, bases=()),
+        "dataclass(slots=True)": DataclassUser,
+        "create_model (slots)": create_model("User", fields),
+        "create_model (tuple)": create_model("User", fields, storage="tuple"),
+    }
+
+
+def bytes_per_instance(cls: type, count: int = 100_000) -> float:
+    rows = [(f"user{i}", f"user{i}@example.com", i) for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls(name=n, email=e, age=a) for n, e, a in rows]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    list_overhead = objects.__sizeof__()
+    del objects
+    return (used - list_overhead) / count
+
+
+def construction_rate(cls: type, count: int = 300_000) -> Dict[str, float]:
+    """Instances per second for keyword, positional and bulk construction"""
+    rows = [(f"user{i}", f"user{i}@example.com", i) for i in range(count)]
+    rates = {}
+    start = time.perf_counter()
+    [cls(name=n, email=e, age=a) for n, e, a in rows]
+    rates["kwargs"] = count / (time.perf_counter() - start)
+    if hasattr(cls, "__dataclass_fields__") or hasattr(cls, "from_rows"):
+        start = time.perf_counter()
+        [cls(*row) for row in rows]
+        rates["positional"] = count / (time.perf_counter() - start)
+    if hasattr(cls, "from_rows"):
+        start = time.perf_counter()
+        cls.from_rows(rows)
+        rates["from_rows"] = count / (time.perf_counter() - start)
+    return rates
+
+
+def main():
+    """
+    Demonstration of the slotted model factory
+    """
+    UserModel = create_model("User", ["name", "email", "age"])
+    user = UserModel(name="John", email="john@example.com", age=30)
+    print(user, user.validate())  # Output: ... True
+    print("Has __dict__:", hasattr(user, "__dict__"))
+    print(user == UserModel("John", "john@example.com", 30))
+    print(UserModel.from_rows([("Ann", "ann@example.com", 41), ("Bob", "bob@example.com", 25)]))
+
+    FrozenUser = create_model("FrozenUser", ["name", "email", "age"], storage="tuple")
+    frozen = FrozenUser(name="Jane", age=25)
+    print(frozen, frozen.age, {frozen: "hashable"})
+
+    print("\nGenerated code:\n" + UserModel.__source__)
+
+    print(f"{'class':<24} {'bytes/instance':>15} {'kwargs/s':>12} {'positional/s':>13} {'from_rows/s':>12}")
+    for name, cls in _candidates().items():
+        memory = bytes_per_instance(cls)
+        rates = construction_rate(cls)
+        positional = f"{rates['positional'] / 1e6:11.2f} M" if "positional" in rates else f"{'-':>13}"
+        bulk = f"{rates['from_rows'] / 1e6:10.2f} M" if "from_rows" in rates else f"{'-':>12}"
+        print(f"{name:<24} {memory:15.1f} {rates['kwargs'] / 1e6:10.2f} M {positional} {bulk}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Streaming Serialization with Cached Field Plans
+
+`SerializeMixin.to_json` in 03_advanced.md rebuilds a filtered dict from
+self.__dict__ (a startswith('_') test per key) and calls json.dumps once per
+object. Exporting millions of User objects is then dominated by per-object
+overhead. This module:
+
+1. Works out each class's public fields once (a "field plan") and reads
+   them with one C-level operator.attrgetter call per object
+2. Supports plain classes, __slots__ classes and dataclasses
+3. Streams many objects into buffered JSON Lines or CSV with one reused
+   encoder, optionally compressed (gzip, bz2, xz - chosen from the suffix)
+4. Reads files back lazily, one record at a time, as dicts or rebuilt
+   objects (without calling __init__, so no side effects like logging)
+5. A benchmark against to_json() per object
+"""
+
+import bz2
+import csv
+import dataclasses
+import gzip
+import io
+import itertools
+import json
+import lzma
+import operator
+import os
+import tempfile
+import time
+import weakref
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+COMPRESSORS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+DEFAULT_BUFFER = 1 << 20  # 1 MiB of encoded text per write
+
+
+################################################################## 1. Field plans
+class FieldPlan:
+    """
+    The public fields of one class and a fast way to read and restore them.
+
+    Fields come from, in order of preference: a `__serialize_fields__`
+    attribute, dataclass fields, __slots__ across the MRO, or the public
+    keys of the first instance's __dict__ (checked per object, since plain
+    instances may grow attributes later) after any inherited slots it has set.
+    """
+
+    def __init__(self, cls: type, fields: Tuple[str, ...], dynamic: bool, all_keys: frozenset = frozenset()):
+        self._cls = weakref.ref(cls)  # Plans are cached per class and must not keep the class alive
+        self.fields = fields
+        self.dynamic = dynamic
+        self.all_keys = all_keys  # Dynamic plans: every __dict__ key (private too) of the first instance
+        self.slots = frozenset(_slot_names(cls))
+        self._dynamic_slots = tuple(field for field in fields if field in self.slots) if dynamic else ()
+        self.values: Callable[[object], tuple] = (operator.attrgetter(*fields) if len(fields) > 1
+                                                  else (lambda obj, get=operator.attrgetter(*fields): (get(obj),))
+                                                  if fields else (lambda obj: ()))
+
+    @property
+    def cls(self) -> type:
+        return self._cls()
+
+    def matches(self, obj) -> bool:
+        """Can the plan be used for this object? (A C-level keys comparison for dynamic plans)"""
+        return (type(obj) is self._cls() and (not self.dynamic or obj.__dict__.keys() == self.all_keys)
+                and all(hasattr(obj, name) for name in self._dynamic_slots))
+
+    def to_dict(self, obj) -> dict:
+        if self.dynamic and not self.matches(obj):
+            return _public_attributes(obj)
+        return dict(zip(self.fields, self.values(obj)))
+
+    def build(self, data: dict):
+        """Rebuild an instance from a dict without running __init__"""
+        obj = object.__new__(self.cls)
+        if hasattr(obj, "__dict__"):
+            obj.__dict__.update({key: value for key, value in data.items() if key not in self.slots})
+            data = {key: value for key, value in data.items() if key in self.slots}
+        for key, value in data.items():
+            setattr(obj, key, value)
+        return obj
+
+
+_PLANS: "weakref.WeakKeyDictionary[type, FieldPlan]" = weakref.WeakKeyDictionary()
+
+
+def _public_attributes(obj) -> dict:
+    """Set public slots (inherited ones included) followed by public __dict__ entries"""
+    result = {name: getattr(obj, name) for name in _slot_names(type(obj)) if hasattr(obj, name)}
+    result.update((key, value) for key, value in obj.__dict__.items() if not key.startswith("_"))
+    return result
+
+
+def _slot_names(cls: type) -> List[str]:
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and not name.startswith("_") and name not in names:
+                names.append(name)
+    return names
+
+
+def field_plan(obj_or_cls) -> FieldPlan:
+    """The cached plan for an object's class (built from `obj` if it is an instance)"""
+    cls = obj_or_cls if isinstance(obj_or_cls, type) else type(obj_or_cls)
+    plan = _PLANS.get(cls)
+    if plan is not None:
+        return plan
+    dynamic = False
+    if hasattr(cls, "__serialize_fields__"):
+        fields = tuple(cls.__serialize_fields__)
+    elif dataclasses.is_dataclass(cls):
+        fields = tuple(f.name for f in dataclasses.fields(cls) if not f.name.startswith("_"))
+    elif not _has_dict(cls):
+        fields = tuple(_slot_names(cls))
+    elif isinstance(obj_or_cls, type):
+        raise TypeError(f"Fields of {cls.__name__} are only known from an instance; "
+                        f"pass one or set __serialize_fields__")
+    else:
+        fields = tuple(_public_attributes(obj_or_cls))
+        dynamic = True
+    plan = _PLANS[cls] = FieldPlan(cls, fields, dynamic, frozenset(obj_or_cls.__dict__) if dynamic else frozenset())
+    return plan
+
+
+def _has_dict(cls: type) -> bool:
+    return cls.__dictoffset__ != 0
+
+
+################################################################## 2. Writers
+def _open(path: str, mode: str) -> IO[bytes]:
+    opener = COMPRESSORS.get(os.path.splitext(path)[1])
+    return opener(path, mode) if opener else open(path, mode)
+
+
+class RecordWriter:
+    """
+    Buffered JSONL or CSV output for many objects.
+
+    with RecordWriter("users.jsonl.gz") as writer:
+        writer.write_many(users)
+
+    Format comes from the suffix before any compression suffix (.jsonl or
+    .csv) unless given. CSV needs one class per file (its header is fixed).
+    """
+
+    def __init__(self, target: Union[str, IO[bytes]], format: Optional[str] = None,
+                 buffer_size: int = DEFAULT_BUFFER):
+        if isinstance(target, str):
+            stem = target
+            if os.path.splitext(stem)[1] in COMPRESSORS:
+                stem = os.path.splitext(stem)[0]
+            format = format or ("csv" if stem.endswith(".csv") else "jsonl")
+            self._file = _open(target, "wb")
+            self._owns_file = True
+        else:
+            format = format or "jsonl"
+            self._file, self._owns_file = target, False
+        if format not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown format {format!r}, expected 'jsonl' or 'csv'")
+        self.format = format
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text) if format == "csv" else None
+        self._csv_fields: Optional[Tuple[str, ...]] = None
+
+    def write_many(self, objects: Iterable, chunk: int = 10_000) -> int:
+        """Write objects in chunks; returns how many were written"""
+        written = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == chunk:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def write(self, obj) -> None:
+        self._write_batch([obj])
+
+    def _write_batch(self, batch: List) -> int:
+        plan = field_plan(batch[0])
+        if self._csv is not None:
+            if self._csv_fields is None:
+                self._csv_fields = tuple(plan.to_dict(batch[0]))
+                self._csv.writerow(self._csv_fields)
+            if plan.fields == self._csv_fields and all(map(plan.matches, batch)):
+                self._csv.writerows(map(plan.values, batch))
+            else:  # Other classes or shapes in the batch: check every object against the header
+                self._csv.writerows([self._csv_row(obj) for obj in batch])
+        else:
+            self._text.write(self._jsonl(plan, batch))
+        self.count += len(batch)
+        if self._text.tell() >= self.buffer_size:
+            self.flush()
+        return len(batch)
+
+    def _csv_row(self, obj) -> tuple:
+        data = field_plan(obj).to_dict(obj)
+        if tuple(data) != self._csv_fields:
+            raise ValueError(f"CSV columns are {self._csv_fields}, {type(obj).__name__} object has {tuple(data)}")
+        return tuple(data.values())
+
+    def _jsonl(self, plan: FieldPlan, batch: List) -> str:
+        """
+        Encode a batch with one encoder call on the list of dicts, then cut it
+        into lines at '},{"<first field>":'. An unescaped quote cannot occur
+        inside a JSON string, so the marker only shows up between records or in
+        nested values - which the count check detects, falling back to one
+        encode call per object.
+        """
+        encode = self._encode
+        if plan.fields and all(map(plan.matches, batch)):
+            dicts = list(map(dict, map(zip, itertools.repeat(plan.fields), map(plan.values, batch))))
+            body = encode(dicts)[1:-1]
+            marker = '},{' + encode(plan.fields[0]) + ':'
+            if body.count(marker) == len(batch) - 1:
+                return body.replace(marker, '}\n{' + marker[3:]) + "\n"
+        else:
+            dicts = [field_plan(obj).to_dict(obj) for obj in batch]
+        return "\n".join(map(encode, dicts)) + "\n"
+
+    def flush(self) -> None:
+        data = self._text.getvalue()
+        if data:
+            self._file.write(data.encode("utf-8"))
+            self._text.seek(0)
+            self._text.truncate()
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def dump_many(objects: Iterable, path: str, format: Optional[str] = None) -> int:
+    with RecordWriter(path, format) as writer:
+        return writer.write_many(objects)
+
+
+################################################################## 3. Lazy reader
+def iter_records(path: str, cls: Optional[type] = None, format: Optional[str] = None,
+                 types: Optional[Dict[str, Callable]] = None) -> Iterator:
+    """
+    Yield one record at a time: a dict, or a `cls` instance rebuilt
+    without __init__. CSV values are strings unless `types` maps a column to
+    a converter (e.g. {"age": int}).
+    """
+    stem = os.path.splitext(path)[0] if os.path.splitext(path)[1] in COMPRESSORS else path
+    format = format or ("csv" if stem.endswith(".csv") else "jsonl")
+    build = field_plan_for_build(cls) if cls is not None else None
+    with io.TextIOWrapper(_open(path, "rb"), encoding="utf-8", newline="") as text:
+        if format == "csv":
+            reader = csv.reader(text)
+            header = next(reader, None)
+            if header is None:
+                return
+            converters = [(types or {}).get(name) for name in header]
+            for row in reader:
+                record = dict(zip(header, (convert(value) if convert else value
+                                           for convert, value in zip(converters, row))))
+                yield build(record) if build else record
+        else:
+            decode = json.JSONDecoder().decode
+            for line in text:
+                if line.strip():
+                    record = decode(line)
+                    yield build(record) if build else record
+
+
+def field_plan_for_build(cls: type) -> Callable[[dict], object]:
+    plan = _PLANS.get(cls) or FieldPlan(cls, tuple(_slot_names(cls)), dynamic=_has_dict(cls))
+    return plan.build
+
+
+################################################################## 4. The mixin
+class SerializeMixin:
+    """03_advanced.md's mixin, backed by the cached field plan"""
+
+    __slots__ = ()
+
+    def to_dict(self):
+        return field_plan(self).to_dict(self)
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def dump_many(cls, objects: Iterable, path: str, format: Optional[str] = None) -> int:
+        return dump_many(objects, path, format)
+
+    @classmethod
+    def load_many(cls, path: str, format: Optional[str] = None, types: Optional[Dict[str, Callable]] = None):
+        return iter_records(path, cls, format, types)
+
+
+class User(SerializeMixin):
+    def __init__(self, name, email, age=0):
+        self.name = name
+        self.email = email
+        self.age = age
+        self._password_hash = "x"  # Private: never serialized
+
+
+class SlottedUser(SerializeMixin):
+    __slots__ = ("name", "email", "age")
+
+    def __init__(self, name, email, age=0):
+        self.name = name
+        self.email = email
+        self.age = age
+
+
+################################################################## 5. Benchmark
+class _OriginalSerializeMixin:
+    def to_dict(self):
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+class _OriginalUser(_OriginalSerializeMixin):
+    def __init__(self, name, email, age=0):
+        self.name = name
+        self.email = email
+        self.age = age
+        self._password_hash = "x"
+
+
+def benchmark(count: int = 200_000) -> Dict[str, float]:
+    """Objects per second for each export path (and for reading back)"""
+    results = {}
+    originals = [_OriginalUser(f"user{i}", f"user{i}@example.com", i) for i in range(count)]
+    users = [User(f"user{i}", f"user{i}@example.com", i) for i in range(count)]
+    slotted = [SlottedUser(f"user{i}", f"user{i}@example.com", i) for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with open(os.path.join(tmp, "original.jsonl"), "w") as f:
+            for user in originals:
+                f.write(user.to_json() + "\n")
+        results["to_json() per object"] = count / (time.perf_counter() - start)
+
+        for label, objects, name in (("RecordWriter jsonl", users, "users.jsonl"),
+                                     ("RecordWriter jsonl (slots)", slotted, "slotted.jsonl"),
+                                     ("RecordWriter csv", users, "users.csv"),
+                                     ("RecordWriter jsonl.gz", users, "users.jsonl.gz")):
+            start = time.perf_counter()
+            dump_many(objects, os.path.join(tmp, name))
+            results[label] = count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = sum(1 for _ in iter_records(os.path.join(tmp, "users.jsonl"), User))
+        results["iter_records jsonl -> User"] = loaded / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    """
+    Demonstration of the streaming serializer
+    """
+    user = User("John", "john@example.com", 30)
+    print(user.to_json())
+    print(field_plan(SlottedUser).fields, SlottedUser("Ann", "ann@example.com").to_dict())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.jsonl.gz")
+        users = (SlottedUser(f"user{i}", f"user{i}@example.com", i) for i in range(5))
+        print(f"Wrote {SlottedUser.dump_many(users, path)} records to {os.path.basename(path)}")
+        for restored in SlottedUser.load_many(path):
+            print("  ", restored.to_dict())
+
+        csv_path = os.path.join(tmp, "users.csv")
+        dump_many([User("Bea", "bea@example.com", 27)], csv_path)
+        print(list(iter_records(csv_path, User, types={"age": int}))[0].to_dict())
+
+    print()
+    for name, rate in benchmark().items():
+        print(f"{name:<28} {rate / 1e6:6.2f} M objects/s")
+
+
+if __name__ == "__main__":
+    main()
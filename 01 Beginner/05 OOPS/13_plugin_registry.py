@@ -0,0 +1,318 @@
+"""
+Lazy, Manifest-based Plugin Registry
+
+`RegisteredMeta` in 03_advanced.md only knows about plugin classes whose
+modules have been imported, so a service has to import every plugin module
+at startup just to fill get_registry(), even if a request uses one plugin.
+This registry finds plugins without importing them:
+
+1. A manifest (plugin name -> module file) is built by reading the plugin
+   files with `ast` - no plugin code runs - and cached as JSON
+2. Later startups only stat() the plugin files; the manifest is rebuilt when
+   a file was added, removed or changed (mtime or size)
+3. get_registry() returns lazy proxies: the plugin module is imported the
+   first time a plugin is instantiated or one of its attributes is used
+4. Startup time and peak resident memory (Unix only), eager vs lazy, measured in fresh
+   interpreters
+"""
+
+import ast
+import importlib.util
+import json
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from typing import Dict, List, Optional
+
+BASE_MODULE = "plugin_registry"  # Name plugin files import BasePlugin from
+
+
+################################################################## 1. The metaclass (as in 03_advanced.md)
+class RegisteredMeta(type):
+    _registry = {}
+
+    def __new__(mcs, name, bases, namespace):
+        cls = super().__new__(mcs, name, bases, namespace)
+        if bases:  # Don't register the base class
+            mcs._registry[name] = cls
+        return cls
+
+    @classmethod
+    def get_registry(mcs):
+        return dict(mcs._registry)
+
+
+class BasePlugin(metaclass=RegisteredMeta):
+    pass
+
+
+################################################################## 2. Building the manifest without importing
+def _base_names(node: ast.ClassDef) -> List[str]:
+    names = []
+    for base in node.bases:
+        if isinstance(base, ast.Name):
+            names.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            names.append(base.attr)
+    return names
+
+
+def scan_plugins(directory: str, base_names=("BasePlugin",)) -> Dict[str, str]:
+    """
+    Plugin class name -> file, for every top-level class in directory/*.py
+    that derives (directly or through other plugin classes) from a base
+    in `base_names`. Files are parsed, never executed.
+    """
+    classes = []  # (class name, its base names, file)
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if not entry.name.endswith(".py") or entry.name.startswith("_"):
+            continue
+        with open(entry.path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=entry.path)
+        classes.extend((node.name, _base_names(node), entry.path)
+                       for node in tree.body if isinstance(node, ast.ClassDef))
+    known = set(base_names)
+    plugins: Dict[str, str] = {}
+    changed = True
+    while changed:  # Subclasses of plugins in other files are plugins too
+        changed = False
+        for name, bases, path in classes:
+            if name not in plugins and known.intersection(bases):
+                plugins[name] = path
+                known.add(name)
+                changed = True
+    return plugins
+
+
+def _fingerprint(directory: str) -> Dict[str, List[int]]:
+    return {entry.path: [entry.stat().st_mtime_ns, entry.stat().st_size]
+            for entry in os.scandir(directory) if entry.name.endswith(".py")}
+
+
+################################################################## 3. Lazy proxies and the registry
+class LazyPlugin:
+    """
+    Stands in for a plugin class until it is used: calling it (to make an
+    instance) or reading an attribute imports the module once.
+    """
+
+    __slots__ = ("name", "path", "_registry", "_cls")
+
+    def __init__(self, name: str, path: str, registry: "LazyRegistry"):
+        self.name = name
+        self.path = path
+        self._registry = registry
+        self._cls = None
+
+    def load(self) -> type:
+        if self._cls is None:
+            self._cls = self._registry._load_class(self.name, self.path)
+        return self._cls
+
+    @property
+    def loaded(self) -> bool:
+        return self._cls is not None
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._cls is not None else "not loaded"
+        return f"<LazyPlugin {self.name} from {os.path.basename(self.path)} ({state})>"
+
+
+class LazyRegistry:
+    """
+    Plugin registry for a directory of plugin modules.
+
+    registry = LazyRegistry("plugins/")
+    registry.get_registry()["Plugin1"]().run()   # imports only Plugin1's module
+    """
+
+    def __init__(self, directory: str, manifest_path: Optional[str] = None, package: str = "plugins"):
+        self.directory = os.path.abspath(directory)
+        self.manifest_path = manifest_path or os.path.join(self.directory, ".plugin-manifest.json")
+        self.package = package
+        self.rebuilt = False
+        self._lock = threading.Lock()
+        self._proxies: Dict[str, LazyPlugin] = {}
+        # Plugin files do `from plugin_registry import BasePlugin`
+        sys.modules.setdefault(BASE_MODULE, sys.modules[__name__])
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        fingerprint = _fingerprint(self.directory)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("files") == fingerprint:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        manifest = {"files": fingerprint, "plugins": scan_plugins(self.directory)}
+        self.rebuilt = True
+        temporary = self.manifest_path + ".tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(temporary, self.manifest_path)  # Readers never see a half-written manifest
+        except OSError:  # e.g. a read-only plugin directory: use the scan, just don't cache it
+            pass
+        return manifest
+
+    def refresh(self) -> bool:
+        """
+        Re-check the plugin files; returns True if the manifest was rebuilt.
+        Modules of changed or removed files are dropped from sys.modules, so
+        their plugins are imported afresh on next use.
+        """
+        old_files = self._manifest["files"]
+        self.rebuilt = False
+        self._manifest = self._load_manifest()
+        if self.rebuilt:
+            new_files = self._manifest["files"]
+            changed = {path for path, stamp in old_files.items() if new_files.get(path) != stamp}
+            with self._lock:
+                for path in changed:
+                    sys.modules.pop(self._module_name(path), None)
+                self._proxies = {name: proxy for name, proxy in self._proxies.items()
+                                 if self._manifest["plugins"].get(name) == proxy.path and proxy.path not in changed}
+        return self.rebuilt
+
+    def get_registry(self) -> Dict[str, LazyPlugin]:
+        with self._lock:
+            for name, path in self._manifest["plugins"].items():
+                if name not in self._proxies:
+                    self._proxies[name] = LazyPlugin(name, path, self)
+            return dict(self._proxies)
+
+    def _module_name(self, path: str) -> str:
+        # The directory is part of the name: registries sharing `package` must not share sys.modules entries
+        directory = hashlib.sha1(os.path.dirname(os.path.abspath(path)).encode()).hexdigest()[:12]
+        return f"{self.package}._{directory}.{os.path.splitext(os.path.basename(path))[0]}"
+
+    def _load_class(self, name: str, path: str) -> type:
+        module_name = self._module_name(path)
+        with self._lock:
+            module = sys.modules.get(module_name)
+            if module is None:
+                spec = importlib.util.spec_from_file_location(module_name, path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[module_name] = module
+                try:
+                    spec.loader.exec_module(module)
+                except BaseException:
+                    del sys.modules[module_name]
+                    raise
+        cls = getattr(module, name, None)
+        if cls is None:
+            raise ImportError(f"{path} no longer defines plugin {name!r}; call refresh()")
+        return cls
+
+    def import_all(self) -> Dict[str, type]:
+        """The eager behaviour: import every plugin module now"""
+        return {name: proxy.load() for name, proxy in self.get_registry().items()}
+
+
+################################################################## 4. Startup and memory: eager vs lazy
+PLUGIN_TEMPLATE = '''
+import decimal, email.parser, xml.dom.minidom, {extra}
+from plugin_registry import BasePlugin
+
+TABLE = [i * i for i in range({table_size})]  # Module-level setup work
+
+
+class Plugin{index}(BasePlugin):
+    def run(self):
+        return "Plugin {index} running"
+'''
+EXTRA_IMPORTS = ["csv", "difflib", "fractions", "statistics", "urllib.request", "http.client", "sqlite3",
+                 "zipfile", "tarfile", "pydoc", "unittest", "argparse"]
+
+
+def make_plugin_directory(directory: str, count: int = 40, table_size: int = 20_000) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for index in range(1, count + 1):
+        with open(os.path.join(directory, f"plugin{index}.py"), "w", encoding="utf-8") as f:
+            f.write(PLUGIN_TEMPLATE.format(index=index, table_size=table_size,
+                                           extra=EXTRA_IMPORTS[index % len(EXTRA_IMPORTS)]))
+
+
+def _child_measurement(mode: str, directory: str) -> None:
+    """Runs in a fresh interpreter: start up, use one plugin, print JSON"""
+    start = time.perf_counter()
+    registry = LazyRegistry(directory)
+    if mode == "eager":
+        registry.import_all()
+    plugins = registry.get_registry()
+    startup = time.perf_counter() - start
+    result = plugins["Plugin1"]().run()
+    try:
+        import resource  # Unix only
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        max_rss_kb = 0
+    print(json.dumps({"startup_ms": startup * 1000, "max_rss_kb": max_rss_kb,
+                      "plugins": len(plugins), "modules_imported": sum(p.loaded for p in plugins.values()),
+                      "manifest_rebuilt": registry.rebuilt, "result": result}))
+
+
+def measure(mode: str, directory: str) -> Dict:
+    code = textwrap.dedent(f"""
+        import importlib.util, sys
+        spec = importlib.util.spec_from_file_location("plugin_registry", {os.path.abspath(__file__)!r})
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["plugin_registry"] = module
+        spec.loader.exec_module(module)
+        module._child_measurement({mode!r}, {directory!r})
+    """)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    """
+    Demonstration of the lazy registry
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "plugins")
+        make_plugin_directory(directory)
+
+        registry = LazyRegistry(directory)
+        plugins = registry.get_registry()
+        print(f"{len(plugins)} plugins in the manifest (rebuilt: {registry.rebuilt})")
+        print(plugins["Plugin2"])
+        print(plugins["Plugin2"]().run())
+        print(plugins["Plugin2"])
+        print("Loaded:", sum(p.loaded for p in plugins.values()), "of", len(plugins))
+
+        # A new plugin file invalidates the cached manifest
+        with open(os.path.join(directory, "extra.py"), "w") as f:
+            f.write("from plugin_registry import BasePlugin\n\n"
+                    "class ExtraPlugin(BasePlugin):\n    def run(self):\n        return 'Extra running'\n")
+        print("Manifest rebuilt after adding a file:", registry.refresh())
+        print(registry.get_registry()["ExtraPlugin"]().run())
+
+        # Editing a loaded plugin's file re-imports it on next use
+        with open(os.path.join(directory, "plugin2.py"), "a") as f:
+            f.write("\n\nclass Plugin2b(BasePlugin):\n    def run(self):\n        return 'Plugin 2b running'\n")
+        print("Manifest rebuilt after editing plugin2.py:", registry.refresh())
+        print(registry.get_registry()["Plugin2b"]().run())
+
+        print(f"\n{'mode':<6} {'startup ms':>11} {'max RSS MB':>11} {'modules imported':>17}")
+        for mode in ("eager", "lazy"):
+            result = measure(mode, directory)
+            print(f"{mode:<6} {result['startup_ms']:11.1f} {result['max_rss_kb'] / 1024:11.1f} "
+                  f"{result['modules_imported']:17d}")
+
+
+if __name__ == "__main__":
+    main()
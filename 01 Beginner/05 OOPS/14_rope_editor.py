@@ -0,0 +1,460 @@
+"""
+Rope-backed TextEditor for the Command Pattern
+
+`TextEditor` in 03_advanced.md keeps the document in one str: insert() does
+`self.text += text` and delete() copies `self.text[:-length]`, so every
+edit copies the whole document (O(n) per edit, O(n^2) per session), and
+both only work at the end of the text. This version keeps the document in a
+rope:
+
+1. A persistent balanced (AVL) tree whose leaves are string chunks of up to
+   LEAF_SIZE characters; insert and delete at any position rebuild only the
+   O(log n) nodes on one root-to-leaf path and never copy the document
+2. Edits build new nodes and share the old ones, so a snapshot is just a
+   reference: commands undo and redo by swapping snapshots in O(1)
+3. save() streams the chunks to a file without building one large string
+4. A drop-in TextEditor / InsertCommand / CommandInvoker, plus DeleteCommand
+5. Benchmarks: a million edits against the str-based editor
+"""
+
+import os
+import random
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Tuple, Union
+
+LEAF_SIZE = 256  # Adjacent leaves are merged while their total stays within this
+
+
+################################################################## 1. Rope nodes
+# A tree is either a leaf - a plain str - or an internal node, the tuple
+# (left, right, length, height). Tuples rather than a class: they are built
+# without an __init__ call, and the garbage collector stops tracking tuples
+# that only hold strings, ints and other untracked tuples, so a long undo
+# history (which keeps every version alive) adds nothing to collection time.
+Tree = Union[tuple, str]
+
+
+def _node(left: Tree, right: Tree) -> tuple:
+    if left.__class__ is str:
+        length, height = len(left), 0
+    else:
+        length, height = left[2], left[3]
+    if right.__class__ is str:
+        return left, right, length + len(right), height + 1
+    return left, right, length + right[2], max(height, right[3]) + 1
+
+
+def _length(tree: Tree) -> int:
+    return len(tree) if tree.__class__ is str else tree[2]
+
+
+def _height(tree: Tree) -> int:
+    return 0 if tree.__class__ is str else tree[3]
+
+
+def _balance(left: Tree, right: Tree) -> Tree:
+    """Node over left and right, rotated if their heights differ by two"""
+    left_height = 0 if left.__class__ is str else left[3]
+    right_height = 0 if right.__class__ is str else right[3]
+    difference = left_height - right_height
+    if -2 < difference < 2:
+        return _node(left, right)
+    if difference == 2:
+        outer, inner = left[0], left[1]
+        if _height(outer) >= _height(inner):
+            return _node(outer, _node(inner, right))
+        return _node(_node(outer, inner[0]), _node(inner[1], right))
+    if difference == -2:
+        inner, outer = right[0], right[1]
+        if _height(outer) >= _height(inner):
+            return _node(_node(left, inner), outer)
+        return _node(_node(left, inner[0]), _node(inner[1], outer))
+    return _join(left, right)
+
+
+def _join(left: Tree, right: Tree) -> Tree:
+    """Concatenate two trees, descending the taller one (O(height difference))"""
+    if not _length(left):
+        return right
+    if not _length(right):
+        return left
+    left_height, right_height = _height(left), _height(right)
+    if left_height > right_height + 1:
+        return _balance(left[0], _join(left[1], right))
+    if right_height > left_height + 1:
+        return _balance(_join(left, right[0]), right[1])
+    if left_height == right_height == 0 and len(left) + len(right) <= LEAF_SIZE:
+        return left + right
+    return _node(left, right)
+
+
+def _split(tree: Tree, index: int) -> Tuple[Tree, Tree]:
+    """(first `index` characters, the rest)"""
+    if tree.__class__ is str:
+        return tree[:index], tree[index:]
+    left, right = tree[0], tree[1]
+    left_length = _length(left)
+    if index < left_length:
+        first, second = _split(left, index)
+        return first, _join(second, right)
+    if index > left_length:
+        first, second = _split(right, index - left_length)
+        return _join(left, first), second
+    return left, right
+
+
+def _insert(tree: Tree, index: int, text: str) -> Tree:
+    """
+    Insert a short text (at most LEAF_SIZE) with one descent: it is merged
+    into the leaf when it fits, otherwise the leaf becomes a small subtree
+    """
+    if tree.__class__ is str:
+        if len(tree) + len(text) <= LEAF_SIZE:
+            return tree[:index] + text + tree[index:]
+        return _join(_join(tree[:index], text), tree[index:])
+    left = tree[0]
+    left_length = len(left) if left.__class__ is str else left[2]
+    if index <= left_length:
+        return _balance(_insert(left, index, text), tree[1])
+    return _balance(left, _insert(tree[1], index - left_length, text))
+
+
+def _delete(tree: Tree, start: int, length: int) -> Tree:
+    """Remove tree[start:start + length]; descends once unless the range spans both children"""
+    if tree.__class__ is str:
+        return tree[:start] + tree[start + length:]
+    left, right = tree[0], tree[1]
+    left_length = _length(left)
+    if start + length <= left_length:
+        left = _delete(left, start, length)
+        return _balance(left, right) if _length(left) else right
+    if start >= left_length:
+        right = _delete(right, start - left_length, length)
+        return _balance(left, right) if _length(right) else left
+    return _join(_split(tree, start)[0], _split(tree, start + length)[1])
+
+
+def _from_text(text: str) -> Tree:
+    """Balanced tree over LEAF_SIZE chunks of text"""
+    leaves = [text[i:i + LEAF_SIZE] for i in range(0, len(text), LEAF_SIZE)] or [""]
+    while len(leaves) > 1:
+        paired = [_node(leaves[i], leaves[i + 1]) for i in range(0, len(leaves) - 1, 2)]
+        if len(leaves) % 2:
+            paired[-1] = _node(paired[-1], leaves[-1])  # Height grows by at most one: still balanced
+        leaves = paired
+    return leaves[0]
+
+
+################################################################## 2. The rope
+class Rope:
+    """
+    Immutable text. Every edit returns a new Rope sharing all unchanged
+    chunks with the old one.
+
+    rope = Rope("Hello World!")
+    rope.insert(5, ",").delete(0, 7)     # Rope('World!')
+    """
+
+    __slots__ = ("_tree",)
+
+    def __init__(self, text: str = ""):
+        self._tree = _from_text(text) if len(text) > LEAF_SIZE else text
+
+    @classmethod
+    def _wrap(cls, tree: Tree) -> "Rope":
+        rope = cls.__new__(cls)
+        rope._tree = tree
+        return rope
+
+    def __len__(self) -> int:
+        return _length(self._tree)
+
+    def _check(self, position: int) -> int:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position <= len(self):
+            raise IndexError(f"position {position} outside 0..{len(self)}")
+        return position
+
+    def insert(self, position: int, text: str) -> "Rope":
+        position = self._check(position)
+        if not text:
+            return self
+        if len(text) <= LEAF_SIZE:
+            return self._wrap(_insert(self._tree, position, text))
+        first, second = _split(self._tree, position)
+        return self._wrap(_join(_join(first, _from_text(text)), second))
+
+    def delete(self, position: int, length: int) -> "Rope":
+        position = self._check(position)
+        length = min(length, len(self) - position)
+        if length <= 0:
+            return self
+        return self._wrap(_delete(self._tree, position, length))
+
+    def slice(self, start: int, end: Optional[int] = None) -> str:
+        start = self._check(start)
+        end = len(self) if end is None else self._check(end)
+        middle, _ = _split(_split(self._tree, start)[1], max(end - start, 0))
+        return "".join(self._chunks(middle))
+
+    @staticmethod
+    def _chunks(tree: Tree) -> Iterator[str]:
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is str:
+                if node:
+                    yield node
+            else:
+                stack.append(node[1])
+                stack.append(node[0])
+
+    def chunks(self) -> Iterator[str]:
+        """The text as a sequence of leaf strings, in order"""
+        return self._chunks(self._tree)
+
+    def __str__(self) -> str:
+        return "".join(self.chunks())
+
+    def __repr__(self) -> str:
+        text = self.slice(0, min(len(self), 40))
+        return f"Rope({text!r}{'...' if len(self) > 40 else ''})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Rope):
+            return len(self) == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    @property
+    def height(self) -> int:
+        return _height(self._tree)
+
+
+################################################################## 3. The editor and commands (as in 03_advanced.md)
+class Command(ABC):
+    @abstractmethod
+    def execute(self):
+        pass
+
+    @abstractmethod
+    def undo(self):
+        pass
+
+
+class TextEditor:
+    """
+    Same interface as the str-based TextEditor; `position` is optional and
+    defaults to the end of the text.
+    """
+
+    def __init__(self, text: str = ""):
+        self.rope = Rope(text)
+
+    def insert(self, text: str, position: Optional[int] = None):
+        self.rope = self.rope.insert(len(self.rope) if position is None else position, text)
+
+    def delete(self, length: int, position: Optional[int] = None):
+        if position is None:  # Original behaviour: remove from the end, ignore impossible deletes
+            if length <= len(self.rope):
+                self.rope = self.rope.delete(len(self.rope) - length, length)
+        else:
+            self.rope = self.rope.delete(position, length)
+
+    def get_text(self) -> str:
+        return str(self.rope)
+
+    def __len__(self) -> int:
+        return len(self.rope)
+
+    def snapshot(self) -> Rope:
+        """O(1): ropes are immutable, so the current one is the snapshot"""
+        return self.rope
+
+    def restore(self, snapshot: Rope):
+        self.rope = snapshot
+
+    def save(self, path: str, encoding: str = "utf-8"):
+        """Stream the chunks to `path`; the full text is never built"""
+        with open(path, "w", encoding=encoding) as f:
+            f.writelines(self.rope.chunks())
+
+
+class InsertCommand(Command):
+    def __init__(self, editor: TextEditor, text: str, position: Optional[int] = None):
+        self.editor = editor
+        self.text = text
+        self.position = position
+        self._before = self._after = None
+
+    def execute(self):
+        if self._after is not None:  # Redo: the result is already known
+            self.editor.restore(self._after)
+            return
+        self._before = self.editor.snapshot()
+        self.editor.insert(self.text, self.position)
+        self._after = self.editor.snapshot()
+
+    def undo(self):
+        self.editor.restore(self._before)
+
+
+class DeleteCommand(InsertCommand):
+    def __init__(self, editor: TextEditor, position: int, length: int):
+        super().__init__(editor, "", position)
+        self.length = length
+
+    def execute(self):
+        if self._after is not None:
+            self.editor.restore(self._after)
+            return
+        self._before = self.editor.snapshot()
+        self.editor.delete(self.length, self.position)
+        self._after = self.editor.snapshot()
+
+
+class CommandInvoker:
+    def __init__(self):
+        self._commands: List[Command] = []
+        self._current = -1
+
+    def execute(self, command: Command):
+        self._current += 1
+        if self._current < len(self._commands):
+            self._commands[self._current:] = []
+        self._commands.append(command)
+        command.execute()
+
+    def undo(self):
+        if self._current >= 0:
+            self._commands[self._current].undo()
+            self._current -= 1
+
+    def redo(self):
+        if self._current + 1 < len(self._commands):
+            self._current += 1
+            self._commands[self._current].execute()
+
+
+################################################################## 4. Benchmarks
+class StrTextEditor:
+    """TextEditor from 03_advanced.md, plus positional edits done by slicing"""
+
+    def __init__(self):
+        self.text = ""
+
+    def insert(self, text, position=None):
+        if position is None:
+            self.text += text
+        else:
+            self.text = self.text[:position] + text + self.text[position:]
+
+    def delete(self, length, position=None):
+        if position is None:
+            if length <= len(self.text):
+                self.text = self.text[:-length]
+        else:
+            self.text = self.text[:position] + self.text[position + length:]
+
+    def get_text(self):
+        return self.text
+
+
+def _edits(count: int, seed: int = 5) -> List[Tuple[str, int, object]]:
+    """Random session: mostly typing at a moving cursor, some deletes and jumps"""
+    rng = random.Random(seed)
+    edits, size, cursor = [], 0, 0
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            cursor = rng.randint(0, size)
+        elif roll < 0.2 and size:
+            length = min(rng.randint(1, 8), size - min(cursor, size - 1))
+            cursor = min(cursor, size - length)
+            edits.append(("delete", cursor, length))
+            size -= length
+            continue
+        word = rng.choice(["the ", "quick ", "brown ", "fox ", "jumps\n", "over ", "lazy ", "dog. "])
+        edits.append(("insert", cursor, word))
+        size += len(word)
+        cursor += len(word)
+    return edits
+
+
+def _run(editor, edits, with_commands: bool = False) -> float:
+    start = time.perf_counter()
+    if with_commands:
+        invoker = CommandInvoker()
+        for kind, position, value in edits:
+            if kind == "insert":
+                invoker.execute(InsertCommand(editor, value, position))
+            else:
+                invoker.execute(DeleteCommand(editor, position, value))
+    else:
+        for kind, position, value in edits:
+            if kind == "insert":
+                editor.insert(value, position)
+            else:
+                editor.delete(value, position)
+    return time.perf_counter() - start
+
+
+def benchmark(count: int = 1_000_000) -> None:
+    print(f"\n{'edits':>10} {'str editor s':>13} {'rope editor s':>14} {'rope + commands s':>18} {'final chars':>12}")
+    for size in (10_000, 50_000, 200_000, count):
+        edits = _edits(size)
+        str_time = "-"
+        if size <= 200_000:  # Quadratic: a million edits would take far too long
+            str_editor = StrTextEditor()
+            str_time = f"{_run(str_editor, edits):13.2f}"
+        rope_editor = TextEditor()
+        rope_time = _run(rope_editor, edits)
+        command_editor = TextEditor()
+        command_time = _run(command_editor, edits, with_commands=True)
+        if size <= 200_000:
+            assert rope_editor.get_text() == command_editor.get_text() == str_editor.get_text()
+        print(f"{size:>10,} {str_time:>13} {rope_time:14.2f} {command_time:18.2f} {len(rope_editor):>12,}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "document.txt")
+        start = time.perf_counter()
+        rope_editor.save(path)
+        print(f"Streamed {os.path.getsize(path) / 2**20:.1f} MB to disk in {time.perf_counter() - start:.2f} s "
+              f"(rope height {rope_editor.rope.height})")
+
+
+def main():
+    """
+    Demonstration of the rope-backed editor
+    """
+    editor = TextEditor()
+    invoker = CommandInvoker()
+
+    invoker.execute(InsertCommand(editor, "Hello "))
+    invoker.execute(InsertCommand(editor, "World!"))
+    print(editor.get_text())  # Output: Hello World!
+    invoker.undo()
+    print(editor.get_text())  # Output: Hello
+    invoker.redo()
+    print(editor.get_text())  # Output: Hello World!
+
+    invoker.execute(InsertCommand(editor, "there, ", position=6))
+    invoker.execute(DeleteCommand(editor, position=0, length=6))
+    print(editor.get_text())  # Output: there, World!
+    invoker.undo()
+    invoker.undo()
+    print(editor.get_text())  # Output: Hello World!
+
+    rope = Rope("x" * 1000)
+    edited = rope.insert(500, "[middle]")
+    print(len(rope), len(edited), edited.slice(498, 510), rope.height)
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
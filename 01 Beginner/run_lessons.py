@@ -0,0 +1,286 @@
+"""
+Single-interpreter Lesson Runner
+
+Running every script under 01 Beginner/ as its own `python` process pays
+interpreter startup and the stdlib imports (logging, pprint, itertools,
+typing, collections, ...) once per script. This runner executes all of them
+in one warm interpreter instead:
+
+1. Each script runs through runpy.run_path as __main__ with its own fresh
+   globals, its own working directory and captured stdout/stderr
+2. Global state the lessons touch (sys.argv, cwd, logging handlers) is
+   restored after every script
+3. --fork: pre-import the common stdlib modules once, then fork a child per
+   script, so scripts share the warm imports but cannot leak state (POSIX only)
+4. Per-script wall time, plus the `-X importtime` cost of each script's
+   imports, checked against an optional startup budget
+
+Usage:
+    python run_lessons.py
+    python run_lessons.py --fork --importtime --budget-ms 50
+    python run_lessons.py --skip "*benchmark*" --show-output
+"""
+
+import argparse
+import ast
+import contextlib
+import fnmatch
+import io
+import json
+import logging
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from typing import Dict, List, Optional
+
+LESSON_ROOT = os.path.dirname(os.path.abspath(__file__))
+# Imported once by the parent so every forked child starts warm
+WARM_MODULES = ["logging", "pprint", "itertools", "typing", "collections", "functools",
+                "math", "heapq", "json", "time", "contextlib", "dataclasses", "abc", "re"]
+
+
+################################################################## 1. Finding the scripts
+def discover(root: str = LESSON_ROOT, skip: Optional[List[str]] = None) -> List[str]:
+    """All lesson scripts under root in sorted order, minus this runner and `skip` globs"""
+    skip = skip or []
+    scripts = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith((".", "__")))
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root)
+            if not name.endswith(".py") or os.path.abspath(path) == os.path.abspath(__file__):
+                continue
+            if any(fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(name, pattern) for pattern in skip):
+                continue
+            scripts.append(path)
+    return scripts
+
+
+def imported_modules(path: str) -> List[str]:
+    """Top-level modules a script imports, found statically with ast"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.append(node.module.split(".")[0])
+    return sorted(set(modules))
+
+
+################################################################## 2. Running one script in this interpreter
+class ScriptResult:
+    """Outcome of one lesson script"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ok = False
+        self.seconds = 0.0
+        self.stdout = ""
+        self.stderr = ""
+        self.error: Optional[str] = None
+        self.import_ms: Optional[float] = None
+        self.modules: List[str] = []
+
+    def to_dict(self) -> Dict:
+        return {key: value for key, value in vars(self).items() if key not in ("stdout", "stderr")}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScriptResult":
+        result = cls(data["path"])
+        vars(result).update(data)
+        return result
+
+
+@contextlib.contextmanager
+def _isolated_process_state(path: str, workdir: str):
+    """Restore argv, cwd, sys.path and logging configuration after a script"""
+    saved_argv, saved_path, saved_cwd = sys.argv[:], sys.path[:], os.getcwd()
+    root_logger = logging.getLogger()
+    saved_handlers, saved_level = root_logger.handlers[:], root_logger.level
+    sys.argv = [path]
+    sys.path.insert(0, os.path.dirname(path))
+    os.chdir(workdir)
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        for handler in root_logger.handlers[:]:
+            if handler not in saved_handlers:
+                root_logger.removeHandler(handler)
+                handler.close()
+        root_logger.setLevel(saved_level)
+
+
+def run_script(path: str, workdir: Optional[str] = None) -> ScriptResult:
+    """
+    Run one script as __main__ with fresh globals and captured output.
+    Files the script writes (output.txt, app.log, ...) land in `workdir`.
+    """
+    result = ScriptResult(path)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="lesson-"))
+        stack.enter_context(_isolated_process_state(path, workdir))
+        stack.enter_context(contextlib.redirect_stdout(stdout))
+        stack.enter_context(contextlib.redirect_stderr(stderr))
+        start = time.perf_counter()
+        try:
+            runpy.run_path(path, run_name="__main__")
+            result.ok = True
+        except SystemExit as exit_:
+            result.ok = exit_.code in (None, 0)
+            if not result.ok:
+                result.error = f"SystemExit({exit_.code!r})"
+        except BaseException:
+            result.error = traceback.format_exc()
+        finally:
+            result.seconds = time.perf_counter() - start
+    result.stdout, result.stderr = stdout.getvalue(), stderr.getvalue()
+    return result
+
+
+################################################################## 3. Forking from a warm parent
+def warm_up(modules: List[str] = WARM_MODULES) -> float:
+    """Import the shared modules once; returns how long that took"""
+    start = time.perf_counter()
+    for name in modules:
+        __import__(name)
+    return time.perf_counter() - start
+
+
+def run_script_forked(path: str, workdir: Optional[str] = None) -> ScriptResult:
+    """Run a script in a forked child of this (warm) process"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child: run, send the result back as JSON, exit without cleanup
+        os.close(read_fd)
+        status = 0
+        try:
+            result = run_script(path, workdir)
+            payload = dict(result.to_dict(), stdout=result.stdout, stderr=result.stderr)
+            with os.fdopen(write_fd, "w", encoding="utf-8") as pipe:
+                json.dump(payload, pipe)
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd, encoding="utf-8") as pipe:
+        data = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if not data:
+        result = ScriptResult(path)
+        result.error = f"child exited with status {status} without a result"
+        return result
+    return ScriptResult.from_dict(json.loads(data))
+
+
+################################################################## 4. Import-time cost
+def interpreter_startup_ms(python: str = sys.executable, repeat: int = 5) -> float:
+    """Best wall time of `python -c pass`, the cost a separate process pays every time"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([python, "-c", "pass"], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def import_time_ms(modules: List[str], python: str = sys.executable) -> float:
+    """
+    Cumulative import time (ms) of `modules` in a fresh interpreter, from the
+    `-X importtime` report. Modules that fail to import are ignored.
+    """
+    if not modules:
+        return 0.0
+    code = "\n".join(f"try:\n    import {name}\nexcept Exception:\n    pass" for name in modules)
+    process = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    total_us = 0
+    wanted = set(modules)
+    for line in process.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name in wanted and cumulative.isdigit():
+            total_us += int(cumulative)  # Top-level entries already include their dependencies
+    return total_us / 1000
+
+
+################################################################## 5. Running everything
+def run_all(scripts: List[str], fork: bool = False, importtime: bool = False,
+            show_output: bool = False) -> List[ScriptResult]:
+    if fork and not hasattr(os, "fork"):
+        raise RuntimeError("--fork needs os.fork (POSIX)")
+    if fork:
+        warm_up()
+    runner = run_script_forked if fork else run_script
+    results = []
+    for path in scripts:
+        result = runner(path)
+        if importtime:
+            result.modules = imported_modules(path)
+            result.import_ms = import_time_ms(result.modules)
+        results.append(result)
+        if show_output:
+            print(f"----- {os.path.relpath(path, LESSON_ROOT)}")
+            print(result.stdout, end="")
+    return results
+
+
+def print_report(results: List[ScriptResult], startup_ms: Optional[float], budget_ms: Optional[float]) -> bool:
+    """Print the per-script table; returns False if any script failed or broke the budget"""
+    ok = True
+    print(f"{'script':<60} {'status':<7} {'wall ms':>9} {'import ms':>10}")
+    for result in results:
+        status = "ok" if result.ok else "FAILED"
+        import_ms = "" if result.import_ms is None else f"{result.import_ms:10.1f}"
+        if budget_ms is not None and result.import_ms is not None and result.import_ms > budget_ms:
+            status = "BUDGET"
+            ok = False
+        ok = ok and result.ok
+        print(f"{os.path.relpath(result.path, LESSON_ROOT):<60} {status:<7} {result.seconds * 1000:9.1f} {import_ms:>10}")
+        if result.error:
+            print("    " + result.error.strip().replace("\n", "\n    "))
+    total = sum(result.seconds for result in results) * 1000
+    print(f"\n{len(results)} scripts, {total:.1f} ms of script time in one interpreter")
+    if startup_ms is not None:
+        saved = startup_ms * (len(results) - 1)
+        print(f"Interpreter startup is {startup_ms:.1f} ms per process, "
+              f"so separate processes would add about {saved:.0f} ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every lesson script in one warm interpreter")
+    parser.add_argument("scripts", nargs="*", help="Scripts to run (default: all under 01 Beginner/)")
+    parser.add_argument("--skip", action="append", default=[], help="Glob of scripts to skip (repeatable)")
+    parser.add_argument("--fork", action="store_true", help="Fork a child per script from a pre-imported parent")
+    parser.add_argument("--importtime", action="store_true", help="Measure each script's imports with -X importtime")
+    parser.add_argument("--budget-ms", type=float, help="Fail if a script's import time exceeds this")
+    parser.add_argument("--show-output", action="store_true", help="Print each script's captured stdout")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    options = parser.parse_args()
+
+    scripts = [os.path.abspath(path) for path in options.scripts] or discover(skip=options.skip)
+    importtime = options.importtime or options.budget_ms is not None
+    results = run_all(scripts, options.fork, importtime, options.show_output)
+    startup_ms = interpreter_startup_ms() if importtime else None
+    ok = print_report(results, startup_ms, options.budget_ms)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump({"startup_ms": startup_ms, "results": [r.to_dict() for r in results]}, f, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()